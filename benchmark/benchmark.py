@@ -16,35 +16,32 @@
 import openwakeword
 import numpy as np
 from pathlib import Path
-from collections import defaultdict
 
 # Define benchmark to assess inference speed of models at different audio chunk sizes
 # Smaller chunk sizes may increase model performance, at the cost of inference efficiency
 def run_benchmark():
     # Load models
-    model_paths = [str(i) for i in Path("openwakeword/resources/models").glob("*.onnx") \
-                   if "embedding" not in str(i) and "melspectrogram" not in str(i)]
+    model_paths = [str(i) for i in Path("openwakeword/resources/models").glob("*.onnx")
+                   if "embedding" not in str(i) and "melspectrogram" not in str(i) and "silero_vad" not in str(i)]
     M = openwakeword.Model(
-        wakeword_model_paths=model_paths,
-        input_sizes=[16]
+        wakeword_models=model_paths,
+        inference_framework="onnx",
+        instrumentation=True
     )
 
     # Create random data to use for benchmarking
-    clip = np.random.random(16000*10).astype(np.float32)
+    clip = np.random.randint(-1000, 1000, 16000*10).astype(np.int16)
 
     # Run the benchmark
     step_size = 1280
-    preprocessing_times = []
-    model_times = defaultdict(list)
     for i in range(0, clip.shape[0]-step_size, step_size):
-        pred, timing_dict = M.predict(clip[i:i+step_size], timing=True)
-        preprocessing_times.append(timing_dict["preprocessor"])
-        for mdl_name in M.models.keys():
-            model_times[mdl_name].append(timing_dict["models"][mdl_name])
+        M.predict(clip[i:i+step_size])
+
+    summary = M.instrumentation.summary()
+    print(f"Latencies (in seconds) with a frame size of {step_size/16000} seconds:")
+    for stage, stats in summary["stages"].items():
+        print(f"{stage}: mean {stats['mean']:.6f}, p50 {stats['p50']:.6f}, p99 {stats['p99']:.6f}, max {stats['max']:.6f}")
 
-    print(f"Average of {np.mean(preprocessing_times)} for audio preprocessing with a frame size of {step_size/16000} seconds")
-    for mdl_name in M.models.keys():
-        print(f"Average of {np.mean(model_times[mdl_name])} for model \"{mdl_name}\"", "\n\n")
 
 if __name__ == "__main__":
-   run_benchmark()
\ No newline at end of file
+    run_benchmark()
@@ -184,7 +184,7 @@ if __name__ == "__main__":
                 
                 # Get pre-activation audio from buffer (convert seconds to samples)
                 pre_samples = int(args.pre_activation_time * RATE)
-                pre_audio = np.array(list(owwModel.preprocessor.raw_data_buffer)[-pre_samples:]).astype(np.int16)
+                pre_audio = owwModel.preprocessor.raw_data_buffer.get_last(pre_samples).copy()
                 
                 # Start collecting post-activation audio
                 post_audio = []
@@ -6,7 +6,6 @@ import logging
 import os
 import subprocess
 import sys
-import time
 
 import numpy as np
 import pyaudio
@@ -79,58 +78,52 @@ def main():
         with open(args.routes, "r", encoding="utf-8") as f:
             routes.update(json.load(f))
 
-    last_activation: dict[str, float] = {}
-
     logger.info("loaded models: %s", list(oww.models.keys()))
     logger.info("routes for: %s", list(routes.keys()))
 
-    try:
+    def read_chunks():
         while True:
-            audio = np.frombuffer(stream.read(args.chunk_size, exception_on_overflow=False), dtype=np.int16)
-            preds = oww.predict(audio)
-
-            now = time.time()
-            for key, score in preds.items():
-                if score >= args.threshold:
-                    last = last_activation.get(key, 0.0)
-                    if now - last < args.debounce:
-                        continue
-                    last_activation[key] = now
-
-                    logger.info("activation: %s score=%.3f", key, float(score))
-
-                    route = None
-                    # match by exact model key or by parent model name
-                    if key in routes:
-                        route = routes[key]
-                    else:
-                        # sometimes keys are class labels, map back to parent
-                        parent = oww.get_parent_model_from_label(key)
-                        if parent and parent in routes:
-                            route = routes[parent]
-
-                    if not route:
-                        continue
-
-                    rtype = route.get("type")
-                    if rtype == "second_stage":
-                        cmd = route.get("command", [])
-                        if cmd:
-                            spawn(cmd)
-                            logger.info("spawned second_stage: %s", cmd)
-                    elif rtype == "fixed_record":
-                        seconds = int(route.get("seconds", 15))
-                        ts = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
-                        out_pattern = route.get("out_pattern", os.path.join("recordings", "clip_{ts}.wav"))
-                        out_path = out_pattern.replace("{ts}", ts)
-                        cmd = [sys.executable, "-m", "examples.record_to_wav", "--mode", "fixed", "--seconds", str(seconds), "--out", out_path]
-                        spawn(cmd)
-                        logger.info("spawned fixed_record: %s", out_path)
-                    elif rtype == "command":
-                        cmd = route.get("command", [])
-                        if cmd:
-                            spawn(cmd)
-                            logger.info("spawned command: %s", cmd)
+            yield np.frombuffer(stream.read(args.chunk_size, exception_on_overflow=False), dtype=np.int16)
+
+    try:
+        # The model applies the threshold and debounce time, and yields one event per activation
+        # (as soon as the score reaches the threshold, without waiting for the end of the wakeword)
+        for detection in oww.detect_stream(read_chunks(), threshold=args.threshold, debounce_time=args.debounce):
+            key = detection.label
+            logger.info("activation: %s score=%.3f", key, detection.score)
+
+            route = None
+            # match by exact model key or by parent model name
+            if key in routes:
+                route = routes[key]
+            else:
+                # sometimes keys are class labels, map back to parent
+                parent = oww.get_parent_model_from_label(key)
+                if parent and parent in routes:
+                    route = routes[parent]
+
+            if not route:
+                continue
+
+            rtype = route.get("type")
+            if rtype == "second_stage":
+                cmd = route.get("command", [])
+                if cmd:
+                    spawn(cmd)
+                    logger.info("spawned second_stage: %s", cmd)
+            elif rtype == "fixed_record":
+                seconds = int(route.get("seconds", 15))
+                ts = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+                out_pattern = route.get("out_pattern", os.path.join("recordings", "clip_{ts}.wav"))
+                out_path = out_pattern.replace("{ts}", ts)
+                cmd = [sys.executable, "-m", "examples.record_to_wav", "--mode", "fixed", "--seconds", str(seconds), "--out", out_path]
+                spawn(cmd)
+                logger.info("spawned fixed_record: %s", out_path)
+            elif rtype == "command":
+                cmd = route.get("command", [])
+                if cmd:
+                    spawn(cmd)
+                    logger.info("spawned command: %s", cmd)
 
     except KeyboardInterrupt:
         logger.info("stopping dispatcher")
@@ -24,7 +24,6 @@ import aiohttp
 from aiohttp import web
 import numpy as np
 from openwakeword.model import Model
-import resampy
 import argparse
 import json
 import asyncio
@@ -39,6 +38,9 @@ async def websocket_handler(request):
     ws = web.WebSocketResponse()
     await ws.prepare(request)
 
+    # Create a separate audio stream for this client, sharing the loaded models with the other clients
+    stream = owwModel.create_stream()
+
     # Send loaded models
     await ws.send_str(json.dumps({"loaded_models": list(owwModel.models.keys())}))
     
@@ -54,95 +56,91 @@ async def websocket_handler(request):
     last_audio_time = None
     recording_start_time = None
     
-    # Start listening for websocket messages
-    async for msg in ws:
-        # Get the sample rate of the microphone from the browser
-        if msg.type == aiohttp.WSMsgType.TEXT:
-            if msg.data.startswith('{"command":'):
-                # Process command from client
-                try:
-                    command_data = json.loads(msg.data)
-                    if command_data.get("command") == "start_listening":
-                        print("Command received: start_listening")
-                        is_recording = True
-                        recording_buffer = []
-                        recording_start_time = time.time()
-                        await ws.send_str(json.dumps({"status": "listening", "message": "I'm listening..."}))
-                        print("I'm listening...")
-                except json.JSONDecodeError:
-                    print(f"Invalid JSON: {msg.data}")
+    try:
+        # Start listening for websocket messages
+        async for msg in ws:
+            # Get the sample rate of the microphone from the browser
+            if msg.type == aiohttp.WSMsgType.TEXT:
+                if msg.data.startswith('{"command":'):
+                    # Process command from client
+                    try:
+                        command_data = json.loads(msg.data)
+                        if command_data.get("command") == "start_listening":
+                            print("Command received: start_listening")
+                            is_recording = True
+                            recording_buffer = []
+                            recording_start_time = time.time()
+                            await ws.send_str(json.dumps({"status": "listening", "message": "I'm listening..."}))
+                            print("I'm listening...")
+                    except json.JSONDecodeError:
+                        print(f"Invalid JSON: {msg.data}")
+                else:
+                    # Assume it's the sample rate
+                    sample_rate = int(msg.data)
+            elif msg.type == aiohttp.WSMsgType.ERROR:
+                print(f"WebSocket error: {ws.exception()}")
             else:
-                # Assume it's the sample rate
-                sample_rate = int(msg.data)
-        elif msg.type == aiohttp.WSMsgType.ERROR:
-            print(f"WebSocket error: {ws.exception()}")
-        else:
-            # Get audio data from websocket
-            audio_bytes = msg.data
-
-            # Add extra bytes of silence if needed
-            if len(msg.data) % 2 == 1:
-                audio_bytes += (b'\x00')
+                # Get the audio samples from the websocket message (at the sample rate of the microphone)
+                data = np.frombuffer(msg.data, dtype=np.int16, count=len(msg.data)//2)
 
-            # Convert audio to correct format and sample rate
-            data = np.frombuffer(audio_bytes, dtype=np.int16)
-            if sample_rate != 16000:
-                data = resampy.resample(data, sample_rate, 16000)
-                
-            # Process audio for continuous recording if we're in recording mode
-            if is_recording:
-                current_time = time.time()
-                
-                # Check for timeout
-                if current_time - recording_start_time > MAX_LISTEN_TIME:
-                    is_recording = False
-                    print(f"Stopped recording: reached maximum time of {MAX_LISTEN_TIME} seconds")
-                    await ws.send_str(json.dumps({
-                        "status": "timeout", 
-                        "message": f"Listening timeout after {MAX_LISTEN_TIME} seconds"
-                    }))
-                    continue
+                # Process audio for continuous recording if we're in recording mode
+                if is_recording:
+                    current_time = time.time()
                 
-                # Check for silence/pause
-                audio_level = np.abs(data).mean()
-                if audio_level < SILENCE_THRESHOLD:
-                    if last_audio_time and current_time - last_audio_time > PAUSE_THRESHOLD:
+                    # Check for timeout
+                    if current_time - recording_start_time > MAX_LISTEN_TIME:
                         is_recording = False
-                        print(f"Stopped recording: detected {PAUSE_THRESHOLD}s pause")
+                        print(f"Stopped recording: reached maximum time of {MAX_LISTEN_TIME} seconds")
                         await ws.send_str(json.dumps({
-                            "status": "pause_detected", 
-                            "message": f"Detected pause of {PAUSE_THRESHOLD} seconds"
+                            "status": "timeout", 
+                            "message": f"Listening timeout after {MAX_LISTEN_TIME} seconds"
                         }))
                         continue
-                else:
-                    # Reset the last audio time when we hear something
-                    last_audio_time = current_time
                 
-                # Add to recording buffer
-                recording_buffer.append(data)
+                    # Check for silence/pause
+                    audio_level = np.abs(data).mean()
+                    if audio_level < SILENCE_THRESHOLD:
+                        if last_audio_time and current_time - last_audio_time > PAUSE_THRESHOLD:
+                            is_recording = False
+                            print(f"Stopped recording: detected {PAUSE_THRESHOLD}s pause")
+                            await ws.send_str(json.dumps({
+                                "status": "pause_detected", 
+                                "message": f"Detected pause of {PAUSE_THRESHOLD} seconds"
+                            }))
+                            continue
+                    else:
+                        # Reset the last audio time when we hear something
+                        last_audio_time = current_time
+                
+                    # Add to recording buffer
+                    recording_buffer.append(data)
                 
-            # Get openWakeWord predictions and set to browser client
-            predictions = owwModel.predict(data)
+                # Get openWakeWord predictions and set to browser client (the model resamples the audio to 16 khz,
+                # and handles messages with an odd number of bytes)
+                predictions = stream.predict(msg.data, sample_rate=sample_rate)
 
-            activations = []
-            for key in predictions:
-                if predictions[key] >= 0.5:
-                    activations.append(key)
-                    print(f"Detected: {key}")
+                activations = []
+                for key in predictions:
+                    if predictions[key] >= 0.5:
+                        activations.append(key)
+                        print(f"Detected: {key}")
 
-            if activations != []:
-                # Check if "ENGAGE!" was detected
-                if "ENGAGE!" in str(activations):
-                    if is_recording:
-                        is_recording = False
-                        print("Stopped recording: ENGAGE detected")
-                        await ws.send_str(json.dumps({
-                            "status": "engage_detected", 
-                            "message": "ENGAGE command detected!"
-                        }))
+                if activations != []:
+                    # Check if "ENGAGE!" was detected
+                    if "ENGAGE!" in str(activations):
+                        if is_recording:
+                            is_recording = False
+                            print("Stopped recording: ENGAGE detected")
+                            await ws.send_str(json.dumps({
+                                "status": "engage_detected", 
+                                "message": "ENGAGE command detected!"
+                            }))
                 
-                # Send the activations to client
-                await ws.send_str(json.dumps({"activations": activations}))
+                    # Send the activations to client
+                    await ws.send_str(json.dumps({"activations": activations}))
+    finally:
+        # Stop the worker threads of the client's stream when the connection ends
+        stream.close()
 
     return ws
 
@@ -22,9 +22,7 @@
 # Imports
 import aiohttp
 from aiohttp import web
-import numpy as np
 from openwakeword import Model
-import resampy
 import argparse
 import json
 import os
@@ -38,48 +36,44 @@ async def websocket_handler(request):
     ws = web.WebSocketResponse()
     await ws.prepare(request)
 
+    # Create a separate audio stream for this client, sharing the loaded models with the other clients
+    stream = owwModel.create_stream()
+
     # Send loaded models
     await ws.send_str(json.dumps({"loaded_models": list(owwModel.models.keys())}))
 
-    # Start listening for websocket messages
-    async for msg in ws:
-        # Get the sample rate of the microphone from the browser
-        if msg.type == aiohttp.WSMsgType.TEXT:
-            sample_rate = int(msg.data)
-        elif msg.type == aiohttp.WSMsgType.ERROR:
-            print(f"WebSocket error: {ws.exception()}")
-        else:
-            # Get audio data from websocket
-            audio_bytes = msg.data
-
-            # Add extra bytes of silence if needed
-            if len(msg.data) % 2 == 1:
-                audio_bytes += (b'\x00')
-
-            # Convert audio to correct format and sample rate
-            data = np.frombuffer(audio_bytes, dtype=np.int16)
-            if sample_rate != 16000:
-                data = resampy.resample(data, sample_rate, 16000)
-
-            # Get openWakeWord predictions and set to browser client
-            predictions = owwModel.predict(data)
+    try:
+        # Start listening for websocket messages
+        async for msg in ws:
+            # Get the sample rate of the microphone from the browser
+            if msg.type == aiohttp.WSMsgType.TEXT:
+                sample_rate = int(msg.data)
+            elif msg.type == aiohttp.WSMsgType.ERROR:
+                print(f"WebSocket error: {ws.exception()}")
+            else:
+                # Get openWakeWord predictions for the audio data from the websocket and send them to the browser
+                # client (the model resamples the audio to 16 khz, and handles messages with an odd number of bytes)
+                predictions = stream.predict(msg.data, sample_rate=sample_rate)
 
-            activations = []
-            activation_scores = {}
-            for key in predictions:
-                # Filter out numeric indices from timer model (0-9 as strings)
-                if key.isdigit():
-                    continue
+                activations = []
+                activation_scores = {}
+                for key in predictions:
+                    # Filter out numeric indices from timer model (0-9 as strings)
+                    if key.isdigit():
+                        continue
                     
-                if predictions[key] >= 0.5:  # Standard threshold for wake words
-                    activations.append(key)
-                    activation_scores[key] = float(predictions[key])
+                    if predictions[key] >= 0.5:  # Standard threshold for wake words
+                        activations.append(key)
+                        activation_scores[key] = float(predictions[key])
 
-            if activations:
-                await ws.send_str(json.dumps({
-                    "activations": activations,
-                    "scores": activation_scores
-                }))
+                if activations:
+                    await ws.send_str(json.dumps({
+                        "activations": activations,
+                        "scores": activation_scores
+                    }))
+    finally:
+        # Stop the worker threads of the client's stream when the connection ends
+        stream.close()
 
     return ws
 
@@ -26,7 +26,6 @@ import aiohttp
 from aiohttp import web
 import numpy as np
 from openwakeword.model import Model
-import resampy
 import argparse
 import json
 import asyncio
@@ -43,6 +42,9 @@ async def websocket_handler(request):
     
     ws = web.WebSocketResponse()
     await ws.prepare(request)
+
+    # Create a separate audio stream for this client, sharing the loaded models with the other clients
+    stream = owwModel.create_stream()
     print(f"WebSocket connection prepared for {request.remote}")
 
     # Send loaded models
@@ -75,19 +77,12 @@ async def websocket_handler(request):
                 print(f"WebSocket error: {ws.exception()}")
             else:
                 # Get audio data from websocket
-                audio_bytes = msg.data
-
-                # Add extra bytes of silence if needed
-                if len(msg.data) % 2 == 1:
-                    audio_bytes += (b'\x00')
-
-                # Convert audio to correct format and sample rate
-                data = np.frombuffer(audio_bytes, dtype=np.int16)
-                if sample_rate != 16000:
-                    data = resampy.resample(data, sample_rate, 16000)
+                # (at the sample rate of the microphone, which is also used for the saved recordings)
+                data = np.frombuffer(msg.data, dtype=np.int16, count=len(msg.data)//2)
 
-                # Get openWakeWord predictions
-                predictions = owwModel.predict(data)
+                # Get openWakeWord predictions (the model resamples the audio to 16 khz,
+                # and handles messages with an odd number of bytes)
+                predictions = stream.predict(msg.data, sample_rate=sample_rate)
 
                 # Check for wake word activations
                 activations = []
@@ -138,7 +133,7 @@ async def websocket_handler(request):
                     # If any stop condition is met, save the recording and reset
                     if engage_detected or timeout_detected or pause_detected:
                         # Save the recording
-                        filename = await save_recording(recording_buffer, detected_wake_word)
+                        filename = await save_recording(recording_buffer, detected_wake_word, sample_rate)
                         
                         # Reset recording state
                         is_recording = False
@@ -162,12 +157,13 @@ async def websocket_handler(request):
         print(f"Error in websocket handler: {str(e)}")
     finally:
         # Clean up any resources, close connection gracefully
+        stream.close()
         print(f"WebSocket connection closed for {request.remote}")
     
     return ws
 
 # Function to save recorded audio to a WAV file
-async def save_recording(audio_chunks, wake_word):
+async def save_recording(audio_chunks, wake_word, sample_rate=16000):
     try:
         # Create saved_clips directory if it doesn't exist
         if not os.path.exists("saved_clips"):
@@ -180,11 +176,11 @@ async def save_recording(audio_chunks, wake_word):
         # Combine all audio chunks
         combined_audio = np.concatenate(audio_chunks)
         
-        # Save as WAV file (16-bit, 16kHz, mono)
+        # Save as WAV file (16-bit, mono, at the sample rate of the microphone)
         with wave.open(filename, 'wb') as wf:
             wf.setnchannels(1)
             wf.setsampwidth(2)  # 16-bit audio
-            wf.setframerate(16000)  # 16kHz
+            wf.setframerate(sample_rate)
             wf.writeframes(combined_audio.tobytes())
         
         print(f"Saved recording to {filename}")
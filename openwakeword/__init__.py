@@ -1,9 +1,38 @@
 import os
-from openwakeword.model import Model
-from openwakeword.vad import VAD
-from openwakeword.custom_verifier_model import train_custom_verifier
+import importlib
+
+__all__ = ['Detection', 'Model', 'MultiStreamModel', 'StreamSession', 'StreamState', 'VAD', 'train_custom_verifier']
+
+# The main classes and functions are imported lazily (on first use), so that importing openwakeword doesn't
+# also import the dependencies that are only needed for some features (e.g., onnxruntime, scikit-learn)
+_LAZY_IMPORTS = {
+    "Detection": "openwakeword.model",
+    "Model": "openwakeword.model",
+    "MultiStreamModel": "openwakeword.model",
+    "StreamSession": "openwakeword.model",
+    "StreamState": "openwakeword.model",
+    "VAD": "openwakeword.vad",
+    "train_custom_verifier": "openwakeword.custom_verifier_model",
+}
+
+
+_LAZY_SUBMODULES = ["model", "utils", "vad", "custom_verifier_model"]
+
+
+def __getattr__(name):
+    if name in _LAZY_IMPORTS:
+        value = getattr(importlib.import_module(_LAZY_IMPORTS[name]), name)
+    elif name in _LAZY_SUBMODULES:
+        value = importlib.import_module(f"{__name__}.{name}")
+    else:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(list(globals().keys()) + list(_LAZY_IMPORTS.keys()) + _LAZY_SUBMODULES)
 
-__all__ = ['Model', 'VAD', 'train_custom_verifier']
 
 FEATURE_MODELS = {
     "embedding": {
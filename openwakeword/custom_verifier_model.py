@@ -14,19 +14,18 @@
 
 # Imports
 import collections
+import logging
 import os
 import pickle
 from typing import List, Union
 
 import numpy as np
-import scipy
-from sklearn.linear_model import LogisticRegression
-from sklearn.pipeline import make_pipeline
-from sklearn.preprocessing import FunctionTransformer, StandardScaler
-from tqdm import tqdm
 
 import openwakeword
 
+# The training dependencies (scipy, scikit-learn, and tqdm) are imported only by the functions that use them,
+# so that compiled verifier models (see the `CompiledVerifier` class) can be loaded and run with only Numpy
+
 
 # Define functions to prepare data for speaker dependent verifier model
 def get_reference_clip_features(
@@ -56,6 +55,8 @@ def get_reference_clip_features(
                  of frames in the window, and L is the audio feature/embedding dimension.
     """
 
+    import scipy.io.wavfile
+
     # Create dictionary to store frames
     positive_data = collections.defaultdict(list)
 
@@ -78,7 +79,7 @@ def get_reference_clip_features(
             if predictions[model_name] >= threshold:
                 features = oww_model.preprocessor.get_features(  # type: ignore[has-type]
                     oww_model.model_inputs[model_name]           # type: ignore[has-type]
-                )
+                ).copy()
                 positive_data[model_name].append(features)
 
     if len(positive_data[model_name]) == 0:
@@ -92,6 +93,111 @@ def flatten_features(x):
     return [i.flatten() for i in x]
 
 
+class CompiledVerifier():
+    """
+    A custom verifier model compiled into a compact Numpy form. The feature scaling of the scikit-learn
+    pipeline created by `train_verifier_model` (`FunctionTransformer(flatten_features)`, `StandardScaler`,
+    and `LogisticRegression`) is folded into the weights of the logistic regression model, so that predicting
+    on a window of features is a single dot product and sigmoid.
+
+    Compiled verifiers are saved as Numpy .npz files, which load quickly and (unlike pickle files)
+    can't run arbitrary code when loaded.
+    """
+    def __init__(self, weights: np.ndarray, bias: float):
+        """
+        Initialize the CompiledVerifier object.
+
+        Args:
+            weights (ndarray): The weight of each (flattened) input feature
+            bias (float): The bias of the logistic regression model
+        """
+        self.weights = np.asarray(weights, dtype=np.float64).flatten()
+        self.bias = float(bias)
+
+    @classmethod
+    def from_pipeline(cls, pipeline):
+        """
+        Compiles a scikit-learn pipeline created by the `train_verifier_model` function.
+
+        Args:
+            pipeline (sklearn.pipeline.Pipeline): The trained verifier model
+
+        Returns:
+            CompiledVerifier: The compiled verifier model
+        """
+        from sklearn.linear_model import LogisticRegression
+        from sklearn.preprocessing import FunctionTransformer, StandardScaler
+
+        steps = [step for _, step in pipeline.steps]
+        if len(steps) != 3 or not isinstance(steps[0], FunctionTransformer) or steps[0].func is not flatten_features \
+                or not isinstance(steps[1], StandardScaler) or not isinstance(steps[2], LogisticRegression) \
+                or steps[2].coef_.shape[0] != 1:
+            raise ValueError("Only verifier models created by the `train_verifier_model` function can be compiled!")
+
+        scaler, clf = steps[1], steps[2]
+        mean = scaler.mean_ if scaler.mean_ is not None else np.zeros(clf.coef_.shape[1])
+        scale = scaler.scale_ if scaler.scale_ is not None else np.ones(clf.coef_.shape[1])
+        weights = clf.coef_[0]/scale
+        bias = clf.intercept_[0] - np.dot(weights, mean)
+        return cls(weights, bias)
+
+    @classmethod
+    def load(cls, path: str):
+        """Loads a compiled verifier model from a .npz file"""
+        with np.load(path, allow_pickle=False) as data:
+            return cls(data["weights"], data["bias"])
+
+    def save(self, path: str):
+        """Saves the compiled verifier model as a .npz file"""
+        with open(path, "wb") as f:
+            np.savez(f, weights=self.weights, bias=np.array(self.bias))
+
+    def predict(self, x: np.ndarray):
+        """
+        Predicts on a batch of feature windows.
+
+        Args:
+            x (ndarray): The feature windows, with shape (batch size, number of frames, embedding dimension)
+
+        Returns:
+            ndarray: The predicted probability that each window contains the target speaker
+        """
+        x = x.reshape(x.shape[0], -1)
+        if x.shape[1] != self.weights.shape[0]:
+            raise ValueError(f"The verifier model expects {self.weights.shape[0]} features per example,"
+                             f" but received {x.shape[1]}!")
+        # Sigmoid of the logits, computed as exp(-log(1 + exp(-z))) so that large logits don't overflow
+        return np.exp(-np.logaddexp(0, -(np.dot(x, self.weights) + self.bias)))
+
+    def predict_proba(self, x: np.ndarray):
+        """Predicts on a batch of feature windows, returning the probabilities of both classes like scikit-learn models"""
+        scores = self.predict(x)
+        return np.stack((1 - scores, scores), axis=1)
+
+
+def load_verifier_model(path: str):
+    """
+    Loads a custom verifier model, compiling it if it was saved as a scikit-learn pipeline (a .pkl file).
+    Pipelines that can't be compiled are returned unchanged (with a warning).
+
+    Args:
+        path (str): The path of the verifier model (.npz or .pkl file)
+
+    Returns:
+        Union[CompiledVerifier, sklearn.pipeline.Pipeline]: The verifier model
+    """
+    if path.endswith(".npz"):
+        return CompiledVerifier.load(path)
+
+    with open(path, "rb") as f:
+        pipeline = pickle.load(f)
+    try:
+        return CompiledVerifier.from_pipeline(pipeline)
+    except (ValueError, AttributeError) as e:
+        logging.warning(f"Could not compile the verifier model {path}, so it will be run with scikit-learn: {e}")
+        return pipeline
+
+
 def train_verifier_model(features: np.ndarray, labels: np.ndarray):
     """
     Train a logistic regression binary classifier model on the provided features and labels
@@ -105,6 +211,10 @@ def train_verifier_model(features: np.ndarray, labels: np.ndarray):
     Returns:
         The trained scikit-learn logistic regression model
     """
+    from sklearn.linear_model import LogisticRegression
+    from sklearn.pipeline import make_pipeline
+    from sklearn.preprocessing import FunctionTransformer, StandardScaler
+
     # C value matters alot here, depending on dataset size (larger datasets work better with larger C?)
     clf = LogisticRegression(random_state=0, max_iter=2000, C=0.001)
     pipeline = make_pipeline(FunctionTransformer(flatten_features), StandardScaler(), clf)
@@ -129,7 +239,9 @@ def train_custom_verifier(
                                         of the target wake word/phrase.
         negative_reference_clips (List[Union[str, os.PathLike]]): The path(s) to single-channel 16khz, 16-bit WAV files
                                         of miscellaneous speech not containing the target wake word/phrase.
-        output_path (str): The location to save the trained verifier model (as a Python pickle file (.pkl))
+        output_path (str): The location to save the trained verifier model. If the path ends with .npz, the model
+                           is saved as a compiled verifier (see the `CompiledVerifier` class), otherwise it is
+                           saved as a Python pickle file (.pkl) of the scikit-learn pipeline.
         model_name (str): The name or path of the trained openWakeWord model that the verifier model will be
                           based on. If only a name, it must be one of the pre-trained models included in the
                           openWakeWord release.
@@ -138,6 +250,8 @@ def train_custom_verifier(
     Returns:
         None
     """
+    from tqdm import tqdm
+
     # Load target openWakeWord model
     if os.path.exists(model_name):
         oww = openwakeword.Model(
@@ -173,5 +287,8 @@ def train_custom_verifier(
 
     # Save logistic regression model to specified output location
     print("Done!")
-    with open(output_path, "wb") as f:
-        pickle.dump(lr_model, f)
+    if output_path.endswith(".npz"):
+        CompiledVerifier.from_pipeline(lr_model).save(output_path)
+    else:
+        with open(output_path, "wb") as f:
+            pickle.dump(lr_model, f)
@@ -0,0 +1,267 @@
+# Copyright 2022 David Scripka. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# This file contains classes for measuring the latency of each processing stage of openWakeWord
+# (e.g., the melspectrogram, embedding, and wakeword models), and exporting the measurements.
+
+# Imports
+import json
+import array
+import bisect
+import threading
+from time import perf_counter_ns
+import numpy as np
+from typing import Dict, List, Union
+
+
+# Default histogram bucket upper bounds, from 1 microsecond to ~16.8 seconds (two buckets per doubling)
+DEFAULT_BUCKET_BOUNDS_NS = [int(round(1000*2**(i/2))) for i in range(0, 49)]
+
+
+class LatencyHistogram():
+    """
+    A histogram of latencies with fixed buckets, stored in a preallocated array of 64-bit counts (a standard
+    library array, which is faster to update one element at a time than a Numpy array) so that recording
+    a latency doesn't allocate memory. Latencies larger than the last bucket bound are counted in an overflow bucket.
+    Recording, resetting, and reading the histogram are locked, so it can be shared by several threads.
+    """
+    def __init__(self, bucket_bounds_ns: List[int] = DEFAULT_BUCKET_BOUNDS_NS):
+        """
+        Initialize the LatencyHistogram object.
+
+        Args:
+            bucket_bounds_ns (List[int]): The (increasing) upper bounds of the histogram buckets, in nanoseconds
+        """
+        self.bucket_bounds_ns = list(bucket_bounds_ns)
+        self.bucket_counts = array.array('q', [0]*(len(self.bucket_bounds_ns) + 1))
+        self.count = 0
+        self.sum_ns = 0
+        self.max_ns = 0
+        self._lock = threading.Lock()
+
+    def record(self, latency_ns: int):
+        """Adds a latency (in nanoseconds) to the histogram"""
+        ndx = bisect.bisect_left(self.bucket_bounds_ns, latency_ns)
+        with self._lock:
+            self.bucket_counts[ndx] += 1
+            self.count += 1
+            self.sum_ns += latency_ns
+            if latency_ns > self.max_ns:
+                self.max_ns = latency_ns
+
+    def reset(self):
+        """Removes all of the recorded latencies"""
+        with self._lock:
+            self.bucket_counts[:] = array.array('q', [0]*len(self.bucket_counts))
+            self.count = 0
+            self.sum_ns = 0
+            self.max_ns = 0
+
+    def snapshot(self):
+        """
+        Gets a consistent copy of the recorded latencies, while other threads may be recording.
+
+        Returns:
+            LatencyHistogram: A new histogram with the same bucket counts, count, sum, and maximum
+        """
+        histogram = LatencyHistogram(self.bucket_bounds_ns)
+        with self._lock:
+            histogram.bucket_counts[:] = self.bucket_counts
+            histogram.count, histogram.sum_ns, histogram.max_ns = self.count, self.sum_ns, self.max_ns
+        return histogram
+
+    def percentile(self, q: float):
+        """
+        Estimates a percentile of the recorded latencies, interpolating linearly within the bucket
+        that contains the percentile.
+
+        Args:
+            q (float): The percentile, between 0 and 100
+
+        Returns:
+            float: The estimated percentile in seconds, or NaN if no latencies were recorded
+        """
+        with self._lock:
+            bucket_counts = np.asarray(self.bucket_counts).copy()
+            count, max_ns = self.count, self.max_ns
+        if count == 0:
+            return float("nan")
+
+        rank = q/100*count
+        cumulative_counts = np.cumsum(bucket_counts)
+        ndx = min(int(np.searchsorted(cumulative_counts, rank)), len(bucket_counts) - 1)
+        lower_bound = self.bucket_bounds_ns[ndx - 1] if ndx > 0 else 0
+        upper_bound = self.bucket_bounds_ns[ndx] if ndx < len(self.bucket_bounds_ns) else max_ns
+        upper_bound = min(upper_bound, max_ns)
+        previous_count = cumulative_counts[ndx - 1] if ndx > 0 else 0
+        fraction = (rank - previous_count)/bucket_counts[ndx] if bucket_counts[ndx] > 0 else 1.0
+        return float(lower_bound + max(0.0, min(1.0, fraction))*max(0, upper_bound - lower_bound))/1e9
+
+
+class Instrumentation():
+    """
+    Collects latency histograms for named processing stages, and named event counters.
+
+    Timing a stage takes two calls, `start()` before the stage and `record(stage, start_ns)` after it.
+    When the object is disabled both calls return immediately without reading the clock, so the
+    instrumentation can be left in place with close to zero overhead. Latencies and counts can be
+    recorded from several threads at once (e.g., by the worker threads and streams of a model).
+
+    Example:
+        start_ns = instrumentation.start()
+        ...  # the stage being timed
+        instrumentation.record("melspectrogram", start_ns)
+        instrumentation.percentile("melspectrogram", 99)  # p99 latency in seconds
+    """
+    def __init__(self, enabled: bool = False, bucket_bounds_ns: List[int] = DEFAULT_BUCKET_BOUNDS_NS):
+        """
+        Initialize the Instrumentation object.
+
+        Args:
+            enabled (bool): Whether to record latencies and counts
+            bucket_bounds_ns (List[int]): The (increasing) upper bounds of the histogram buckets, in nanoseconds.
+                                          The default has two buckets per doubling from 1 microsecond to ~16.8 seconds.
+        """
+        self.enabled = enabled
+        self.bucket_bounds_ns = list(bucket_bounds_ns)
+        self.histograms: Dict[str, LatencyHistogram] = {}
+        self.counters: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def start(self):
+        """
+        Gets the start time of a stage.
+
+        Returns:
+            int: The current value of `time.perf_counter_ns()`, or 0 if the object is disabled
+        """
+        return perf_counter_ns() if self.enabled else 0
+
+    def record(self, stage: str, start_ns: int):
+        """
+        Records the latency of a stage, from the start time returned by `start()` to now.
+
+        Args:
+            stage (str): The name of the stage
+            start_ns (int): The start time of the stage, from `start()`
+        """
+        if not self.enabled:
+            return
+        latency_ns = perf_counter_ns() - start_ns
+        histogram = self.histograms.get(stage, None)
+        if histogram is None:
+            with self._lock:
+                histogram = self.histograms.setdefault(stage, LatencyHistogram(self.bucket_bounds_ns))
+        histogram.record(latency_ns)
+
+    def increment(self, counter: str, n: int = 1):
+        """Adds `n` to the named counter"""
+        if self.enabled:
+            with self._lock:
+                self.counters[counter] = self.counters.get(counter, 0) + n
+
+    def reset(self):
+        """Removes all of the recorded latencies and counts"""
+        with self._lock:
+            for histogram in self.histograms.values():
+                histogram.reset()
+            for counter in self.counters.keys():
+                self.counters[counter] = 0
+
+    def _snapshot(self):
+        """Gets consistent copies of the histograms and counters, while other threads may be recording"""
+        with self._lock:
+            histograms = list(self.histograms.items())
+            counters = dict(self.counters)
+        return [(stage, histogram.snapshot()) for stage, histogram in histograms], counters
+
+    def percentile(self, stage: str, q: float):
+        """
+        Estimates a percentile of the latencies of a stage (see `LatencyHistogram.percentile`).
+
+        Args:
+            stage (str): The name of the stage
+            q (float): The percentile, between 0 and 100
+
+        Returns:
+            float: The estimated percentile in seconds, or NaN if no latencies were recorded for the stage
+        """
+        if stage not in self.histograms:
+            return float("nan")
+        return self.histograms[stage].percentile(q)
+
+    def summary(self, percentiles: List[float] = [50, 90, 99]):
+        """
+        Summarizes the recorded latencies and counts.
+
+        Args:
+            percentiles (List[float]): The percentiles of the latencies to include for each stage
+
+        Returns:
+            dict: A dictionary with the counters, and the count, mean, maximum, and percentiles
+                  (in seconds) of the latencies of each stage
+        """
+        histograms, counters = self._snapshot()
+        stages: Dict[str, Dict[str, Union[int, float]]] = {}
+        for stage, histogram in histograms:
+            stages[stage] = {
+                "count": histogram.count,
+                "mean": histogram.sum_ns/histogram.count/1e9 if histogram.count > 0 else float("nan"),
+                "max": histogram.max_ns/1e9
+            }
+            for q in percentiles:
+                stages[stage][f"p{q:g}"] = histogram.percentile(q)
+        return {"counters": counters, "stages": stages}
+
+    def to_json(self, **kwargs):
+        """
+        Exports the summary of the recorded latencies and counts (see `summary`) as JSON text.
+
+        Args:
+            kwargs (dict): Any keyword arguments to pass to the `summary` method
+
+        Returns:
+            str: The JSON text
+        """
+        return json.dumps(self.summary(**kwargs))
+
+    def to_prometheus(self, prefix: str = "openwakeword"):
+        """
+        Exports the recorded latencies and counts in the Prometheus text exposition format, with one
+        histogram metric (`<prefix>_stage_latency_seconds`) that has a `stage` label, and one counter
+        metric (`<prefix>_<counter>_total`) for each counter.
+
+        Args:
+            prefix (str): The prefix of the metric names
+
+        Returns:
+            str: The metrics in the Prometheus text format
+        """
+        metric = f"{prefix}_stage_latency_seconds"
+        histograms, counters = self._snapshot()
+        lines = [f"# HELP {metric} The latency of each openWakeWord processing stage.", f"# TYPE {metric} histogram"]
+        for stage, histogram in histograms:
+            label = stage.replace("\\", "\\\\").replace('"', '\\"')
+            cumulative_counts = np.cumsum(np.asarray(histogram.bucket_counts))
+            for bound, count in zip(histogram.bucket_bounds_ns, cumulative_counts):
+                lines.append(f'{metric}_bucket{{stage="{label}",le="{bound/1e9:g}"}} {count}')
+            lines.append(f'{metric}_bucket{{stage="{label}",le="+Inf"}} {histogram.count}')
+            lines.append(f'{metric}_sum{{stage="{label}"}} {histogram.sum_ns/1e9:g}')
+            lines.append(f'{metric}_count{{stage="{label}"}} {histogram.count}')
+
+        for counter, value in counters.items():
+            lines.append(f"# TYPE {prefix}_{counter}_total counter")
+            lines.append(f"{prefix}_{counter}_total {value}")
+
+        return "\n".join(lines) + "\n"
@@ -15,17 +15,633 @@
 # Imports
 import numpy as np
 import openwakeword
-from openwakeword.utils import AudioFeatures, re_arg
+from openwakeword.utils import AudioFeatures, re_arg, get_shared_session, SharedSession, create_onnx_session, \
+    StreamingResampler, MODEL_PRECISIONS, _get_model_path_for_precision
+from openwakeword.instrumentation import Instrumentation
 
 import wave
 import os
 import logging
 import functools
-import pickle
+import sys
 from collections import deque, defaultdict
 from functools import partial
 import time
-from typing import List, Union, DefaultDict, Dict
+import asyncio
+from concurrent.futures import ThreadPoolExecutor, Future
+from typing import List, Union, DefaultDict, Dict, Tuple, Callable, Hashable, Optional, Any
+
+
+# Helper functions for running wakeword models on batches of feature windows
+def _get_onnx_model_with_dynamic_batch(model_path: str):
+    """
+    Loads an ONNX model and makes the first (batch) dimension of its inputs and outputs dynamic,
+    so that the model can predict on several feature windows in one call. Any shapes of intermediate
+    values stored in the model (e.g., by quantization tools) are removed, as they are inferred again by onnxruntime.
+    Requires the optional `onnx` package, and returns the unmodified model path if it isn't installed.
+    """
+    try:
+        import onnx
+    except ImportError:
+        return model_path
+
+    onnx_model = onnx.load(model_path)
+    for tensor in list(onnx_model.graph.input) + list(onnx_model.graph.output):
+        dims = tensor.type.tensor_type.shape.dim
+        if len(dims) > 1:
+            dims[0].dim_param = "batch"
+    del onnx_model.graph.value_info[:]
+
+    return onnx_model.SerializeToString()
+
+
+def _fuse_onnx_models(model_paths: List[str], model_names: List[str]):
+    """
+    Combines several ONNX wakeword models that have the same input shape into a single ONNX model
+    with one (shared) input and one output per model, in the same order as the `model_paths` argument.
+    Requires the optional `onnx` package.
+
+    Returns:
+        bytes: The serialized combined ONNX model
+    """
+    import onnx
+    from onnx import compose, helper, version_converter
+
+    onnx_models = [onnx.load(i) for i in model_paths]
+    opset_version = max([j.version for i in onnx_models for j in i.opset_import if j.domain in ("", "ai.onnx")])
+
+    nodes = []
+    initializers = []
+    outputs = []
+    for onnx_model, mdl_name in zip(onnx_models, model_names):
+        # Convert all models to the same opset version and make the tensor names unique
+        if [i.version for i in onnx_model.opset_import if i.domain in ("", "ai.onnx")] != [opset_version]:
+            onnx_model = version_converter.convert_version(onnx_model, opset_version)
+        onnx_model = compose.add_prefix(onnx_model, prefix=f"{mdl_name}/")
+
+        nodes.append(helper.make_node("Identity", ["features"], [onnx_model.graph.input[0].name]))
+        nodes.extend(onnx_model.graph.node)
+        initializers.extend(onnx_model.graph.initializer)
+        outputs.append(onnx_model.graph.output[0])
+
+    features = onnx.ValueInfoProto()
+    features.CopyFrom(onnx_models[0].graph.input[0])
+    features.name = "features"
+    for tensor in [features] + outputs:
+        dims = tensor.type.tensor_type.shape.dim
+        if len(dims) > 1:
+            dims[0].dim_param = "batch"
+
+    graph = helper.make_graph(nodes, "openwakeword_fused_models", [features], outputs,
+                              initializer=initializers)
+    fused_model = helper.make_model(graph, opset_imports=[helper.make_opsetid("", opset_version)])
+    fused_model.ir_version = max([i.ir_version for i in onnx_models])
+    onnx.checker.check_model(fused_model)
+
+    return fused_model.SerializeToString()
+
+
+class _FusedModelGroup():
+    """A single ONNX session that runs several wakeword models on the same feature windows in one call"""
+    def __init__(self, session, model_names: List[str], batch_support: bool):
+        self.session = session
+        self.model_names = model_names
+        self.batch_support = batch_support
+        self.input_name = session.get_inputs()[0].name
+
+    def predict(self, x: np.ndarray):
+        """
+        Predicts with all of the models in the group on a batch of feature windows.
+
+        Returns:
+            dict: The outputs for each model name, in the same format as the model prediction functions
+        """
+        if self.batch_support or x.shape[0] == 1:
+            outputs = self.session.run(None, {self.input_name: x})
+        else:
+            outputs = [np.vstack(i) for i in zip(*[self.session.run(None, {self.input_name: j[None, ]}) for j in x])]
+        return {mdl: [output] for mdl, output in zip(self.model_names, outputs)}
+
+
+class _SpeexNoiseSuppressor():
+    """
+    Runs audio through a SpeexDSP noise suppression object in chunks of `frame_size` samples, writing the
+    denoised chunks directly into a preallocated output buffer instead of joining a list of byte strings.
+    Two output buffers are used in turn, so the array returned by one call is still valid while the
+    next call is running (e.g., in a worker thread).
+    """
+    def __init__(self, speex_ns, frame_size: int = 160, max_samples: int = 1280):
+        self.speex_ns = speex_ns
+        self.frame_size = frame_size
+        self.output_buffers = [np.zeros(max_samples + frame_size, dtype=np.int16) for _ in range(2)]
+        self.output_bytes = [i.data.cast("B") for i in self.output_buffers]
+        self.buffer_ndx = 0
+
+    def process(self, x: Union[np.ndarray, bytes]):
+        """
+        Denoises the input audio.
+
+        Args:
+            x (Union[np.ndarray, bytes]): The 16-bit, 16khz audio to process, as an array or raw bytes.
+                                          Should be an integer multiple of `frame_size` samples.
+
+        Returns:
+            ndarray: The denoised audio, as a view of an output buffer that is reused two calls later
+        """
+        input_bytes = x if isinstance(x, bytes) else np.ascontiguousarray(x, dtype=np.int16).tobytes()
+        if len(input_bytes)//2 + self.frame_size > self.output_buffers[0].shape[0]:
+            self.output_buffers = [np.zeros(len(input_bytes)//2 + self.frame_size, dtype=np.int16) for _ in range(2)]
+            self.output_bytes = [i.data.cast("B") for i in self.output_buffers]
+
+        self.buffer_ndx ^= 1
+        output_bytes = self.output_bytes[self.buffer_ndx]
+        chunk_bytes = 2*self.frame_size
+        n_written = 0
+        for i in range(0, len(input_bytes), chunk_bytes):
+            cleaned = self.speex_ns.process(input_bytes[i:i+chunk_bytes])
+            output_bytes[n_written:n_written + len(cleaned)] = cleaned
+            n_written += len(cleaned)
+
+        return self.output_buffers[self.buffer_ndx][0:n_written//2]
+
+
+def _supports_batching(prediction_function: Callable, n_feature_frames: int, tolerance: float = 1e-5):
+    """
+    Checks whether a model prediction function returns the same scores for a batch of feature windows as for
+    each window individually. Some models (e.g., those with normalization layers that reduce over the batch
+    dimension) can't be batched, even when the model input shape allows it. The prediction function must
+    leave the model usable for single windows if the batch fails.
+    """
+    x = np.random.RandomState(0).uniform(-10, 10, (3, n_feature_frames, 96)).astype(np.float32)
+    try:
+        batch_predictions = np.asarray(prediction_function(x)[0])
+    except Exception:
+        return False
+
+    single_predictions = np.vstack([prediction_function(i[None, ])[0] for i in x])
+
+    return batch_predictions.shape == single_predictions.shape and \
+        bool(np.allclose(batch_predictions, single_predictions, atol=tolerance))
+
+
+def _predict_in_batches(prediction_function: Callable, batch_support: bool, x: np.ndarray):
+    """
+    Runs a model prediction function on a batch of feature windows of shape (batch, frames, features),
+    falling back to one call per window for models that don't support batching. In both cases
+    the first element of the returned value contains the scores in shape (batch, outputs).
+    """
+    if batch_support or x.shape[0] == 1:
+        return prediction_function(x)
+    return [np.vstack([prediction_function(i[None, ])[0] for i in x])]
+
+
+class _PredictionHistory(deque):
+    """
+    The most recent predictions of a label (a deque with a maximum length), which also keeps running counts
+    of the predictions compared with a threshold so that the patience and debounce filters take O(1) time
+    per frame. The counts are only kept once a threshold is set, are recalculated from the stored predictions
+    when the threshold changes, and are updated by the `append`, `extend`, and `clear` methods.
+    """
+    def __init__(self, iterable=(), maxlen: Union[int, None] = 30):
+        super().__init__(iterable, maxlen)
+        self.threshold: Union[float, None] = None
+        self.n_above = 0  # the number of consecutive most recent predictions above the threshold
+        self.n_since_above = sys.maxsize  # the number of predictions after the most recent one above the threshold
+
+    def set_threshold(self, threshold: float):
+        """Sets the threshold of the running counts, recalculating them if the threshold changed"""
+        if threshold != self.threshold:
+            self.threshold = threshold
+            self.n_above = 0
+            self.n_since_above = sys.maxsize
+            for prediction in self:
+                self._update_counts(prediction)
+
+    def _update_counts(self, prediction: float):
+        if prediction >= self.threshold:  # type: ignore[operator]
+            self.n_above += 1
+            self.n_since_above = 0
+        else:
+            self.n_above = 0
+            self.n_since_above += 1
+
+    def append(self, prediction):
+        super().append(prediction)
+        if self.threshold is not None:
+            self._update_counts(prediction)
+
+    def extend(self, predictions):
+        predictions = list(predictions)
+        super().extend(predictions)
+        if self.threshold is not None:
+            for prediction in predictions:
+                self._update_counts(prediction)
+
+    def clear(self):
+        super().clear()
+        self.n_above = 0
+        self.n_since_above = sys.maxsize
+
+    def n_recent_above(self):
+        """Gets the number of consecutive most recent predictions above the threshold that are still stored"""
+        return min(self.n_above, len(self))
+
+    def any_recent_above(self, n: int):
+        """Checks whether any of the `n` most recent (stored) predictions are above the threshold"""
+        return self.n_since_above < min(n, len(self))
+
+
+def _get_resampler(resampler: Optional[StreamingResampler], sample_rate: int):
+    """Gets a resampler from `sample_rate` to 16 khz, reusing the existing resampler of a stream (and its filter history)
+    if it has the same input sample rate"""
+    if resampler is None or resampler.input_rate != sample_rate:
+        return StreamingResampler(sample_rate, 16000)
+    return resampler
+
+
+def _check_prediction_array(out: Union[np.ndarray, None], shape: Tuple[int, ...]):
+    """Checks that an array for predictions has the right shape and type, or creates a new array if none is provided"""
+    if out is None:
+        return np.zeros(shape, dtype=np.float32)
+    if not isinstance(out, np.ndarray) or out.shape != shape or out.dtype != np.float32:
+        raise ValueError(f"The `out` argument must be a float32 Numpy array with shape {shape}!")
+    return out
+
+
+# Helper functions for applying the prediction filters to the scores of many frames at once (e.g., from a full clip).
+# Each frame is compared with the previous (already filtered) predictions, including those in the prediction buffer,
+# in the same way as when predicting frame by frame.
+def _apply_patience_to_frames(scores: np.ndarray, buffered_predictions: np.ndarray, patience: int,
+                              threshold: float, max_buffer_len: int = 30):
+    """
+    Zeros the scores of the frames that don't have `patience` consecutive previous predictions above the threshold.
+
+    Returns:
+        np.ndarray: The filtered scores
+    """
+    n_frames = scores.shape[0]
+    if patience <= 0:
+        kept = np.ones(n_frames, dtype=bool)
+    elif threshold <= 0:
+        # All previous predictions are above the threshold, so only the number of buffered predictions matters
+        kept = np.minimum(len(buffered_predictions) + np.arange(n_frames), max_buffer_len) >= patience
+    else:
+        # Once a frame is zeroed the following frames are as well, so frames are only kept while the scores
+        # stay above the threshold after a long enough sequence of buffered predictions above the threshold
+        below_threshold = np.flatnonzero(buffered_predictions < threshold)
+        n_previous_above = len(buffered_predictions) - (below_threshold[-1] + 1 if len(below_threshold) else 0)
+        if n_previous_above >= patience and patience <= max_buffer_len:
+            kept = np.concatenate(([True], np.logical_and.accumulate(scores >= threshold)[:-1]))[:n_frames]
+        else:
+            kept = np.zeros(n_frames, dtype=bool)
+
+    return np.where(kept, scores, 0.0).astype(scores.dtype)
+
+
+def _apply_debounce_to_frames(scores: np.ndarray, buffered_predictions: np.ndarray, n_debounce_frames: int,
+                              threshold: float, max_buffer_len: int = 30):
+    """
+    Zeros the scores above the threshold that are within `n_debounce_frames` frames after a previous
+    prediction above the threshold.
+
+    Returns:
+        np.ndarray: The filtered scores
+    """
+    scores = scores.copy()
+    n_buffered = len(buffered_predictions)
+    if threshold <= 0:
+        # All previous predictions are above the threshold, so every (non-zero) frame after the first is zeroed
+        scores[(n_buffered + np.arange(scores.shape[0]) >= 1) & (scores != 0)] = 0.0
+        return scores
+
+    n_debounce_frames = min(n_debounce_frames, max_buffer_len)
+    buffered_above = np.flatnonzero(buffered_predictions >= threshold)
+    last_ndx = buffered_above[-1] - n_buffered if len(buffered_above) else -np.inf
+    for ndx in np.flatnonzero(scores >= threshold):
+        if ndx - last_ndx <= n_debounce_frames:
+            scores[ndx] = 0.0
+        else:
+            last_ndx = ndx
+
+    return scores
+
+
+def _get_vad_frame_max_scores(vad_scores: np.ndarray, buffered_vad_scores: np.ndarray):
+    """
+    Gets the maximum VAD score from 0.4 to 0.56 seconds (3 frames) before each frame, using the same
+    frames as when predicting frame by frame.
+
+    Returns:
+        np.ndarray: The maximum VAD score for each frame (0 if there aren't enough previous frames)
+    """
+    n_buffered = min(len(buffered_vad_scores), 6)
+    all_scores = np.concatenate((np.full(6 - n_buffered, -np.inf), buffered_vad_scores[len(buffered_vad_scores) - n_buffered:],
+                                 vad_scores))
+    max_scores = np.lib.stride_tricks.sliding_window_view(all_scores, 3)[:vad_scores.shape[0]].max(axis=1)
+    return np.where(np.isinf(max_scores), 0.0, max_scores)
+
+
+class StreamState():
+    """
+    A copy of the state of one audio stream of a `Model` (or of a stream of a `MultiStreamModel`), from the
+    `snapshot` method: the audio, melspectrogram, and feature buffers, the partially processed audio, the prediction
+    buffers, and the state of the VAD model, resampler, and compute gating. Restoring the state (with the `restore`
+    method) in a model with the same wakeword models, even in another process, continues the stream with the same
+    predictions as the model it came from, without the warm-up frames of a new stream.
+
+    The state only contains Numpy arrays and numbers, so it can be pickled, or saved to and loaded from a Numpy
+    .npz file (without pickle) with the `save` and `load` methods. The state of the Speex noise suppression
+    can't be copied, so it restarts its noise estimate when a stream is restored.
+    """
+    def __init__(self, features: dict, predictions: Dict[str, np.ndarray], vad: Optional[dict] = None,
+                 resampler: Optional[dict] = None, gated_samples: int = 0, pending_audio: Optional[np.ndarray] = None):
+        """
+        Initialize the StreamState object.
+
+        Args:
+            features (dict): The state of the audio and feature buffers (see `AudioFeatures.snapshot`)
+            predictions (Dict[str, np.ndarray]): The prediction buffer of each label
+            vad (dict): The state of the VAD model (see `VAD.snapshot`), if the VAD is used
+            resampler (dict): The state of the resampler (see `StreamingResampler.snapshot`), if audio was resampled
+            gated_samples (int): The number of consecutive samples that meet the compute gating condition
+            pending_audio (np.ndarray): The audio denoised ahead by the pipelined Speex noise suppression,
+                                        which hasn't been processed yet
+        """
+        self.features = features
+        self.predictions = predictions
+        self.vad = vad
+        self.resampler = resampler
+        self.gated_samples = gated_samples
+        self.pending_audio = pending_audio
+
+    def save(self, file):
+        """
+        Saves the state as a Numpy .npz file.
+
+        Args:
+            file (Union[str, file]): The path of the file, or a file object opened for writing in binary mode
+        """
+        arrays = {f"features.{key}": np.asarray(value) for key, value in self.features.items()}
+        arrays.update({f"predictions.{label}": np.asarray(value) for label, value in self.predictions.items()})
+        for name, state in [("vad", self.vad), ("resampler", self.resampler)]:
+            if state is not None:
+                arrays.update({f"{name}.{key}": np.asarray(value) for key, value in state.items()})
+        if self.pending_audio is not None:
+            arrays["pending_audio"] = self.pending_audio
+        np.savez(file, gated_samples=np.asarray(self.gated_samples), **arrays)
+
+    @classmethod
+    def load(cls, file) -> "StreamState":
+        """
+        Loads a state saved with `save`.
+
+        Args:
+            file (Union[str, file]): The path of the file, or a file object opened for reading in binary mode
+
+        Returns:
+            StreamState: The loaded state
+        """
+        parts: Dict[str, dict] = {"features": {}, "predictions": {}, "vad": {}, "resampler": {}}
+        with np.load(file, allow_pickle=False) as data:
+            for key in data.files:
+                name, _, item = key.partition(".")
+                if name in parts:
+                    parts[name][item] = data[key] if data[key].ndim > 0 else data[key].item()
+            gated_samples = int(data["gated_samples"])
+            pending_audio = data["pending_audio"] if "pending_audio" in data.files else None
+
+        return cls(parts["features"], parts["predictions"], vad=parts["vad"] or None, resampler=parts["resampler"] or None,
+                   gated_samples=gated_samples, pending_audio=pending_audio)
+
+
+def _snapshot_stream(stream: Any):
+    """Gets the StreamState of a `Model`, `StreamSession`, or `_ModelStream` object (which have the same stream attributes)"""
+    speex_future = getattr(stream, "speex_future", None)
+    vad = getattr(stream, "vad", None)
+    return StreamState(
+        features=stream.preprocessor.snapshot(),
+        predictions={label: np.array(history, dtype=np.float32) for label, history in stream.prediction_buffer.items()},
+        vad=vad.snapshot() if vad is not None else None,
+        resampler=stream.resampler.snapshot() if stream.resampler is not None else None,
+        gated_samples=getattr(stream, "gated_samples", 0),
+        pending_audio=np.array(speex_future.result()) if speex_future is not None else None
+    )
+
+
+def _reset_stream(stream: Any):
+    """Resets the prediction history and the streaming state of a `Model`, `StreamSession`, or `_ModelStream` object"""
+    stream.prediction_buffer = defaultdict(partial(_PredictionHistory, maxlen=30))
+    stream.preprocessor.reset()
+    if hasattr(stream, "gated_samples"):
+        stream.gated_samples = 0
+    if hasattr(stream, "speex_future"):
+        stream.speex_future = None
+    if stream.resampler is not None:
+        stream.resampler.reset()
+
+    vad = getattr(stream, "vad", None)
+    if vad is not None:
+        vad.reset_states()
+        vad.prediction_buffer.clear()
+
+
+def _restore_stream(stream: Any, state: StreamState):
+    """Restores a StreamState in a `Model`, `StreamSession`, or `_ModelStream` object"""
+    model = getattr(stream, "model", stream)
+    if state.pending_audio is not None and getattr(model, "speex_thread_pool", None) is None:
+        raise ValueError("The state has audio from pipelined Speex noise suppression, so it can only be restored "
+                         "in a model with the `speex_pipelining` argument!")
+
+    stream.preprocessor.restore(state.features)
+    stream.prediction_buffer = defaultdict(partial(_PredictionHistory, maxlen=30))
+    for label, predictions in state.predictions.items():
+        stream.prediction_buffer[label].extend(np.asarray(predictions).tolist())
+
+    vad = getattr(stream, "vad", None)
+    if vad is not None and state.vad is not None:
+        vad.restore(state.vad)
+    elif vad is not None:
+        vad.reset_states()
+        vad.prediction_buffer.clear()
+
+    stream.resampler = None
+    if state.resampler is not None:
+        stream.resampler = StreamingResampler(int(state.resampler["input_rate"]), int(state.resampler["output_rate"]))
+        stream.resampler.restore(state.resampler)
+
+    if hasattr(stream, "gated_samples"):
+        stream.gated_samples = int(state.gated_samples)
+    if hasattr(stream, "speex_future"):
+        stream.speex_future = None
+        if state.pending_audio is not None:
+            stream.speex_future = Future()
+            stream.speex_future.set_result(np.asarray(state.pending_audio, dtype=np.int16))
+
+
+class Detection():
+    """
+    A detection of a wakeword in an audio stream, from the `detect_stream` method of a `Model` or `StreamSession`.
+    The sample offsets are in samples of 16 khz audio from the start of the audio passed to `detect_stream`.
+
+    With the default `emit="onset"` argument of `detect_stream`, a detection is yielded as soon as it has enough
+    frames above the threshold (the `patience` argument), so `score` and `end` only cover the frames up to that point.
+    With `emit="end"`, it is yielded at the end of the run of frames above the threshold, and they cover the whole run.
+
+    Attributes:
+        label (str): The label that was detected (a model name, or a class label of a multi-class model)
+        score (float): The highest score of the frames in the detection
+        start (int): The offset of the first sample of the first frame (1280 samples) with a score above the threshold
+        end (int): The offset after the last sample of the last frame in the detection
+        audio (Optional[np.ndarray]): If the `pre_roll` argument of `detect_stream` is set, a copy of the 16 khz
+                                      audio in the buffer of the stream from `pre_roll` seconds before `start`
+                                      to `end` (after resampling and noise suppression)
+    """
+    def __init__(self, label: str, score: float, start: int, end: int, audio: Optional[np.ndarray] = None):
+        self.label = label
+        self.score = score
+        self.start = start
+        self.end = end
+        self.audio = audio
+
+    def __repr__(self):
+        return f"Detection(label={self.label!r}, score={self.score:.3f}, start={self.start}, end={self.end})"
+
+
+class _StreamDetector():
+    """
+    Finds the detections in the predictions of a `Model` or `StreamSession` object on new audio, one chunk at a time
+    (see the `Model.detect_stream` method). A detection starts at the first chunk with a score above the threshold
+    and ends at the first chunk with a score below the threshold after it, and is returned when it has enough chunks
+    for the patience of its label (`emit="onset"`) or when it ends (`emit="end"`).
+    """
+    def __init__(self, stream: Any, threshold: Union[float, dict], patience: Union[int, dict], debounce_time: float,
+                 pre_roll: Optional[float], sample_rate: int, emit: str = "onset"):
+        if emit not in ("onset", "end"):
+            raise ValueError("The `emit` argument must be either 'onset' or 'end'!")
+        self.emit = emit
+        self.stream = stream
+        model = getattr(stream, "model", stream)
+        for setting in [threshold, patience]:
+            if isinstance(setting, dict):
+                unknown_keys = [i for i in setting.keys() if i not in model.labels and i not in model.models]
+                if unknown_keys:
+                    raise ValueError(f"The models or labels {unknown_keys} aren't loaded in the model!")
+
+        # Get the threshold and patience of each label (from the label or its parent model),
+        # only detecting the labels that have a threshold
+        self.thresholds: Dict[str, float] = {}
+        self.patience: Dict[str, int] = {}
+        for lbl in model.labels:
+            parent_model = model.get_parent_model_from_label(lbl)
+            if isinstance(threshold, dict):
+                if lbl in threshold or parent_model in threshold:
+                    self.thresholds[lbl] = threshold[lbl] if lbl in threshold else threshold[parent_model]
+            else:
+                self.thresholds[lbl] = threshold
+            self.patience[lbl] = patience.get(lbl, patience.get(parent_model, 1)) if isinstance(patience, dict) else patience
+            if self.patience[lbl] < 1:
+                raise ValueError("The `patience` argument must be at least 1 frame!")
+
+        self.n_debounce_samples = int(debounce_time*16000)
+        self.n_pre_roll_samples = int(pre_roll*16000) if pre_roll is not None else None
+        self.sample_rate = sample_rate
+
+        # The offset of the end of the last processed frame (audio accumulated before the first chunk
+        # is processed with it, so it has a negative offset)
+        self.position = -stream.preprocessor.accumulated_samples
+        self.candidates: Dict[str, dict] = {}  # the current runs of frames above the threshold of each label
+        self.last_end: Dict[str, int] = {}  # the end of the last detection of each label
+
+    def update(self, x: Union[np.ndarray, bytes]):
+        """
+        Predicts on a new chunk of audio of the stream.
+
+        Returns:
+            List[Detection]: The detections that reached their patience (or ended) with this chunk
+        """
+        predictions, frame_scores = self.stream.predict(x, return_frame_scores=True, sample_rate=self.sample_rate)
+        n_frames = len(next(iter(frame_scores.values()))) if frame_scores else 0
+        if n_frames == 0:
+            return []
+
+        start = self.position
+        self.position += n_frames*1280
+        detections = []
+        for lbl, threshold in self.thresholds.items():
+            score = float(predictions[lbl])
+            if score >= threshold:
+                candidate = self.candidates.setdefault(lbl, {"start": start, "score": score, "n_chunks": 0})
+                candidate["score"] = max(candidate["score"], score)
+                candidate["end"] = self.position
+                candidate["n_chunks"] += 1
+                if self.emit == "onset" and candidate["n_chunks"] == self.patience[lbl]:
+                    detection = self._get_detection(lbl, candidate)
+                    if detection is not None:
+                        detections.append(detection)
+            elif lbl in self.candidates:
+                detection = self._end_candidate(lbl, self.candidates.pop(lbl))
+                if detection is not None:
+                    detections.append(detection)
+        return detections
+
+    def finish(self):
+        """
+        Ends the detections that are still in progress at the end of the stream.
+
+        Returns:
+            List[Detection]: The detections
+        """
+        detections = [self._end_candidate(lbl, candidate) for lbl, candidate in self.candidates.items()]
+        self.candidates = {}
+        return [i for i in detections if i is not None]
+
+    def _end_candidate(self, lbl: str, candidate: dict):
+        """
+        Ends a run of frames above the threshold, returning its detection with `emit="end"` (or None if it is
+        filtered out), and recording its end for the debounce time if it was detected
+        """
+        detection = self._get_detection(lbl, candidate) if self.emit == "end" else None
+        if candidate.get("detected", False):
+            self.last_end[lbl] = candidate["end"]
+        return detection
+
+    def _get_detection(self, lbl: str, candidate: dict):
+        """Creates the detection for a run of frames above the threshold, or returns None if it is filtered out"""
+        if candidate["n_chunks"] < self.patience[lbl]:
+            return None
+        if lbl in self.last_end and candidate["start"] < self.last_end[lbl] + self.n_debounce_samples:
+            return None
+        candidate["detected"] = True
+
+        # Copy the audio from the ring buffer, as it is overwritten by the following chunks
+        audio = None
+        if self.n_pre_roll_samples is not None:
+            raw_data_buffer = self.stream.preprocessor.raw_data_buffer
+            offset = self.position - candidate["end"] + self.stream.preprocessor.accumulated_samples
+            audio = raw_data_buffer.get_last(candidate["end"] - candidate["start"] + self.n_pre_roll_samples,
+                                             offset=offset).copy()
+
+        return Detection(lbl, candidate["score"], candidate["start"], candidate["end"], audio)
+
+
+def _detect_stream(detector: _StreamDetector, chunks):
+    """Yields the detections in an iterable of audio chunks"""
+    for x in chunks:
+        yield from detector.update(x)
+    yield from detector.finish()
+
+
+async def _detect_stream_async(detector: _StreamDetector, chunks):
+    """
+    Yields the detections in an asynchronous iterable of audio chunks, predicting in a worker thread
+    so that the event loop isn't blocked
+    """
+    loop = asyncio.get_running_loop()
+    async for x in chunks:
+        for detection in await loop.run_in_executor(None, detector.update, x):
+            yield detection
+    for detection in detector.finish():
+        yield detection
 
 
 # Define main model class
@@ -44,6 +660,19 @@ class Model():
             custom_verifier_models: dict = {},
             custom_verifier_threshold: float = 0.1,
             inference_framework: str = "tflite",
+            fuse_models: bool = False,
+            onnx_graph_optimization_level: str = "all",
+            onnx_cache_dir: Optional[str] = None,
+            ncpu: int = 1,
+            model_ncpu: int = 1,
+            model_workers: int = 0,
+            instrumentation: Union[bool, Instrumentation] = False,
+            compute_gating: Union[str, None] = None,
+            energy_threshold: float = -60.0,
+            gating_hangover: float = 1.0,
+            concurrent_vad: bool = False,
+            speex_pipelining: bool = False,
+            precision: str = "float32",
             **kwargs
             ):
         """Initialize the openWakeWord model object.
@@ -69,7 +698,10 @@ class Model():
             custom_verifier_models (dict): A dictionary of paths to custom verifier models, where
                                            the keys are the model names (corresponding to the openwakeword.MODELS
                                            attribute) and the values are the filepaths of the
-                                           custom verifier models.
+                                           custom verifier models. Verifier models saved as scikit-learn
+                                           pipelines (.pkl files) are compiled into a Numpy form when loaded,
+                                           and compiled verifiers can also be loaded directly from .npz files
+                                           (see `openwakeword.custom_verifier_model.CompiledVerifier`).
             custom_verifier_threshold (float): The score threshold to use a custom verifier model. If the score
                                                from a model for a given frame is greater than this value, the
                                                associated custom verifier model will also predict on that frame, and
@@ -78,8 +710,111 @@ class Model():
                                        "tflite" or "onnx". The default is "tflite" as this results in better
                                        efficiency on common platforms (x86, ARM64), but in some deployment
                                        scenarios ONNX models may be preferable.
+            fuse_models (bool): Whether to combine all of the wakeword models that have the same input size
+                                into a single ONNX model, so that they are run with one inference call
+                                per frame instead of one call per model. This reduces the per-call overhead
+                                when many models are loaded, and has no effect on the predictions.
+                                Only supported with the "onnx" inference framework, and requires the
+                                optional `onnx` package.
+            onnx_graph_optimization_level (str): The level of graph optimizations made by onnxruntime when
+                                                 loading ONNX models, one of "disabled", "basic", "extended",
+                                                 or "all" (the default).
+            onnx_cache_dir (str): A directory where the ONNX models (including the feature and VAD models)
+                                  are cached after being optimized by onnxruntime, so that later processes
+                                  can load them without repeating the optimizations (or any other changes
+                                  made when loading the models, such as fusing them). This reduces the
+                                  start-up time when many models are loaded. If not provided (the default),
+                                  no caching is done.
+            ncpu (int): The number of threads used by the feature models (melspectrogram and audio embeddings).
+            model_ncpu (int): The number of threads used by each wakeword model.
+            model_workers (int): The number of worker threads used to run the wakeword models concurrently.
+                                 The inference frameworks release the GIL while a model runs, so with several
+                                 loaded models this lowers the latency of each `predict` call at the cost
+                                 of more CPU usage. The default (0) runs the models one after another in
+                                 the calling thread. Models combined with the `fuse_models` argument
+                                 are always run together by a single worker.
+
+                                 The feature models run before the wakeword models, so at most
+                                 max(`ncpu`, `model_workers` * `model_ncpu`) threads are busy at once.
+                                 This should not exceed the number of available CPU cores (a warning is
+                                 logged if it does), and when several `Model` objects or other CPU-heavy work
+                                 share the host, the defaults (a single thread for everything) usually give
+                                 the best overall throughput. Increasing these values is most useful for
+                                 a single latency-sensitive audio stream on a host with idle cores.
+            instrumentation (Union[bool, Instrumentation]): Whether to record latency histograms of each processing
+                                                            stage in the `instrumentation` attribute (see the
+                                                            `openwakeword.instrumentation.Instrumentation` class).
+                                                            An existing Instrumentation object can also be provided,
+                                                            to combine the measurements of several Model objects.
+                                                            The stages are "resample", "speex", "melspectrogram", "embedding",
+                                                            each wakeword model (by model name), "verifier", "vad",
+                                                            "postprocessing" (patience, debounce, and VAD filtering),
+                                                            and "predict" (the whole call). The "predict_calls"
+                                                            and "frames" counters are also recorded.
+            compute_gating (str): Whether to skip the audio embedding and wakeword models during sustained non-speech,
+                                  to save computation. The melspectrogram is still calculated for every frame, and
+                                  when the models run again the embeddings of the most recent skipped frames
+                                  are calculated first, so that the models predict on the same features as without
+                                  skipping and detections at the onset of speech aren't lost. Skipped frames have
+                                  scores of zero, which are also stored in the prediction history used by the
+                                  `patience` and `debounce_time` arguments of `predict` (instead of the scores
+                                  the models would have had). So with these arguments, the predictions after
+                                  skipped frames can differ from those without compute gating: with `patience`
+                                  they can be zeroed, and with `debounce_time` detections can be returned or
+                                  suppressed differently (as the scores before them in the history differ).
+                                  The options are:
+                                  "vad": Skip frames when the VAD filter (see the `vad_threshold` argument) would
+                                  zero the predictions anyway, so that the returned predictions are unchanged
+                                  (except with the `patience` and `debounce_time` arguments, as described above).
+                                  "energy": Skip frames when the audio level is below the `energy_threshold`
+                                  argument, which is cheaper than the VAD model but may miss very quiet speech.
+                                  The default (None) disables compute gating.
+            energy_threshold (float): The audio level (in dB relative to full scale 16-bit audio) below which
+                                      frames are treated as non-speech with the "energy" compute gating.
+            gating_hangover (float): How long (in seconds) the compute gating condition must hold before frames
+                                     are skipped, so that the models still run just after speech ends.
+                                     The fraction of skipped frames is returned by the `get_skipped_frame_fraction`
+                                     method.
+            concurrent_vad (bool): Whether to run the VAD model (see the `vad_threshold` argument) in a worker
+                                   thread at the same time as the feature and wakeword models, instead of after
+                                   them. Both release the GIL while running, so with at least two available CPU
+                                   cores this reduces the latency of each `predict` call to roughly the maximum
+                                   of the two instead of their sum. The predictions are unchanged. Has no effect
+                                   with the "vad" compute gating, which needs the VAD scores first.
+            speex_pipelining (bool): Whether to run the Speex noise suppression (see the `enable_speex_noise_suppression`
+                                     argument) one call ahead in a worker thread: each call to `predict` starts
+                                     denoising its input audio and predicts on the audio denoised during the previous
+                                     call, so that denoising overlaps with the feature and wakeword models. This
+                                     delays the predictions by one call (e.g., 80 ms for 1280 sample frames), and
+                                     only reduces latency when the Speex library releases the GIL and a spare CPU
+                                     core is available. The VAD scores are still calculated on the current input audio.
+            precision (str): The precision of the audio embedding model and the wakeword models, either "float32"
+                             (the default) or "int8" to use their quantized variants, which are stored next to the
+                             float models with an "_int8" suffix and can be created (and compared with the float models)
+                             with the `openwakeword.quantization` module. The quantized embedding model is faster on
+                             many CPUs, while the wakeword models are small enough that quantization has little effect.
+                             Only supported with the "onnx" inference framework.
             kwargs (dict): Any other keyword arguments to pass the the preprocessor instance
         """
+        # Check the threading configuration
+        if ncpu < 1 or model_ncpu < 1 or model_workers < 0:
+            raise ValueError("The `ncpu` and `model_ncpu` arguments must be at least 1, "
+                             "and the `model_workers` argument must be at least 0!")
+        n_busy_threads = max(ncpu, max(model_workers, 1)*model_ncpu) + (1 if concurrent_vad and vad_threshold > 0 else 0)
+        if n_busy_threads > (os.cpu_count() or 1):
+            logging.warning(f"The threading configuration (ncpu={ncpu}, model_ncpu={model_ncpu}, "
+                            f"model_workers={model_workers}, concurrent_vad={concurrent_vad}) uses up to "
+                            f"{n_busy_threads} threads at once, which is more than the {os.cpu_count()} available CPU cores. "
+                            "This oversubscription usually increases latency.")
+
+        # Check the compute gating configuration
+        if compute_gating not in [None, "vad", "energy"]:
+            raise ValueError(f"The `compute_gating` argument must be None, 'vad', or 'energy', not '{compute_gating}'")
+        if compute_gating == "vad" and vad_threshold <= 0:
+            raise ValueError("The 'vad' compute gating requires a VAD threshold greater than 0 (the `vad_threshold` argument)!")
+        if precision not in MODEL_PRECISIONS:
+            raise ValueError(f"The precision must be one of {list(MODEL_PRECISIONS.keys())}, not '{precision}'")
+
         # Get model paths for pre-trained models if user doesn't provide models to load
         pretrained_model_paths = openwakeword.get_pretrained_model_paths(inference_framework)
         wakeword_model_names = []
@@ -104,6 +839,8 @@ class Model():
         self.model_inputs = {}
         self.model_outputs = {}
         self.model_prediction_function = {}
+        self.model_batch_support = {}
+        self.shared_sessions: Dict[Hashable, SharedSession] = {}
         self.class_mapping = {}
         self.custom_verifier_models = {}
         self.custom_verifier_threshold = custom_verifier_threshold
@@ -113,10 +850,27 @@ class Model():
             try:
                 import tflite_runtime.interpreter as tflite
 
-                def tflite_predict(tflite_interpreter, input_index, output_index, x):
-                    tflite_interpreter.set_tensor(input_index, x)
-                    tflite_interpreter.invoke()
-                    return tflite_interpreter.get_tensor(output_index)[None, ]
+                def tflite_predict(shared_interpreter, create_interpreter, input_index, output_index, x):
+                    with shared_interpreter.lock:
+                        tflite_interpreter = shared_interpreter.session
+                        input_shape = shared_interpreter.info["input_shape"]
+                        if x.shape[0] != input_shape[0]:  # resize the model input for a new batch size
+                            # (with an invalid cached batch size until the resize succeeds)
+                            shared_interpreter.info["input_shape"] = [-1] + input_shape[1:]
+                            try:
+                                tflite_interpreter.resize_tensor_input(input_index, [x.shape[0]] + input_shape[1:],
+                                                                       strict=False)
+                                tflite_interpreter.allocate_tensors()
+                            except Exception:
+                                # The interpreter can't be used after failing to prepare the resized model
+                                # (even at the previous size), so it is replaced with a new one
+                                shared_interpreter.session, info = create_interpreter()
+                                shared_interpreter.info.update(info)
+                                raise
+                            shared_interpreter.info["input_shape"] = [x.shape[0]] + input_shape[1:]
+                        tflite_interpreter.set_tensor(input_index, x)
+                        tflite_interpreter.invoke()
+                        return tflite_interpreter.get_tensor(output_index)[None, ]
 
             except ImportError:
                 logging.warning("Tried to import the tflite runtime, but it was not found. "
@@ -134,36 +888,53 @@ class Model():
             try:
                 import onnxruntime as ort
 
-                def onnx_predict(onnx_model, x):
-                    return onnx_model.run(None, {onnx_model.get_inputs()[0].name: x})
+                def onnx_predict(onnx_model, x, run_options=None):
+                    return onnx_model.run(None, {onnx_model.get_inputs()[0].name: x}, run_options)
+
+                # Silence the runtime errors logged when checking whether the models support batching
+                quiet_run_options = ort.RunOptions()
+                quiet_run_options.log_severity_level = 4
 
             except ImportError:
                 raise ValueError("Tried to import onnxruntime, but it was not found. Please install it using `pip install onnxruntime`")
 
+        # Select the variants of the models for the precision
+        if precision != "float32" and inference_framework != "onnx":
+            raise ValueError(f"The {precision} precision is only supported with the onnx inference framework!")
+        self.model_paths = {mdl_name: mdl_path for mdl_path, mdl_name in zip(wakeword_models, wakeword_model_names)}
+        wakeword_models = [_get_model_path_for_precision(i, precision) for i in wakeword_models]
+
         for mdl_path, mdl_name in zip(wakeword_models, wakeword_model_names):
             # Load openwakeword models
             if inference_framework == "onnx":
                 if ".tflite" in mdl_path:
                     raise ValueError("The onnx inference framework is selected, but tflite models were provided!")
 
-                sessionOptions = ort.SessionOptions()
-                sessionOptions.inter_op_num_threads = 1
-                sessionOptions.intra_op_num_threads = 1
-
-                self.models[mdl_name] = ort.InferenceSession(mdl_path, sess_options=sessionOptions,
-                                                             providers=["CPUExecutionProvider"])
+                shared_session = get_shared_session(
+                    ("onnx", os.path.abspath(mdl_path), "dynamic_batch", model_ncpu, onnx_graph_optimization_level),
+                    lambda: create_onnx_session(mdl_path, lambda: _get_onnx_model_with_dynamic_batch(mdl_path),
+                                                variant="dynamic_batch", n_threads=model_ncpu,
+                                                graph_optimization_level=onnx_graph_optimization_level,
+                                                cache_dir=onnx_cache_dir)
+                )
+                self.models[mdl_name] = shared_session.session
 
                 self.model_inputs[mdl_name] = self.models[mdl_name].get_inputs()[0].shape[1]
                 self.model_outputs[mdl_name] = self.models[mdl_name].get_outputs()[0].shape[1]
                 pred_function = functools.partial(onnx_predict, self.models[mdl_name])
-                self.model_prediction_function[mdl_name] = pred_function
+                batch_check_function = functools.partial(onnx_predict, self.models[mdl_name], run_options=quiet_run_options)
 
             if inference_framework == "tflite":
                 if ".onnx" in mdl_path:
                     raise ValueError("The tflite inference framework is selected, but onnx models were provided!")
 
-                self.models[mdl_name] = tflite.Interpreter(model_path=mdl_path, num_threads=1)
-                self.models[mdl_name].allocate_tensors()
+                def create_tflite_interpreter():
+                    tflite_interpreter = tflite.Interpreter(model_path=mdl_path, num_threads=model_ncpu)
+                    tflite_interpreter.allocate_tensors()
+                    return tflite_interpreter, {"input_shape": list(tflite_interpreter.get_input_details()[0]['shape'])}
+
+                shared_session = get_shared_session(("tflite", os.path.abspath(mdl_path), model_ncpu), create_tflite_interpreter)
+                self.models[mdl_name] = shared_session.session
 
                 self.model_inputs[mdl_name] = self.models[mdl_name].get_input_details()[0]['shape'][1]
                 self.model_outputs[mdl_name] = self.models[mdl_name].get_output_details()[0]['shape'][1]
@@ -171,8 +942,20 @@ class Model():
                 tflite_input_index = self.models[mdl_name].get_input_details()[0]['index']
                 tflite_output_index = self.models[mdl_name].get_output_details()[0]['index']
 
-                pred_function = functools.partial(tflite_predict, self.models[mdl_name], tflite_input_index, tflite_output_index)
-                self.model_prediction_function[mdl_name] = pred_function
+                pred_function = functools.partial(tflite_predict, shared_session, create_tflite_interpreter,
+                                                  tflite_input_index, tflite_output_index)
+                batch_check_function = pred_function
+
+            # Check whether the model can predict on batches of feature windows in a single call
+            # (only once for each loaded model)
+            self.shared_sessions[mdl_name] = shared_session
+            if "batch_support" not in shared_session.info:
+                shared_session.info["batch_support"] = _supports_batching(batch_check_function, self.model_inputs[mdl_name])
+                self.models[mdl_name] = shared_session.session
+            self.model_batch_support[mdl_name] = shared_session.info["batch_support"]
+            self.model_prediction_function[mdl_name] = functools.partial(
+                _predict_in_batches, pred_function, self.model_batch_support[mdl_name]
+            )
 
             if class_mapping_dicts and class_mapping_dicts[wakeword_models.index(mdl_path)].get(mdl_name, None):
                 self.class_mapping[mdl_name] = class_mapping_dicts[wakeword_models.index(mdl_path)]
@@ -184,7 +967,8 @@ class Model():
             # Load custom verifier models
             if isinstance(custom_verifier_models, dict):
                 if custom_verifier_models.get(mdl_name, False):
-                    self.custom_verifier_models[mdl_name] = pickle.load(open(custom_verifier_models[mdl_name], 'rb'))
+                    from openwakeword.custom_verifier_model import load_verifier_model
+                    self.custom_verifier_models[mdl_name] = load_verifier_model(custom_verifier_models[mdl_name])
 
             if len(self.custom_verifier_models.keys()) < len(custom_verifier_models.keys()):
                 raise ValueError(
@@ -194,20 +978,86 @@ class Model():
                     " that has the same base models but doesn't have custom verifier models."
                 )
 
+        # Combine models with the same input size (and batching support) into single ONNX models
+        self.fused_models: Dict[str, _FusedModelGroup] = {}
+        if fuse_models and inference_framework != "onnx":
+            logging.warning("Fusing models is only supported with the onnx inference framework, "
+                            "so the `fuse_models` argument will be ignored.")
+        elif fuse_models:
+            model_groups = defaultdict(list)
+            for mdl_path, mdl_name in zip(wakeword_models, wakeword_model_names):
+                model_groups[(self.model_inputs[mdl_name], self.model_batch_support[mdl_name])].append((mdl_path, mdl_name))
+
+            for (_, batch_support), model_group in model_groups.items():
+                if len(model_group) < 2:
+                    continue
+                mdl_paths = [mdl_path for mdl_path, _ in model_group]
+                mdl_names = [mdl_name for _, mdl_name in model_group]
+                try:
+                    shared_session = get_shared_session(
+                        ("onnx", tuple([os.path.abspath(mdl_path) for mdl_path in mdl_paths]), "fused", model_ncpu,
+                         onnx_graph_optimization_level),
+                        lambda: create_onnx_session(mdl_paths, lambda: _fuse_onnx_models(mdl_paths, mdl_names),
+                                                    variant="fused:" + ",".join(mdl_names), n_threads=model_ncpu,
+                                                    graph_optimization_level=onnx_graph_optimization_level,
+                                                    cache_dir=onnx_cache_dir)
+                    )
+                except ImportError:
+                    logging.warning("Fusing models requires the onnx package, so the `fuse_models` argument will be ignored. "
+                                    "Please install it using `pip install onnx`")
+                    break
+                except Exception as e:
+                    logging.warning(f"Could not fuse the models {mdl_names}, so they will be run separately: {e}")
+                    continue
+
+                self.shared_sessions[tuple(mdl_names)] = shared_session
+                fused_model_group = _FusedModelGroup(shared_session.session, mdl_names, batch_support)
+                for mdl_name in mdl_names:
+                    self.fused_models[mdl_name] = fused_model_group
+
+        # Map each prediction label to its parent model (later models take precedence for duplicate labels)
+        self.label_to_model: Dict[Hashable, str] = {}
+        for mdl, mapping in self.class_mapping.items():
+            for lbl in mapping.values():
+                if isinstance(lbl, Hashable):
+                    self.label_to_model[lbl] = mdl
+            self.label_to_model[mdl] = mdl
+
+        # Get the prediction labels in a fixed order (the same as the keys of the prediction dictionaries),
+        # and the index of each label in the arrays returned by `predict_array`
+        self.labels: List[str] = list(dict.fromkeys(
+            lbl for mdl in self.models.keys()
+            for lbl in ([mdl] if self.model_outputs[mdl] == 1 else self.class_mapping[mdl].values())
+        ))
+        self.label_index: Dict[str, int] = {lbl: ndx for ndx, lbl in enumerate(self.labels)}
+
+        # Get the labels of each model, their indices in the prediction arrays, and the corresponding model outputs,
+        # so that the scores of each model are written directly into the prediction arrays
+        self._model_label_indices: Dict[str, Tuple[List[str], np.ndarray, np.ndarray]] = {}
+        for mdl in self.models.keys():
+            outputs = [(mdl, 0)] if self.model_outputs[mdl] == 1 else \
+                [(cls, int(int_label)) for int_label, cls in self.class_mapping[mdl].items()]
+            self._model_label_indices[mdl] = (
+                [lbl for lbl, _ in outputs],
+                np.array([self.label_index[lbl] for lbl, _ in outputs], dtype=np.intp),
+                np.array([output_ndx for _, output_ndx in outputs], dtype=np.intp)
+            )
+
         # Create buffer to store frame predictions
-        self.prediction_buffer: DefaultDict[str, deque] = defaultdict(partial(deque, maxlen=30))
+        self.prediction_buffer: DefaultDict[str, _PredictionHistory] = defaultdict(partial(_PredictionHistory, maxlen=30))
 
         # Initialize SpeexDSP noise canceller
         if enable_speex_noise_suppression:
             from speexdsp_ns import NoiseSuppression
-            self.speex_ns = NoiseSuppression.create(160, 16000)
+            self.speex_ns: Optional[_SpeexNoiseSuppressor] = _SpeexNoiseSuppressor(NoiseSuppression.create(160, 16000))
         else:
             self.speex_ns = None
 
         # Initialize Silero VAD
         self.vad_threshold = vad_threshold
         if vad_threshold > 0:
-            self.vad = openwakeword.VAD()
+            self.vad = openwakeword.VAD(onnx_graph_optimization_level=onnx_graph_optimization_level,
+                                        onnx_cache_dir=onnx_cache_dir)
 
         # Create AudioFeatures object, explicitly providing paths to pre-processing models
         # stored locally in the project's root ./models directory.
@@ -221,41 +1071,107 @@ class Model():
             local_melspec_path = os.path.join("models", "melspectrogram.onnx")
         if not os.path.exists(local_embedding_path):
             local_embedding_path = os.path.join("models", "embedding_model.onnx")
+        local_melspec_path = kwargs.pop("melspec_model_path", local_melspec_path)
+        local_embedding_path = kwargs.pop("embedding_model_path", local_embedding_path)
 
         self.preprocessor = AudioFeatures(
             melspec_model_path=local_melspec_path,
             embedding_model_path=local_embedding_path,
             inference_framework=inference_framework,
+            onnx_graph_optimization_level=onnx_graph_optimization_level,
+            onnx_cache_dir=onnx_cache_dir,
+            ncpu=ncpu,
+            precision=precision,
             **kwargs
         )
 
+        # Setup compute gating, with enough embeddings recalculated after skipping for the largest model input
+        self.compute_gating = compute_gating
+        self.energy_threshold = energy_threshold
+        self.gating_hangover = gating_hangover
+        self.max_backfill_frames = max(list(self.model_inputs.values()) + [1])
+        self.gated_samples = 0  # the number of consecutive samples that meet the compute gating condition
+        self.gating_stats = {"frames": 0, "skipped_frames": 0}
+
+        # Create the latency instrumentation, shared with the preprocessor
+        if isinstance(instrumentation, Instrumentation):
+            self.instrumentation = instrumentation
+        else:
+            self.instrumentation = Instrumentation(enabled=instrumentation)
+        self.preprocessor.instrumentation = self.instrumentation
+
+        # Create the thread pool for running the wakeword models concurrently
+        self.model_thread_pool = ThreadPoolExecutor(max_workers=model_workers) if model_workers > 0 else None
+
+        # Create the worker thread for running the VAD model concurrently
+        use_vad_thread = concurrent_vad and vad_threshold > 0 and compute_gating != "vad"
+        self.vad_thread_pool = ThreadPoolExecutor(max_workers=1) if use_vad_thread else None
+
+        # Create the worker thread for running the Speex noise suppression one call ahead
+        self.speex_thread_pool = ThreadPoolExecutor(max_workers=1) if speex_pipelining and self.speex_ns else None
+        self.speex_future: Optional[Future] = None
+
+        # Create the resampler for input audio that isn't 16 khz, on the first call to `predict` with that sample rate
+        self.resampler: Optional[StreamingResampler] = None
+
     def get_parent_model_from_label(self, label):
         """Gets the parent model associated with a given prediction label"""
-        parent_model = ""
-        for mdl in self.class_mapping.keys():
-            if label in self.class_mapping[mdl].values():
-                parent_model = mdl
-            elif label in self.class_mapping.keys() and label == mdl:
-                parent_model = mdl
-
-        return parent_model
+        return self.label_to_model.get(label, "")
 
     def reset(self):
-        """Reset the prediction and audio feature buffers. Useful for re-initializing the model, though may not be efficient
-        when called too frequently."""
-        self.prediction_buffer = defaultdict(partial(deque, maxlen=30))
-        self.preprocessor.reset()
+        """Reset the prediction and audio feature buffers and the VAD state. Useful for re-initializing the model, e.g., at the start
+        of a new audio stream. The feature buffer starts with precomputed warm-start features, so resetting
+        doesn't run any models."""
+        _reset_stream(self)
 
-    def predict(self, x: np.ndarray, patience: dict = {},
-                threshold: dict = {}, debounce_time: float = 0.0, timing: bool = False):
+    def create_stream(self):
+        """
+        Creates a new audio stream that shares the loaded models of this object, but has its own audio and
+        feature buffers, prediction history, and VAD, noise suppression, resampler, and compute gating state
+        (see the `StreamSession` class). Each stream is much smaller than a separate `Model` object
+        (about 1 MB), and different streams can be used concurrently from separate threads (e.g., one
+        stream per client connection of a server).
+
+        Returns:
+            StreamSession: The new stream
+        """
+        return StreamSession(self)
+
+    def snapshot(self):
+        """
+        Gets a copy of the state of the audio stream of this model (see the `StreamState` class), which can
+        be restored later or in another process with the `restore` method to continue the stream.
+
+        Returns:
+            StreamState: The state of the stream
+        """
+        return _snapshot_stream(self)
+
+    def restore(self, state: StreamState):
+        """
+        Restores the state of an audio stream from the `snapshot` method of this model or of another model
+        with the same wakeword models (e.g., in another process), replacing the current state of this model.
+
+        Args:
+            state (StreamState): The state of the stream
+        """
+        _restore_stream(self, state)
+
+    def predict(self, x: Union[np.ndarray, bytes], patience: dict = {},
+                threshold: dict = {}, debounce_time: float = 0.0, timing: bool = False,
+                return_frame_scores: bool = False, sample_rate: int = 16000):
         """Predict with all of the wakeword models on the input audio frames
 
         Args:
-            x (ndarray): The input audio data to predict on with the models. Ideally should be multiples of 80 ms
+            x (Union[np.ndarray, bytes]): The input audio data to predict on with the models. Ideally should be multiples of 80 ms
                                 (1280 samples), with longer lengths reducing overall CPU usage
                                 but decreasing detection latency. Input audio with durations greater than or less
                                 than 80 ms is also supported, though this will add a detection delay of up to 80 ms
                                 as the appropriate number of samples are accumulated.
+                                Besides Numpy arrays, any object that supports the buffer protocol and contains
+                                16-bit PCM audio (e.g., bytes, bytearray, memoryview, or mmap) can be passed directly,
+                                without a copy. If such an object has an odd number of bytes, the last byte is
+                                combined with the first byte of the next call.
             patience (dict): How many consecutive frames (of 1280 samples or 80 ms) above the threshold that must
                              be observed before the current frame will be returned as non-zero.
                              Must be provided as an a dictionary where the keys are the
@@ -268,141 +1184,448 @@ class Model():
             debounce_time (float): The time (in seconds) to wait before returning another non-zero prediction
                                    after a non-zero prediction. Can preven multiple detections of the same wake-word.
             timing (bool): Whether to return timing information of the models. Can be useful to debug and
-                           assess how efficiently models are running on the current hardware.
+                           assess how efficiently models are running on the current hardware. For continuous
+                           measurements (e.g., percentiles in production), use the `instrumentation` argument
+                           when creating the Model object instead.
+            return_frame_scores (bool): Whether to also return the scores of each frame (1280 samples)
+                                        processed in this call. When the input audio contains several frames,
+                                        the models predict on all of them in a single batch and the returned
+                                        prediction for each model is the maximum score over the frames.
+            sample_rate (int): The sample rate of the input audio. Audio with a sample rate other than 16 khz
+                               (e.g., 44.1 khz, 48 khz, 22.05 khz, or 8 khz) is resampled to 16 khz with a
+                               `openwakeword.utils.StreamingResampler` that keeps the filter history between
+                               calls, so audio from one stream should always be passed with the same sample rate.
 
         Returns:
             dict: A dictionary of scores between 0 and 1 for each model, where 0 indicates no
                   wake-word/wake-phrase detected. If the `timing` argument is true, returns a
                   tuple of dicts containing model predictions and timing information, respectively.
+                  If the `return_frame_scores` argument is true, a dictionary with a 1D array of the
+                  raw model scores for each processed frame (oldest first, before applying the custom verifier,
+                  patience, debounce, or VAD filtering) is added as the last element of the returned tuple.
+        """
+        out = np.zeros(len(self.labels), dtype=np.float32)
+        timing_dict, frame_scores = self._predict_stream(self, x, out, patience, threshold, debounce_time,
+                                                         timing, return_frame_scores, sample_rate)
+        return self._get_prediction_results(out, timing_dict, frame_scores)
+
+    def _get_prediction_results(self, out: np.ndarray, timing_dict: Optional[dict], frame_scores: Optional[dict]):
+        """Gets the return value of the `predict` method, with a prediction dictionary created from the prediction array"""
+        predictions = dict(zip(self.labels, out))
+        if timing_dict is not None and frame_scores is not None:
+            return predictions, timing_dict, frame_scores
+        elif timing_dict is not None:
+            return predictions, timing_dict
+        elif frame_scores is not None:
+            return predictions, frame_scores
+        else:
+            return predictions
+
+    def _predict_stream(self, stream: Union["Model", "StreamSession"], x: Union[np.ndarray, bytes], out: np.ndarray,
+                        patience: dict, threshold: dict, debounce_time: float, timing: bool, return_frame_scores: bool,
+                        sample_rate: int):
         """
-        # Check input data type
-        if not isinstance(x, np.ndarray):
-            raise ValueError(f"The input audio data (x) must by a Numpy array, instead received an object of type {type(x)}.")
+        Predicts on new audio of a stream (see the `predict` method), where the stream is this object
+        or a `StreamSession` created by it, writing the prediction of each label into the `out` array
+        (in the order of the `labels` attribute). All of the state of the stream (audio and feature buffers,
+        prediction history, VAD, noise suppression, resampler, and compute gating) is read from and updated in
+        the stream object, while this object is only read, so that different streams can be predicted on
+        concurrently from separate threads.
 
+        Returns:
+            tuple: The timing dictionary (if the `timing` argument is true) and the dictionary of frame scores
+                   (if the `return_frame_scores` argument is true), or None for each
+        """
         # Setup timing dict
+        instrumentation = self.instrumentation
+        predict_start_ns = instrumentation.start()
         if timing:
             timing_dict: Dict[str, Dict] = {}
             timing_dict["models"] = {}
-            feature_start = time.time()
-
-        # Get audio features (optionally with Speex noise suppression)
-        if self.speex_ns:
-            n_prepared_samples = self.preprocessor(self._suppress_noise_with_speex(x))
+            feature_start = time.perf_counter()
+
+        # Get the input audio samples (as a zero-copy view of bytes-like objects)
+        x = stream.preprocessor._get_samples(x)
+
+        # (optionally) resample the audio to 16 khz
+        if sample_rate != 16000:
+            resample_start_ns = instrumentation.start()
+            stream.resampler = _get_resampler(stream.resampler, sample_rate)
+            x = stream.resampler(x)
+            instrumentation.record("resample", resample_start_ns)
+
+        # (optionally) get the voice activity detection scores first when used for compute gating,
+        # or start getting them in the worker thread
+        vad_done = False
+        vad_future = None
+        if self.compute_gating == "vad":
+            self._run_vad(x, timing_dict["models"] if timing else None, vad=stream.vad)
+            vad_done = True
+        elif stream.vad_thread_pool is not None:
+            vad_future = stream.vad_thread_pool.submit(self._run_vad, x, timing_dict["models"] if timing else None,
+                                                       stream.vad)
+
+        # Decide whether to skip the embedding and wakeword models for non-speech audio
+        skip_models = self._update_compute_gating(x, stream) if self.compute_gating is not None else False
+
+        # Get audio features (optionally with Speex noise suppression, which when pipelined
+        # denoises this input in the worker thread and uses the input denoised in the previous call)
+        if stream.speex_thread_pool is not None:
+            x_suppressed = stream.speex_future.result() if stream.speex_future is not None else np.zeros(0, dtype=np.int16)
+            stream.speex_future = stream.speex_thread_pool.submit(self._suppress_noise_with_speex, x.tobytes(),
+                                                                  speex_ns=stream.speex_ns)
+            n_prepared_samples = stream.preprocessor(x_suppressed, compute_embeddings=not skip_models,
+                                                     max_backfill_frames=self.max_backfill_frames)
+        elif stream.speex_ns:
+            x_suppressed = self._suppress_noise_with_speex(x, speex_ns=stream.speex_ns)
+            n_prepared_samples = stream.preprocessor(x_suppressed, compute_embeddings=not skip_models,
+                                                     max_backfill_frames=self.max_backfill_frames)
         else:
-            n_prepared_samples = self.preprocessor(x)
+            n_prepared_samples = stream.preprocessor(x, compute_embeddings=not skip_models,
+                                                     max_backfill_frames=self.max_backfill_frames)
 
-        if timing:
-            timing_dict["models"]["preprocessor"] = time.time() - feature_start
+        skip_models = skip_models and n_prepared_samples >= 1280
+        if self.compute_gating is not None and n_prepared_samples >= 1280:
+            stream.gating_stats["frames"] += n_prepared_samples//1280
+            if skip_models:
+                stream.gating_stats["skipped_frames"] += n_prepared_samples//1280
+                instrumentation.increment("skipped_frames", n_prepared_samples//1280)
 
-        # Get predictions from model(s)
-        predictions = {}
+        if timing:
+            timing_dict["models"]["preprocessor"] = time.perf_counter() - feature_start
+
+        # Get predictions from model(s), sharing the feature windows between models with the same input size
+        frame_scores: Dict[str, np.ndarray] = {}
+        get_features = self._get_feature_window_function(stream.preprocessor)
+        model_scores = {}
+        if skip_models:  # all models have zero scores for skipped frames
+            model_scores = {mdl: np.zeros(self.model_outputs[mdl], dtype=np.float32) for mdl in self.models.keys()}
+            frame_scores.update({mdl: np.zeros((n_prepared_samples//1280, self.model_outputs[mdl]), dtype=np.float32)
+                                 for mdl in self.models.keys()})
+        elif self.model_thread_pool is not None and n_prepared_samples >= 1280 and len(self.models) > 1:
+            model_scores = self._get_model_scores_concurrently(
+                self.model_thread_pool, n_prepared_samples, stream.prediction_buffer, get_features, frame_scores,
+                timing_dict["models"] if timing else None
+            )
         for mdl in self.models.keys():
             if timing:
-                model_start = time.time()
-
-            # Run model to get predictions
-            if n_prepared_samples > 1280:
-                group_predictions = []
-                for i in np.arange(n_prepared_samples//1280-1, -1, -1):
-                    group_predictions.extend(
-                        self.model_prediction_function[mdl](
-                            self.preprocessor.get_features(
-                                    self.model_inputs[mdl],
-                                    start_ndx=-self.model_inputs[mdl] - i
-                            )
-                        )
-                    )
-                prediction = np.array(group_predictions).max(axis=0)[None, ]
-            elif n_prepared_samples == 1280:
-                prediction = self.model_prediction_function[mdl](
-                    self.preprocessor.get_features(self.model_inputs[mdl])
-                )
-            elif n_prepared_samples < 1280:  # get previous prediction if there aren't enough samples
-                if self.model_outputs[mdl] == 1:
-                    if len(self.prediction_buffer[mdl]) > 0:
-                        prediction = [[[self.prediction_buffer[mdl][-1]]]]
-                    else:
-                        prediction = [[[0]]]
-                elif self.model_outputs[mdl] != 1:
-                    n_classes = max([int(i) for i in self.class_mapping[mdl].keys()])
-                    prediction = [[[0]*(n_classes+1)]]
+                model_start = time.perf_counter()
 
-            if self.model_outputs[mdl] == 1:
-                predictions[mdl] = prediction[0][0][0]
+            if mdl in model_scores:
+                scores = model_scores[mdl]
             else:
-                for int_label, cls in self.class_mapping[mdl].items():
-                    predictions[cls] = prediction[0][0][int(int_label)]
-
-            # Update scores based on custom verifier model
-            if self.custom_verifier_models != {}:
-                for cls in predictions.keys():
-                    if predictions[cls] >= self.custom_verifier_threshold:
-                        parent_model = self.get_parent_model_from_label(cls)
-                        if self.custom_verifier_models.get(parent_model, False):
-                            verifier_prediction = self.custom_verifier_models[parent_model].predict_proba(
-                                self.preprocessor.get_features(self.model_inputs[mdl])
-                            )[0][-1]
-                            predictions[cls] = verifier_prediction
-
-            # Zero predictions for first 5 frames during model initialization
-            for cls in predictions.keys():
-                if len(self.prediction_buffer[cls]) < 5:
-                    predictions[cls] = 0.0
-
-            # Get timing information
+                scores = self._get_model_scores(mdl, n_prepared_samples, stream.prediction_buffer, get_features, frame_scores)
+            self._update_predictions(mdl, scores, out, stream.prediction_buffer, get_features)
+
+            # Get timing information (including the time the model ran in a worker thread)
             if timing:
-                timing_dict["models"][mdl] = time.time() - model_start
+                timing_dict["models"][mdl] = timing_dict["models"].get(mdl, 0) + time.perf_counter() - model_start
 
         # Update scores based on thresholds or patience arguments
+        postprocessing_start_ns = instrumentation.start()
+        self._apply_patience_and_debounce(out, stream.prediction_buffer, n_prepared_samples,
+                                          patience, threshold, debounce_time)
+
+        # Update prediction buffer
+        self._update_prediction_buffer(out, stream.prediction_buffer)
+        instrumentation.record("postprocessing", postprocessing_start_ns)
+
+        # (optionally) get voice activity detection scores and update model scores
+        if self.vad_threshold > 0:
+            if vad_future is not None:
+                vad_future.result()
+            elif not vad_done:
+                self._run_vad(x, timing_dict["models"] if timing else None, vad=stream.vad)
+
+            self._apply_vad(out, stream.vad)
+
+        label_frame_scores = None
+        if return_frame_scores:
+            label_frame_scores = {}
+            for mdl in self.models.keys():
+                scores = frame_scores.get(mdl, np.zeros((0, self.model_outputs[mdl]), dtype=np.float32))
+                if self.model_outputs[mdl] == 1:
+                    label_frame_scores[mdl] = scores[:, 0]
+                else:
+                    for int_label, cls in self.class_mapping[mdl].items():
+                        label_frame_scores[cls] = scores[:, int(int_label)]
+
+        instrumentation.record("predict", predict_start_ns)
+        instrumentation.increment("predict_calls")
+        instrumentation.increment("frames", n_prepared_samples//1280)
+
+        return (timing_dict if timing else None), label_frame_scores
+
+    def predict_array(self, x: Union[np.ndarray, bytes], out: Union[np.ndarray, None] = None, patience: dict = {},
+                      threshold: dict = {}, debounce_time: float = 0.0, sample_rate: int = 16000):
+        """
+        Predict with all of the wakeword models on the input audio frames, writing the predictions into
+        a float32 array instead of returning a dictionary. The scores are in the order of the `labels`
+        attribute, and the `label_index` attribute maps each label to its index. The scores of each model
+        are written directly into the array (the `predict` method creates its dictionary from the same array),
+        so with a preallocated `out` array no dictionary or Python float is created for the predictions,
+        and they can be thresholded with a single vectorized comparison.
+
+        Args:
+            x (ndarray): The input audio data (see the `predict` method)
+            out (ndarray): A 1D float32 array with one element per label to write the predictions into.
+                           If not provided, a new array is created.
+            patience (dict): See the `predict` method
+            threshold (dict): See the `predict` method
+            debounce_time (float): See the `predict` method
+            sample_rate (int): See the `predict` method
+
+        Returns:
+            ndarray: The `out` array (or the new array) with the prediction for each label
+        """
+        out = _check_prediction_array(out, (len(self.labels),))
+        self._predict_stream(self, x, out, patience, threshold, debounce_time, False, False, sample_rate)
+        return out
+
+    def detect_stream(self, chunks, threshold: Union[float, dict] = 0.5, patience: Union[int, dict] = 1,
+                      debounce_time: float = 0.0, pre_roll: Optional[float] = None, sample_rate: int = 16000,
+                      emit: str = "onset"):
+        """
+        Predicts on a stream of audio chunks and yields an event for each detection, instead of returning
+        the predictions of every frame. A detection starts at the first chunk with a score above the threshold,
+        and is yielded (with its highest score, and the sample offsets of its first and last frame) as soon as
+        it has `patience` consecutive chunks above the threshold. Alternatively, with `emit="end"` it is yielded
+        with the whole run of chunks above the threshold, at the first chunk with a score below the threshold
+        after it (or at the end of the stream).
+
+        The scores are those of the `predict` method (including the custom verifier models and VAD filtering)
+        for each chunk, so the offsets have the resolution of the chunks: use chunks of 1280 samples (80 ms)
+        to detect with the resolution of single frames.
+
+        Args:
+            chunks (Union[Iterable, AsyncIterable]): The audio chunks (see the `x` argument of the `predict` method).
+                                                     For an asynchronous iterable, an asynchronous generator is
+                                                     returned, which runs the models in a worker thread.
+            threshold (Union[float, dict]): The score threshold of all labels, or a dictionary with the thresholds
+                                            of specific model names or labels (other labels aren't detected)
+            patience (Union[int, dict]): The number of consecutive chunks above the threshold that a detection
+                                         must have, for all labels or as a dictionary of model names or labels
+            debounce_time (float): The time (in seconds) after the end of the run of chunks above the threshold
+                                   of a detection of a label in which new detections of the label are ignored
+            pre_roll (float): If set, each detection includes a copy of the audio from this many seconds before
+                              its start to its end (see the `Detection` class). As the score of a frame is based on
+                              the preceding ~1.3 seconds of audio, a few seconds are needed for the whole wakeword.
+            sample_rate (int): The sample rate of the audio chunks (see the `predict` method)
+            emit (str): When to yield each detection: 'onset' to yield it as soon as it reaches the patience
+                        of its label, or 'end' to yield it when its run of chunks above the threshold ends
+
+        Returns:
+            Union[Generator, AsyncGenerator]: A generator of `Detection` objects
+        """
+        detector = _StreamDetector(self, threshold, patience, debounce_time, pre_roll, sample_rate, emit)
+        return _detect_stream_async(detector, chunks) if hasattr(chunks, "__aiter__") else _detect_stream(detector, chunks)
+
+    def _get_feature_window_function(self, preprocessor: AudioFeatures):
+        """
+        Creates a function that gets feature windows from an AudioFeatures object, caching
+        the windows (and the outputs of fused models) so that models with the same input size
+        share them for the current frame.
+        """
+        return _FeatureWindows(preprocessor)
+
+    def _run_model(self, mdl: str, x: np.ndarray, fused_outputs: Dict[Tuple[int, Hashable], dict], key: Hashable):
+        """
+        Runs a model on a batch of feature windows. If the model is part of a fused model group, all of the
+        models in the group are run together and their outputs are stored in `fused_outputs` under the given key,
+        so that the other models in the group can reuse them for the same feature windows.
+        """
+        fused_model_group = self.fused_models.get(mdl, None)
+        if fused_model_group is None:
+            return self.model_prediction_function[mdl](x)
+
+        fused_key = (id(fused_model_group), key)
+        if fused_key not in fused_outputs:
+            fused_outputs[fused_key] = fused_model_group.predict(x)
+        return fused_outputs[fused_key][mdl]
+
+    def _get_model_scores(self, mdl: str, n_prepared_samples: int, prediction_buffer: DefaultDict[str, _PredictionHistory],
+                          get_features: "_FeatureWindows", frame_scores: Union[Dict[str, np.ndarray], None] = None):
+        """
+        Gets the scores of a model for the most recently processed audio. When more than one frame
+        (1280 samples) was processed, the model predicts on the feature windows of all of the frames
+        in a single batch and the maximum score of each output over the frames is returned.
+        If a `frame_scores` dictionary is provided, the scores of each frame (in shape frames x outputs)
+        are also stored in it under the model name.
+
+        Returns:
+            np.ndarray: A 1D array with the score for each model output
+        """
+        if n_prepared_samples >= 1280:
+            n_frames = n_prepared_samples//1280
+            batch = get_features.get_frame_windows(self.model_inputs[mdl], n_frames)
+            start_ns = self.instrumentation.start()
+            scores = np.asarray(self._run_model(mdl, batch, get_features.fused_outputs, n_frames)[0])
+            self.instrumentation.record(mdl, start_ns)
+            if frame_scores is not None:
+                frame_scores[mdl] = scores
+            return scores.max(axis=0)
+        else:  # get previous prediction if there aren't enough samples
+            if self.model_outputs[mdl] == 1:
+                if len(prediction_buffer[mdl]) > 0:
+                    return [prediction_buffer[mdl][-1]]
+                else:
+                    return [0]
+            else:
+                n_classes = max([int(i) for i in self.class_mapping[mdl].keys()])
+                return [0]*(n_classes+1)
+
+    def _get_model_scores_concurrently(self, thread_pool: ThreadPoolExecutor, n_prepared_samples: int,
+                                       prediction_buffer: DefaultDict[str, _PredictionHistory],
+                                       get_features: "_FeatureWindows", frame_scores: Dict[str, np.ndarray],
+                                       model_timing: Union[Dict[str, float], None] = None):
+        """
+        Gets the scores of all of the models (see `_get_model_scores`) with a thread pool,
+        running the models (or fused model groups) in separate worker threads at the same time.
+        If a `model_timing` dictionary is provided, the time each model took is stored in it.
+
+        Returns:
+            dict: A dictionary with the scores of each model
+        """
+        # Get the feature windows in this thread first, so that the workers only read them
+        n_frames = n_prepared_samples//1280
+        for n_feature_frames in set(self.model_inputs.values()):
+            get_features.get_frame_windows(n_feature_frames, n_frames)
+
+        # Models in the same fused model group are run by one worker, as they share a single inference call
+        model_groups: Dict[Hashable, List[str]] = defaultdict(list)
+        for mdl in self.models.keys():
+            model_groups[self.fused_models.get(mdl, mdl)].append(mdl)
+
+        def get_group_scores(mdls):
+            group_scores = {}
+            for mdl in mdls:
+                model_start = time.perf_counter()
+                group_scores[mdl] = self._get_model_scores(mdl, n_prepared_samples, prediction_buffer,
+                                                           get_features, frame_scores)
+                if model_timing is not None:
+                    model_timing[mdl] = time.perf_counter() - model_start
+            return group_scores
+
+        model_scores = {}
+        for group_scores in thread_pool.map(get_group_scores, model_groups.values()):
+            model_scores.update(group_scores)
+        return model_scores
+
+    def _update_predictions(self, mdl: str, scores: np.ndarray, out: np.ndarray,
+                            prediction_buffer: DefaultDict[str, _PredictionHistory], get_features: "_FeatureWindows"):
+        """
+        Writes the scores of a model into the prediction array (at the indices of the labels of the model
+        in the `labels` attribute), and applies the custom verifier models and the initialization period
+        of the prediction buffer.
+        """
+        labels, label_ndcs, output_ndcs = self._model_label_indices[mdl]
+        out[label_ndcs] = np.take(scores, output_ndcs)
+
+        # Update scores based on custom verifier model (once per frame, on the shared feature window)
+        verifier_model = self.custom_verifier_models.get(mdl, None)
+        if verifier_model is not None:
+            verify = label_ndcs[out[label_ndcs] >= self.custom_verifier_threshold]
+            if verify.shape[0] > 0:
+                start_ns = self.instrumentation.start()
+                out[verify] = verifier_model.predict_proba(get_features(self.model_inputs[mdl]))[0][-1]
+                self.instrumentation.record("verifier", start_ns)
+
+        # Zero predictions for first 5 frames during model initialization
+        for lbl in labels:
+            if len(prediction_buffer[lbl]) < 5:
+                out[self.label_index[lbl]] = 0.0
+
+    def _apply_patience_and_debounce(self, out: np.ndarray, prediction_buffer: DefaultDict[str, _PredictionHistory],
+                                     n_prepared_samples: int, patience: dict, threshold: dict, debounce_time: float):
+        """Updates the prediction array in place based on the `patience` or `debounce_time` arguments"""
+        if patience != {} or debounce_time > 0:
+            self._check_patience_and_debounce_args(patience, threshold, debounce_time)
+            for lbl, ndx in self.label_index.items():
+                parent_model = self.label_to_model.get(lbl, "")
+                if out[ndx] != 0.0:
+                    if parent_model in patience.keys():
+                        history = prediction_buffer[lbl]
+                        history.set_threshold(threshold[parent_model])
+                        if history.n_recent_above() < patience[parent_model]:
+                            out[ndx] = 0.0
+                    elif debounce_time > 0:
+                        if parent_model in threshold.keys():
+                            n_frames = int(np.ceil(debounce_time/(n_prepared_samples/16000)))
+                            history = prediction_buffer[lbl]
+                            history.set_threshold(threshold[parent_model])
+                            if out[ndx] >= threshold[parent_model] and history.any_recent_above(n_frames):
+                                out[ndx] = 0.0
+
+    def _update_prediction_buffer(self, out: np.ndarray, prediction_buffer: DefaultDict[str, _PredictionHistory]):
+        """Adds the predictions in the prediction array to the prediction history of each label"""
+        for lbl, prediction in zip(self.labels, out.tolist()):
+            prediction_buffer[lbl].append(prediction)
+
+    def _check_patience_and_debounce_args(self, patience: dict, threshold: dict, debounce_time: float):
+        """Checks that the `patience`, `threshold`, and `debounce_time` arguments are valid together"""
         if patience != {} or debounce_time > 0:
             if threshold == {}:
                 raise ValueError("Error! When using the `patience` argument, threshold "
                                  "values must be provided via the `threshold` argument!")
             if patience != {} and debounce_time > 0:
                 raise ValueError("Error! The `patience` and `debounce_time` arguments cannot be used together!")
-            for mdl in predictions.keys():
-                parent_model = self.get_parent_model_from_label(mdl)
-                if predictions[mdl] != 0.0:
-                    if parent_model in patience.keys():
-                        scores = np.array(self.prediction_buffer[mdl])[-patience[parent_model]:]
-                        if (scores >= threshold[parent_model]).sum() < patience[parent_model]:
-                            predictions[mdl] = 0.0
-                    elif debounce_time > 0:
-                        if parent_model in threshold.keys():
-                            n_frames = int(np.ceil(debounce_time/(n_prepared_samples/16000)))
-                            recent_predictions = np.array(self.prediction_buffer[mdl])[-n_frames:]
-                            if predictions[mdl] >= threshold[parent_model] and \
-                               (recent_predictions >= threshold[parent_model]).sum() > 0:
-                                predictions[mdl] = 0.0
 
-        # Update prediction buffer
-        for mdl in predictions.keys():
-            self.prediction_buffer[mdl].append(predictions[mdl])
+    def _apply_vad(self, out: np.ndarray, vad):
+        """Zeros the prediction array in place if the recent VAD scores are below the threshold"""
+        # Get frames from last 0.4 to 0.56 seconds (3 frames) before the current
+        # frame and get max VAD score
+        vad_frames = list(vad.prediction_buffer)[-7:-4]
+        vad_max_score = np.max(vad_frames) if len(vad_frames) > 0 else 0
+        if vad_max_score < self.vad_threshold:
+            out[:] = 0.0
 
-        # (optionally) get voice activity detection scores and update model scores
-        if self.vad_threshold > 0:
-            if timing:
-                vad_start = time.time()
+    def _run_vad(self, x: np.ndarray, model_timing: Union[Dict[str, float], None] = None, vad=None):
+        """
+        Adds the VAD score of new audio data to the prediction buffer of the VAD model
+        (by default the VAD model of this object, or the given `vad` object of a stream).
+        If a `model_timing` dictionary is provided, the time the VAD model took is stored in it.
+        """
+        vad = vad if vad is not None else self.vad
+        vad_start = time.perf_counter()
+        vad_start_ns = self.instrumentation.start()
+        vad(x)
+        self.instrumentation.record("vad", vad_start_ns)
+        if model_timing is not None:
+            model_timing["vad"] = time.perf_counter() - vad_start
+
+    def _update_compute_gating(self, x: np.ndarray, stream: Any = None):
+        """
+        Updates the duration of audio that meets the compute gating condition (see the `compute_gating` argument
+        of the Model class) with new audio data of a stream (by default this object).
 
-            self.vad(x)
+        Returns:
+            bool: Whether the embedding and wakeword models should be skipped for the new audio
+        """
+        stream = stream if stream is not None else self
+        if self.compute_gating == "vad":
+            vad_frames = list(stream.vad.prediction_buffer)[-7:-4]
+            non_speech = (np.max(vad_frames) if len(vad_frames) > 0 else 0) < self.vad_threshold
+        else:
+            rms = np.sqrt(np.mean(x.astype(np.float32)**2)) if x.shape[0] > 0 else 0.0
+            non_speech = 20*np.log10(max(rms, 1e-10)/32768) < self.energy_threshold
 
-            if timing:
-                timing_dict["models"]["vad"] = time.time() - vad_start
+        stream.gated_samples = stream.gated_samples + x.shape[0] if non_speech else 0
+        return stream.gated_samples > self.gating_hangover*16000
 
-            # Get frames from last 0.4 to 0.56 seconds (3 frames) before the current
-            # frame and get max VAD score
-            vad_frames = list(self.vad.prediction_buffer)[-7:-4]
-            vad_max_score = np.max(vad_frames) if len(vad_frames) > 0 else 0
-            for mdl in predictions.keys():
-                if vad_max_score < self.vad_threshold:
-                    predictions[mdl] = 0.0
+    def get_skipped_frame_fraction(self):
+        """
+        Gets the fraction of the processed frames (of 1280 samples) for which the embedding and wakeword
+        models were skipped by compute gating (see the `compute_gating` argument of the Model class).
 
-        if timing:
-            return predictions, timing_dict
-        else:
-            return predictions
+        Returns:
+            float: The fraction of skipped frames, or 0 if no frames were processed
+        """
+        if self.gating_stats["frames"] == 0:
+            return 0.0
+        return self.gating_stats["skipped_frames"]/self.gating_stats["frames"]
 
-    def predict_clip(self, clip: Union[str, np.ndarray], padding: int = 1, chunk_size=1280, **kwargs):
+    def predict_clip(self, clip: Union[str, np.ndarray], padding: int = 1, chunk_size=1280,
+                     offline: bool = False, return_type: str = "list", **kwargs):
         """Predict on an full audio clip, simulating streaming prediction.
         The input clip must bit a 16-bit, 16 khz, single-channel WAV file.
 
@@ -412,11 +1635,26 @@ class Model():
             padding (int): How many seconds of silence to pad the start/end of the clip with
                             to make sure that short clips can be processed correctly (default: 1)
             chunk_size (int): The size (in samples) of each chunk of audio to pass to the model
+            offline (bool): Whether to process the clip in large blocks of frames instead of one chunk
+                            at a time, with a single melspectrogram, embedding, and wakeword model call
+                            for all of the frames in each block and the `patience`, `debounce_time`, and VAD
+                            filtering applied to all of the frames at once. This is much more efficient
+                            for long clips, and the predictions are the same as the default (streaming)
+                            mode with a `chunk_size` of 1280 (which is used instead of the `chunk_size` argument).
+                            Only the `patience`, `threshold`, and `debounce_time` keyword arguments are supported.
+            return_type (str): The type of data to return. Can be either 'list' for a list of prediction
+                               dictionaries (one per frame), or 'array' for a 2D array of shape
+                               frames x labels, where the columns are in the order of the `labels`
+                               attribute (the same order as the keys of the prediction dictionaries).
             kwargs: Any keyword arguments to pass to the class `predict` method
 
         Returns:
-            list: A list containing the frame-level prediction dictionaries for the audio clip
+            Union[list, np.ndarray]: The frame-level predictions for the audio clip, as a list of
+                                     dictionaries or a 2D array depending on the `return_type` argument
         """
+        if return_type not in ["list", "array"]:
+            raise ValueError(f"The `return_type` argument must be 'list' or 'array', not '{return_type}'")
+
         if isinstance(clip, str):
             # Load audio clip as 16-bit PCM data
             with wave.open(clip, mode='rb') as f:
@@ -434,14 +1672,105 @@ class Model():
                 )
             )
 
+        if offline and (self.preprocessor.accumulated_samples != 0 or self.preprocessor.raw_byte_remainder
+                        or self.preprocessor.skipped_embedding_frames != 0):
+            logging.warning("The model has partially processed audio from a previous call to `predict`, "
+                            "so the clip will be processed one chunk at a time instead of offline.")
+            offline, chunk_size = False, 1280
+
+        if offline:
+            labels, frame_predictions = self._predict_clip_offline(data[0:len(range(0, data.shape[0]-1280, 1280))*1280],
+                                                                   **kwargs)
+            if return_type == "array":
+                return frame_predictions
+            return [dict(zip(labels, i)) for i in frame_predictions.tolist()]
+
         # Iterate through clip, getting predictions
         predictions = []
         step_size = chunk_size
         for i in range(0, data.shape[0]-step_size, step_size):
             predictions.append(self.predict(data[i:i+step_size], **kwargs))
 
+        if return_type == "array":
+            return np.array([list(i.values()) for i in predictions], dtype=np.float32)
         return predictions
 
+    def _predict_clip_offline(self, data: np.ndarray, patience: dict = {}, threshold: dict = {},
+                              debounce_time: float = 0.0):
+        """
+        Predicts on the frames (1280 samples) of an audio clip in large blocks, with the same results
+        as predicting on each frame with the `predict` method. The number of frames in each block is limited
+        by the sizes of the audio and feature buffers in the preprocessor.
+
+        Args:
+            data (np.ndarray): The audio data, with a length that is a multiple of 1280 samples
+            patience (dict): See the `predict` method
+            threshold (dict): See the `predict` method
+            debounce_time (float): See the `predict` method
+
+        Returns:
+            tuple: The list of prediction labels (the `labels` attribute), and a 2D array of shape
+                   frames x labels with the predictions, with the columns in the order of the labels
+        """
+        self._check_patience_and_debounce_args(patience, threshold, debounce_time)
+
+        # Get the scores for all frames, in blocks (with a column for each label in the `labels` attribute,
+        # so for duplicate labels the scores of the later models take precedence, as in the `predict` method)
+        n_frames_total = data.shape[0]//1280
+        block_size = max(1, min(64, self.preprocessor.feature_buffer_max_len - max(self.model_inputs.values()) + 1))
+        scores = np.zeros((n_frames_total, len(self.labels)), dtype=np.float32)
+        for block_start in range(0, n_frames_total, block_size):
+            block = data[block_start*1280:min(block_start + block_size, n_frames_total)*1280]
+            n_frames = block.shape[0]//1280
+            self.preprocessor._streaming_features_by_frame(self._suppress_noise_with_speex(block) if self.speex_ns else block)
+
+            frame_scores: Dict[str, np.ndarray] = {}
+            get_features = self._get_feature_window_function(self.preprocessor)
+            for mdl in self.models.keys():
+                self._get_model_scores(mdl, n_frames*1280, self.prediction_buffer, get_features, frame_scores)
+                _, label_ndcs, output_ndcs = self._model_label_indices[mdl]
+                block_scores = frame_scores[mdl][:, output_ndcs]
+
+                # Update scores based on custom verifier model
+                verifier_model = self.custom_verifier_models.get(mdl, None)
+                verify = block_scores >= self.custom_verifier_threshold
+                verify_frames = verify.any(axis=1)
+                if verifier_model is not None and verify_frames.any():
+                    verifier_scores = np.zeros(n_frames, dtype=np.float32)
+                    verifier_scores[verify_frames] = verifier_model.predict_proba(
+                        get_features.get_frame_windows(self.model_inputs[mdl], n_frames)[verify_frames]
+                    )[:, -1]
+                    block_scores = np.where(verify, verifier_scores[:, None], block_scores)
+
+                scores[block_start:block_start + n_frames, label_ndcs] = block_scores
+
+        # Update scores for the model initialization period, and based on the patience or debounce arguments
+        for col, lbl in enumerate(self.labels):
+            buffered_predictions = np.array(self.prediction_buffer[lbl])
+            scores[0:max(0, 5 - len(buffered_predictions)), col] = 0.0
+
+            parent_model = self.label_to_model.get(lbl, "")
+            if parent_model in patience.keys():
+                scores[:, col] = _apply_patience_to_frames(scores[:, col], buffered_predictions,
+                                                           patience[parent_model], threshold[parent_model])
+            elif debounce_time > 0 and parent_model in threshold.keys():
+                scores[:, col] = _apply_debounce_to_frames(scores[:, col], buffered_predictions,
+                                                           int(np.ceil(debounce_time/(1280/16000))),
+                                                           threshold[parent_model])
+
+            self.prediction_buffer[lbl].extend(scores[:, col].tolist())
+
+        # (optionally) zero the predictions for frames with low VAD scores, getting the VAD scores
+        # of all frames at once (each the average of the scores of two chunks, as when predicting frame by frame)
+        if self.vad_threshold > 0:
+            buffered_vad_scores = np.array(self.vad.prediction_buffer)
+            chunk_scores = self.vad.predict_clips([data[0:n_frames_total*1280]], frame_size=640, streams=[self.vad])[0]
+            vad_scores = chunk_scores.reshape(n_frames_total, 2).mean(axis=1)
+            self.vad.prediction_buffer.extend(vad_scores.tolist())
+            scores[_get_vad_frame_max_scores(vad_scores, buffered_vad_scores) < self.vad_threshold] = 0.0
+
+        return self.labels, scores
+
     def _get_positive_prediction_frames(
             self,
             file: str,
@@ -481,7 +1810,7 @@ class Model():
             for lbl in predictions.keys():
                 if predictions[lbl] >= threshold:
                     mdl = self.get_parent_model_from_label(lbl)
-                    features = self.preprocessor.get_features(self.model_inputs[mdl])
+                    features = self.preprocessor.get_features(self.model_inputs[mdl]).copy()
                     if return_type == 'features':
                         positive_data[lbl].append(features)
                     if return_type == 'audio':
@@ -495,27 +1824,441 @@ class Model():
 
         return positive_data_combined
 
-    def _suppress_noise_with_speex(self, x: np.ndarray, frame_size: int = 160):
+    def _suppress_noise_with_speex(self, x: Union[np.ndarray, bytes], frame_size: int = 160, speex_ns=None):
         """
-        Runs the input audio through the SpeexDSP noise suppression algorithm.
+        Runs the input audio through the SpeexDSP noise suppression algorithm,
+        recording the time taken as the "speex" stage of the instrumentation.
         Note that this function updates the state of the existing Speex noise
         suppression object, and isn't intended to be called externally.
 
         Args:
-            x (ndarray): The 16-bit, 16khz audio to process. Must always be an
-                         integer multiple of `frame_size`.
+            x (Union[np.ndarray, bytes]): The 16-bit, 16khz audio to process. Must always be an
+                                          integer multiple of `frame_size`.
             frame_size (int): The frame size to use for the Speex Noise suppressor.
                               Must match the frame size specified during the
                               initialization of the noise suppressor.
+            speex_ns: The `_SpeexNoiseSuppressor` object to use (default is the object of this model)
 
         Returns:
-            ndarray: The input audio with noise suppression applied
+            ndarray: The input audio with noise suppression applied, as a view of a buffer
+                     of the noise suppression object that is reused two calls later
         """
-        cleaned = []
-        for i in range(0, x.shape[0], frame_size):
-            chunk = x[i:i+frame_size]
-            cleaned.append(self.speex_ns.process(chunk.tobytes()))
+        speex_ns = speex_ns if speex_ns is not None else self.speex_ns
+        if speex_ns.frame_size != frame_size:
+            raise ValueError(f"The frame size ({frame_size}) must match the frame size of the noise suppressor ({speex_ns.frame_size})!")
 
-        cleaned_bytestring = b''.join(cleaned)
-        cleaned_array = np.frombuffer(cleaned_bytestring, np.int16)
+        speex_start_ns = self.instrumentation.start()
+        cleaned_array = speex_ns.process(x)
+        self.instrumentation.record("speex", speex_start_ns)
         return cleaned_array
+
+
+class _FeatureWindows():
+    """
+    Gets feature windows from an AudioFeatures object for the current frame, caching the windows
+    and the outputs of fused model groups so that they are only computed once per frame.
+    """
+    def __init__(self, preprocessor: AudioFeatures):
+        self.preprocessor = preprocessor
+        self.feature_windows: Dict[Tuple[int, int], np.ndarray] = {}
+        self.frame_windows: Dict[Tuple[int, int], np.ndarray] = {}
+        self.fused_outputs: Dict[Tuple[int, Hashable], dict] = {}
+
+    def __call__(self, n_feature_frames: int, start_ndx: int = -1):
+        key = (n_feature_frames, start_ndx)
+        if key not in self.feature_windows:
+            self.feature_windows[key] = self.preprocessor.get_features(n_feature_frames, start_ndx=start_ndx)
+        return self.feature_windows[key]
+
+    def get_frame_windows(self, n_feature_frames: int, n_frames: int):
+        """Gets the feature windows ending at each of the last `n_frames` frames as one batch, oldest first"""
+        key = (n_feature_frames, n_frames)
+        if key not in self.frame_windows:
+            if n_frames == 1:
+                self.frame_windows[key] = self(n_feature_frames)
+            else:
+                self.frame_windows[key] = np.concatenate(
+                    [self(n_feature_frames, start_ndx=-n_feature_frames - i) for i in range(n_frames-1, -1, -1)]
+                )
+        return self.frame_windows[key]
+
+
+# Define model class for predicting on many audio streams at once
+class _ModelStream():
+    """The state of a single audio stream in a MultiStreamModel object (buffers, noise suppression, and VAD)"""
+    def __init__(self, model: Model):
+        self.preprocessor = model.preprocessor.new_stream()
+        self.prediction_buffer: DefaultDict[str, _PredictionHistory] = defaultdict(partial(_PredictionHistory, maxlen=30))
+
+        self.speex_ns = None
+        if model.speex_ns:
+            from speexdsp_ns import NoiseSuppression
+            self.speex_ns = _SpeexNoiseSuppressor(NoiseSuppression.create(160, 16000))
+
+        self.vad = model.vad.new_stream() if model.vad_threshold > 0 else None
+        self.resampler: Optional[StreamingResampler] = None
+
+
+class StreamSession(_ModelStream):
+    """
+    An independent audio stream created with `Model.create_stream`, which holds only the state of the stream
+    (audio and feature buffers, prediction history, and VAD, noise suppression, resampler, and compute gating
+    state) and predicts with the models loaded by the parent `Model` object.
+
+    The parent model is only read during predictions, so different streams of the same model can be used
+    concurrently from separate threads (the ONNX sessions are thread-safe, and the tflite interpreters
+    are locked while in use). A single stream must not be used from more than one thread at a time.
+    The predictions of a stream are the same as those of a separate `Model` object receiving the same audio,
+    and the latency instrumentation of the parent model records the stages of all of its streams.
+
+    Memory per stream is about 1 MB, almost all of which is preallocated (and so doesn't grow while streaming):
+    ~640 KB for the ring buffer of the last 10 seconds of 16 khz audio, ~250 KB for the melspectrogram buffer,
+    ~90 KB for the embedding feature buffer, and a few KB for the prediction history (30 scores per label)
+    and the VAD state. With Speex noise suppression enabled, each stream also has its own noise suppressor.
+    With the `concurrent_vad` or `speex_pipelining` arguments of the parent model, each stream also has its
+    own worker threads, so that the VAD model and noise suppression of different streams run in parallel.
+    These threads are stopped with the `close` method (or by using the stream as a context manager)
+    when the stream is no longer needed, e.g. when a client disconnects.
+    """
+    def __init__(self, model: Model):
+        super().__init__(model)
+        self.model = model
+        self.labels = model.labels
+        self.label_index = model.label_index
+        self.vad_thread_pool = ThreadPoolExecutor(max_workers=1) if model.vad_thread_pool is not None else None
+        self.speex_thread_pool = ThreadPoolExecutor(max_workers=1) if model.speex_thread_pool is not None else None
+        self.speex_future: Optional[Future] = None
+        self.gated_samples = 0
+        self.gating_stats = {"frames": 0, "skipped_frames": 0}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        """
+        Stops the worker threads of the stream (if any), waiting for any work in progress to finish.
+        The stream can't be used for predictions after it's closed. Calling `close` more than once has no effect.
+        """
+        for thread_pool in (self.vad_thread_pool, self.speex_thread_pool):
+            if thread_pool is not None:
+                thread_pool.shutdown(wait=True)
+        self.speex_future = None
+
+    def predict(self, x: Union[np.ndarray, bytes], patience: dict = {},
+                threshold: dict = {}, debounce_time: float = 0.0, timing: bool = False,
+                return_frame_scores: bool = False, sample_rate: int = 16000):
+        """
+        Predict with all of the wakeword models of the parent model on new audio of this stream.
+        See the `Model.predict` method for the arguments and the returned predictions.
+        """
+        out = np.zeros(len(self.labels), dtype=np.float32)
+        timing_dict, frame_scores = self.model._predict_stream(self, x, out, patience, threshold, debounce_time, timing,
+                                                               return_frame_scores, sample_rate)
+        return self.model._get_prediction_results(out, timing_dict, frame_scores)
+
+    def predict_array(self, x: Union[np.ndarray, bytes], out: Union[np.ndarray, None] = None, patience: dict = {},
+                      threshold: dict = {}, debounce_time: float = 0.0, sample_rate: int = 16000):
+        """
+        Predict on new audio of this stream, writing the predictions into a float32 array in the order
+        of the `labels` attribute (see the `Model.predict_array` method).
+        """
+        out = _check_prediction_array(out, (len(self.labels),))
+        self.model._predict_stream(self, x, out, patience, threshold, debounce_time, False, False, sample_rate)
+        return out
+
+    def detect_stream(self, chunks, threshold: Union[float, dict] = 0.5, patience: Union[int, dict] = 1,
+                      debounce_time: float = 0.0, pre_roll: Optional[float] = None, sample_rate: int = 16000,
+                      emit: str = "onset"):
+        """
+        Predicts on a stream of audio chunks of this stream and yields an event for each detection
+        (see the `Model.detect_stream` method for the arguments and the returned generator).
+        """
+        detector = _StreamDetector(self, threshold, patience, debounce_time, pre_roll, sample_rate, emit)
+        return _detect_stream_async(detector, chunks) if hasattr(chunks, "__aiter__") else _detect_stream(detector, chunks)
+
+    def reset(self):
+        """Reset the prediction and audio feature buffers and the VAD state of this stream (see the `Model.reset` method)"""
+        _reset_stream(self)
+
+    def snapshot(self):
+        """
+        Gets a copy of the state of this stream (see the `StreamState` class).
+
+        Returns:
+            StreamState: The state of the stream
+        """
+        return _snapshot_stream(self)
+
+    def restore(self, state: StreamState):
+        """
+        Restores the state of an audio stream (e.g., from the `snapshot` method of this stream,
+        or of a `Model` with the same models), replacing the current state of this stream.
+
+        Args:
+            state (StreamState): The state of the stream
+        """
+        _restore_stream(self, state)
+
+    def get_skipped_frame_fraction(self):
+        """
+        Gets the fraction of the processed frames of this stream for which the embedding and wakeword models
+        were skipped by compute gating (see the `Model.get_skipped_frame_fraction` method).
+
+        Returns:
+            float: The fraction of skipped frames, or 0 if no frames were processed
+        """
+        if self.gating_stats["frames"] == 0:
+            return 0.0
+        return self.gating_stats["skipped_frames"]/self.gating_stats["frames"]
+
+
+class MultiStreamModel():
+    """
+    A model class for predicting with openWakeWord models on many independent audio streams at once.
+
+    Each stream has its own audio/feature buffers and prediction history, while the melspectrogram, embedding,
+    and wakeword models are loaded once and shared by all streams. On each call to `predict`, the models are run
+    on a single batch containing the new frames of every stream that has enough audio accumulated, which is
+    much more efficient than running a separate `Model` object per stream. The predictions for each stream
+    are the same as those from an independent `Model` object receiving the same audio.
+    """
+    def __init__(self, **kwargs):
+        """Initialize the MultiStreamModel object.
+
+        Args:
+            kwargs (dict): Keyword arguments used to create the underlying `Model` object (e.g., `wakeword_models`,
+                           `inference_framework`, `vad_threshold`). See the `Model` class for details.
+                           The `compute_gating` argument isn't supported, as the models run on a single batch
+                           for all of the streams.
+        """
+        if kwargs.get("compute_gating") is not None:
+            raise ValueError("The `compute_gating` argument is not supported by the MultiStreamModel class")
+        self.model = Model(**kwargs)
+        self.streams: Dict[Hashable, _ModelStream] = {}
+        self.labels = self.model.labels
+        self.label_index = self.model.label_index
+
+    def add_stream(self, stream_id: Hashable):
+        """Adds a new audio stream with the given ID (replacing any existing stream with the same ID)"""
+        self.streams[stream_id] = _ModelStream(self.model)
+        return self.streams[stream_id]
+
+    def remove_stream(self, stream_id: Hashable):
+        """Removes the audio stream with the given ID"""
+        del self.streams[stream_id]
+
+    def reset(self, stream_id: Union[Hashable, None] = None):
+        """
+        Reset the prediction and audio feature buffers and the VAD state of the given stream,
+        or of all streams if no ID is provided
+        """
+        for i in ([stream_id] if stream_id is not None else self.streams.keys()):
+            _reset_stream(self.streams[i])
+
+    def snapshot(self, stream_id: Hashable):
+        """
+        Gets a copy of the state of an audio stream (see the `StreamState` class), which can be restored
+        with the `restore` method of this object, of another MultiStreamModel, or of a `Model` with the same models.
+
+        Args:
+            stream_id (Hashable): The ID of the stream
+
+        Returns:
+            StreamState: The state of the stream
+        """
+        return _snapshot_stream(self.streams[stream_id])
+
+    def restore(self, stream_id: Hashable, state: StreamState):
+        """
+        Restores the state of an audio stream from the `snapshot` method of this object, of another MultiStreamModel,
+        or of a `Model` with the same models, adding the stream if it doesn't exist.
+
+        Args:
+            stream_id (Hashable): The ID of the stream
+            state (StreamState): The state of the stream
+        """
+        if stream_id not in self.streams:
+            self.add_stream(stream_id)
+        _restore_stream(self.streams[stream_id], state)
+
+    def predict(self, x: Dict[Hashable, np.ndarray], patience: dict = {},
+                threshold: dict = {}, debounce_time: float = 0.0, sample_rate: int = 16000):
+        """Predict with all of the wakeword models on new audio frames from one or more streams
+
+        Args:
+            x (Dict[Hashable, ndarray]): A dictionary where the keys are stream IDs and the values are the new
+                                         audio data for each stream (see the `Model.predict` method for details).
+                                         Streams that haven't been added yet are created automatically.
+            patience (dict): See the `Model.predict` method
+            threshold (dict): See the `Model.predict` method
+            debounce_time (float): See the `Model.predict` method
+            sample_rate (int): The sample rate of the input audio of all of the streams (see the `Model.predict` method)
+
+        Returns:
+            dict: A dictionary where the keys are the stream IDs and the values are the prediction
+                  dictionaries for each stream, with the same format as from the `Model.predict` method.
+        """
+        out = np.zeros((len(x), len(self.labels)), dtype=np.float32)
+        self._predict(x, out, patience, threshold, debounce_time, sample_rate)
+        return {stream_id: dict(zip(self.labels, row)) for stream_id, row in zip(x.keys(), out)}
+
+    def _predict(self, x: Dict[Hashable, np.ndarray], out: np.ndarray, patience: dict, threshold: dict,
+                 debounce_time: float, sample_rate: int):
+        """
+        Predicts on new audio frames from one or more streams (see the `predict` method), writing the
+        predictions of each stream into the rows of the `out` array (in the same order as the keys of `x`)
+        """
+        # Add new audio data to the buffers of each stream
+        instrumentation = self.model.instrumentation
+        predict_start_ns = instrumentation.start()
+        n_prepared_samples = {}
+        x = dict(x)
+        for stream_id, audio in x.items():
+            stream = self.streams[stream_id] if stream_id in self.streams else self.add_stream(stream_id)
+            audio = stream.preprocessor._get_samples(audio)
+            if sample_rate != 16000:
+                resample_start_ns = instrumentation.start()
+                stream.resampler = _get_resampler(stream.resampler, sample_rate)
+                audio = stream.resampler(audio)
+                instrumentation.record("resample", resample_start_ns)
+            x[stream_id] = audio
+            if stream.speex_ns:
+                audio = self.model._suppress_noise_with_speex(audio, speex_ns=stream.speex_ns)
+            n_prepared_samples[stream_id] = stream.preprocessor._buffer_streaming_audio(audio)
+
+        # Compute features and model scores for all streams in batches
+        self._update_features([i for i in x.keys() if n_prepared_samples[i] != 0], n_prepared_samples)
+        for stream_id in x.keys():
+            if n_prepared_samples[stream_id] == 0:
+                n_prepared_samples[stream_id] = self.streams[stream_id].preprocessor.accumulated_samples
+        scores = self._get_model_scores(list(x.keys()), n_prepared_samples)
+
+        # Get the VAD scores of all streams, with one batch for streams with the same audio length
+        vad_stream_ids = [i for i in x.keys() if self.streams[i].vad is not None]
+        if vad_stream_ids:
+            vad_start_ns = instrumentation.start()
+            self.model.vad.update_streams([self.streams[i].vad for i in vad_stream_ids], [x[i] for i in vad_stream_ids])
+            instrumentation.record("vad", vad_start_ns)
+
+        # Get the predictions for each stream
+        for stream_id, predictions in zip(x.keys(), out):
+            stream = self.streams[stream_id]
+            get_features = self.model._get_feature_window_function(stream.preprocessor)
+            for mdl in self.model.models.keys():
+                self.model._update_predictions(mdl, scores[stream_id][mdl], predictions, stream.prediction_buffer, get_features)
+
+            self.model._apply_patience_and_debounce(predictions, stream.prediction_buffer, n_prepared_samples[stream_id],
+                                                    patience, threshold, debounce_time)
+
+            self.model._update_prediction_buffer(predictions, stream.prediction_buffer)
+
+            if stream.vad is not None:
+                self.model._apply_vad(predictions, stream.vad)
+
+        instrumentation.record("predict", predict_start_ns)
+        instrumentation.increment("predict_calls")
+        instrumentation.increment("frames", sum([n_prepared_samples[i]//1280 for i in x.keys()]))
+
+    def predict_array(self, x: Dict[Hashable, np.ndarray], out: Union[np.ndarray, None] = None, patience: dict = {},
+                      threshold: dict = {}, debounce_time: float = 0.0, sample_rate: int = 16000):
+        """
+        Predict with all of the wakeword models on new audio frames from one or more streams, writing the
+        predictions into a 2D float32 array instead of returning dictionaries (see the `Model.predict_array` method).
+
+        Args:
+            x (Dict[Hashable, ndarray]): The new audio data for each stream (see the `predict` method)
+            out (ndarray): A float32 array of shape streams x labels to write the predictions into, with the rows
+                           in the same order as the keys of `x` and the columns in the order of the `labels` attribute.
+                           If not provided, a new array is created.
+            patience (dict): See the `Model.predict` method
+            threshold (dict): See the `Model.predict` method
+            debounce_time (float): See the `Model.predict` method
+            sample_rate (int): The sample rate of the input audio of all of the streams (see the `Model.predict` method)
+
+        Returns:
+            ndarray: The `out` array (or the new array) with the predictions of each stream
+        """
+        out = _check_prediction_array(out, (len(x), len(self.labels)))
+        self._predict(x, out, patience, threshold, debounce_time, sample_rate)
+        return out
+
+    def _update_features(self, stream_ids: List[Hashable], n_prepared_samples: Dict[Hashable, int]):
+        """Computes the melspectrograms and embeddings of the new audio in each stream, in batches"""
+        preprocessor = self.model.preprocessor
+
+        # Compute melspectrograms, batching streams with the same number of new samples
+        groups = defaultdict(list)
+        for stream_id in stream_ids:
+            features = self.streams[stream_id].preprocessor
+            features.accumulated_samples -= n_prepared_samples[stream_id]
+            audio = features.raw_data_buffer.get_last(n_prepared_samples[stream_id] + 160*3, offset=features.accumulated_samples)
+            if audio.shape[0] < 400:
+                raise ValueError("The number of input frames must be at least 400 samples @ 16khz (25 ms)!")
+            groups[audio.shape[0]].append((features, audio))
+
+        for group in groups.values():
+            start_ns = preprocessor.instrumentation.start()
+            melspecs = preprocessor._get_melspectrogram(np.stack([audio for _, audio in group]))
+            for (features, _), melspec in zip(group, melspecs.reshape(len(group), -1, 32)):
+                features.melspectrogram_buffer.extend(melspec)
+            preprocessor.instrumentation.record("melspectrogram", start_ns)
+
+        # Compute embeddings for all of the new melspectrogram windows
+        windows = []
+        window_features = []
+        for stream_id in stream_ids:
+            features = self.streams[stream_id].preprocessor
+            for i in np.arange(n_prepared_samples[stream_id]//1280-1, -1, -1):
+                window = features.melspectrogram_buffer.get_last(76, offset=8*i)
+                if window.shape[0] == 76:
+                    windows.append(window)
+                    window_features.append(features)
+
+        if windows:
+            start_ns = preprocessor.instrumentation.start()
+            embeddings = preprocessor.embedding_model_predict(np.stack(windows)[:, :, :, None]).reshape(-1, 96)
+            for features, embedding in zip(window_features, embeddings):
+                features.feature_buffer.append(embedding)
+            preprocessor.instrumentation.record("embedding", start_ns)
+
+    def _get_model_scores(self, stream_ids: List[Hashable], n_prepared_samples: Dict[Hashable, int]):
+        """Gets the scores of each model for the new frames of each stream, in batches"""
+        scores: Dict[Hashable, Dict[str, np.ndarray]] = {i: {} for i in stream_ids}
+        batch_windows: Dict[int, Tuple[np.ndarray, List[Tuple[Hashable, int]]]] = {}
+        fused_outputs: Dict[Tuple[int, Hashable], dict] = {}
+        for mdl in self.model.models.keys():
+            for stream_id in stream_ids:
+                stream = self.streams[stream_id]
+                if n_prepared_samples[stream_id] < 1280:
+                    scores[stream_id][mdl] = self.model._get_model_scores(
+                        mdl, n_prepared_samples[stream_id], stream.prediction_buffer,
+                        self.model._get_feature_window_function(stream.preprocessor)
+                    )
+
+            # Stack the new feature windows of all streams once for each model input size
+            # (the windows of each stream are contiguous, starting at the recorded index)
+            n_frames = self.model.model_inputs[mdl]
+            if n_frames not in batch_windows:
+                stream_windows: List[np.ndarray] = []
+                window_starts = []
+                for stream_id in stream_ids:
+                    stream = self.streams[stream_id]
+                    if n_prepared_samples[stream_id] >= 1280:
+                        window_starts.append((stream_id, len(stream_windows)))
+                    for i in np.arange(n_prepared_samples[stream_id]//1280-1, -1, -1):
+                        stream_windows.append(stream.preprocessor.get_features(n_frames, start_ndx=-n_frames - i)[0])
+                batch_windows[n_frames] = (np.stack(stream_windows) if stream_windows else np.empty(0), window_starts)
+            windows, window_starts = batch_windows[n_frames]
+
+            if window_starts:
+                start_ns = self.model.instrumentation.start()
+                batch_scores = np.asarray(self.model._run_model(mdl, windows, fused_outputs, n_frames)[0])
+                self.model.instrumentation.record(mdl, start_ns)
+                stream_scores = np.maximum.reduceat(batch_scores, [start for _, start in window_starts], axis=0)
+                for (stream_id, _), stream_score in zip(window_starts, stream_scores):
+                    scores[stream_id][mdl] = stream_score
+
+        return scores
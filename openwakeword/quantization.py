@@ -0,0 +1,292 @@
+# Copyright 2022 David Scripka. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# This file contains functions for creating int8 (quantized) variants of the audio embedding model
+# and the wakeword models with onnxruntime, and for comparing them with the float models.
+# The variants are loaded with the `precision="int8"` argument of `openwakeword.Model`.
+# Requires the optional `onnx` package.
+
+# Imports
+import os
+import wave
+import numpy as np
+from typing import Dict, List, Optional, Union
+from openwakeword.model import Model
+from openwakeword.utils import get_int8_model_path
+from openwakeword.instrumentation import Instrumentation
+
+
+QUANTIZATION_METHODS = ["static", "dynamic"]
+
+
+def _load_clip(clip: Union[str, np.ndarray]):
+    """Loads a clip from a 16-bit PCM, 16 khz, single-channel WAV file, or returns an array clip unchanged"""
+    if isinstance(clip, str):
+        with wave.open(clip, mode='rb') as f:
+            return np.frombuffer(f.readframes(f.getnframes()), dtype=np.int16)
+    return clip
+
+
+def _select_windows(windows: np.ndarray, max_windows: int):
+    """Selects up to `max_windows` evenly spaced windows, so that the calibration data covers all of the clips"""
+    if windows.shape[0] <= max_windows:
+        return windows
+    return windows[np.linspace(0, windows.shape[0] - 1, max_windows).astype(int)]
+
+
+def get_calibration_data(model: Model, clips: List[Union[str, np.ndarray]], max_windows: int = 1000):
+    """
+    Gets the inputs of the audio embedding model and of each wakeword model for a set of audio clips,
+    to calibrate the static quantization of the models (see `quantize_model`).
+
+    Args:
+        model (Model): A float32 openWakeWord model with the "onnx" inference framework
+        clips (List[Union[str, np.ndarray]]): The paths of 16-bit PCM, 16 khz, single-channel WAV files,
+                                              or 1D arrays containing the same type of data. The clips should
+                                              be representative of the audio the models will be used with
+                                              (e.g., a mix of speech, wakewords, and background noise).
+        max_windows (int): The maximum number of input windows for each model (evenly spaced over all of the clips)
+
+    Returns:
+        dict: The input windows of the embedding model (with the key "embedding") and of each wakeword
+              model (with the model name as the key)
+    """
+    melspec_windows, embedding_windows = [], []
+    for clip in clips:
+        melspec = model.preprocessor._get_melspectrogram(_load_clip(clip))
+        windows = np.array([melspec[i:i+76] for i in range(0, melspec.shape[0] - 76 + 1, 8)], dtype=np.float32)
+        if windows.shape[0] == 0:
+            continue
+        melspec_windows.append(windows)
+        embedding_windows.append(model.preprocessor.embedding_model_predict(windows[..., None]).reshape(-1, 96))
+
+    if melspec_windows == []:
+        raise ValueError("The calibration clips are too short to compute any audio embeddings!")
+
+    calibration_data = {"embedding": _select_windows(np.concatenate(melspec_windows)[..., None], max_windows)}
+    for mdl_name, n_frames in model.model_inputs.items():
+        model_windows = [np.array([embeddings[i:i+n_frames] for i in range(0, embeddings.shape[0] - n_frames + 1)])
+                         for embeddings in embedding_windows if embeddings.shape[0] >= n_frames]
+        if model_windows == []:
+            raise ValueError(f"The calibration clips are too short for the model '{mdl_name}'!")
+        calibration_data[mdl_name] = _select_windows(np.concatenate(model_windows).astype(np.float32), max_windows)
+
+    return calibration_data
+
+
+def quantize_model(model_path: str, output_path: Optional[str] = None, method: str = "static",
+                   calibration_data: Optional[np.ndarray] = None):
+    """
+    Creates an int8 variant of an ONNX model with onnxruntime.
+
+    With the "static" method the weights (per output channel) and the activations are quantized, with
+    the ranges of the activations calibrated on the model inputs in `calibration_data`. With the "dynamic"
+    method only the weights are quantized, and the activations are quantized at run time. Dynamic quantization
+    doesn't need calibration data, but onnxruntime's integer convolutions are slower on many CPUs than its float
+    convolutions, so static quantization is usually better for the (convolutional) audio embedding model.
+
+    Args:
+        model_path (str): The path of the float ONNX model
+        output_path (str): The path of the int8 model. By default, the path used by the `precision="int8"`
+                           argument of `openwakeword.Model` (see `openwakeword.utils.get_int8_model_path`).
+        method (str): The quantization method, either "static" (the default) or "dynamic"
+        calibration_data (np.ndarray): The model inputs used to calibrate the static quantization, in shape
+                                       (windows, ...) where each window is one model input without the batch
+                                       dimension (see `get_calibration_data`)
+
+    Returns:
+        str: The path of the int8 model
+    """
+    import onnxruntime as ort
+    from onnxruntime.quantization import quantize_static, quantize_dynamic, QuantType, QuantFormat, CalibrationDataReader
+
+    if method not in QUANTIZATION_METHODS:
+        raise ValueError(f"The quantization method must be one of {QUANTIZATION_METHODS}, not '{method}'")
+    if method == "static" and (calibration_data is None or len(calibration_data) == 0):
+        raise ValueError("Static quantization requires calibration data!")
+
+    if output_path is None:
+        output_path = get_int8_model_path(model_path)
+
+    # Write to a temporary file first, so that a partially written model is never loaded
+    temporary_path = f"{output_path}.{os.getpid()}.tmp"
+    try:
+        if method == "dynamic":
+            quantize_dynamic(model_path, temporary_path, weight_type=QuantType.QInt8)
+        else:
+            input_name = ort.InferenceSession(model_path, providers=["CPUExecutionProvider"]).get_inputs()[0].name
+
+            class WindowReader(CalibrationDataReader):
+                def __init__(self, windows):
+                    self.windows = iter(windows)
+
+                def get_next(self):
+                    window = next(self.windows, None)
+                    return None if window is None else {input_name: window[None, ].astype(np.float32)}
+
+            quantize_static(model_path, temporary_path, WindowReader(calibration_data), quant_format=QuantFormat.QDQ,
+                            per_channel=True, weight_type=QuantType.QInt8, activation_type=QuantType.QUInt8)
+        os.replace(temporary_path, output_path)
+    finally:
+        if os.path.exists(temporary_path):
+            os.remove(temporary_path)
+
+    return output_path
+
+
+def quantize_models(clips: List[Union[str, np.ndarray]] = [], wakeword_models: List[str] = [], method: str = "static",
+                    quantize_embedding_model: bool = True, max_windows: int = 1000, **kwargs):
+    """
+    Creates the int8 variants of the audio embedding model and of wakeword models, next to the float models,
+    so that they are loaded by `openwakeword.Model` with the `precision="int8"` argument.
+
+    Args:
+        clips (List[Union[str, np.ndarray]]): The audio clips used to calibrate the static quantization
+                                              (see `get_calibration_data`). Not used by dynamic quantization.
+        wakeword_models (List[str]): The wakeword models to quantize (paths of ONNX models, or names of pre-trained
+                                     models), as in the `wakeword_models` argument of `openwakeword.Model`.
+                                     If not provided, all of the pre-trained models are quantized.
+        method (str): The quantization method, either "static" (the default) or "dynamic" (see `quantize_model`)
+        quantize_embedding_model (bool): Whether to quantize the audio embedding model, in addition to the wakeword models
+        max_windows (int): The maximum number of calibration windows for each model
+        kwargs (dict): Any other keyword arguments to pass to `openwakeword.Model` (e.g., `embedding_model_path`)
+
+    Returns:
+        dict: The paths of the int8 models, with the key "embedding" for the audio embedding model
+              and the model names as the keys for the wakeword models
+    """
+    model = Model(wakeword_models=list(wakeword_models), inference_framework="onnx", **kwargs)
+    calibration_data = get_calibration_data(model, clips, max_windows) if method == "static" else {}
+
+    int8_model_paths = {}
+    if quantize_embedding_model:
+        int8_model_paths["embedding"] = quantize_model(model.preprocessor.embedding_model_path, method=method,
+                                                       calibration_data=calibration_data.get("embedding", None))
+    for mdl_name, mdl_path in model.model_paths.items():
+        int8_model_paths[mdl_name] = quantize_model(mdl_path, method=method,
+                                                    calibration_data=calibration_data.get(mdl_name, None))
+
+    return int8_model_paths
+
+
+def _count_activations(scores: np.ndarray, threshold: float):
+    """Counts the number of times the scores rise above the threshold"""
+    above = np.concatenate(([False], scores >= threshold))
+    return int(np.sum(above[1:] & ~above[:-1]))
+
+
+def compare_precisions(positive_clips: Dict[str, List[Union[str, np.ndarray]]] = {},
+                       negative_clips: List[Union[str, np.ndarray]] = [], wakeword_models: List[str] = [],
+                       threshold: float = 0.5, n_timing_runs: int = 100, **kwargs):
+    """
+    Compares the int8 variants of the audio embedding model and wakeword models (see `quantize_models`)
+    with the float models, reporting:
+
+    - The latency of the embedding model and each wakeword model for one frame (80 ms) of streaming audio
+    - The differences between the float and int8 scores of each label, over the frames of all of the clips
+    - The false-reject counts: the number of positive clips of each label where no score reaches the threshold
+    - The false-accept counts: the number of times the score of each label rises above the threshold
+      in the negative clips
+
+    Args:
+        positive_clips (Dict[str, List[Union[str, np.ndarray]]]): The clips that contain each label
+                                                                  (as paths of 16-bit PCM, 16 khz, single-channel
+                                                                  WAV files, or 1D arrays with the same type of data)
+        negative_clips (List[Union[str, np.ndarray]]): Clips that don't contain any of the labels
+        wakeword_models (List[str]): The wakeword models to compare, as in the `wakeword_models` argument
+                                     of `openwakeword.Model`. If not provided, all of the pre-trained models are compared.
+        threshold (float): The score threshold for a detection
+        n_timing_runs (int): The number of times to run each model when measuring its latency
+        kwargs (dict): Any other keyword arguments to pass to `openwakeword.Model`
+
+    Returns:
+        dict: The comparison report, with the mean latencies in seconds ("latency"), the maximum and mean absolute
+              score differences ("score_difference"), the false-reject and false-accept counts for each precision
+              ("false_rejects" and "false_accepts"), the number of positive clips of each label ("positive_clips"),
+              and the duration of the negative clips in hours ("negative_hours")
+    """
+    if not all([isinstance(clips, list) for clips in positive_clips.values()]):
+        raise ValueError("The `positive_clips` argument must be a dictionary of lists of clips for each label!")
+
+    models = {precision: Model(wakeword_models=list(wakeword_models), inference_framework="onnx", precision=precision,
+                               **kwargs)
+              for precision in ["float32", "int8"]}
+    for label in positive_clips.keys():
+        if label not in models["float32"].label_index:
+            raise ValueError(f"The label '{label}' of the positive clips isn't predicted by the models!")
+
+    report: dict = {"latency": {}, "score_difference": {}, "false_rejects": {}, "false_accepts": {},
+                    "positive_clips": {label: len(clips) for label, clips in positive_clips.items()},
+                    "negative_hours": 0.0}
+
+    # Measure the latency of each model for one frame of streaming audio
+    rng = np.random.default_rng(0)
+    melspec_window = (rng.standard_normal((1, 76, 32, 1))*2 + 1).astype(np.float32)
+    for precision, model in models.items():
+        instrumentation = Instrumentation(enabled=True)
+        for _ in range(n_timing_runs):
+            start_ns = instrumentation.start()
+            model.preprocessor.embedding_model_predict(melspec_window)
+            instrumentation.record("embedding", start_ns)
+            for mdl_name, n_frames in model.model_inputs.items():
+                features = rng.standard_normal((1, n_frames, 96)).astype(np.float32)
+                start_ns = instrumentation.start()
+                model.model_prediction_function[mdl_name](features)
+                instrumentation.record(mdl_name, start_ns)
+        report["latency"][precision] = {stage: values["mean"]
+                                        for stage, values in instrumentation.summary(percentiles=[])["stages"].items()}
+
+    # Get the scores of all of the clips with both precisions (with the columns in the order of the `labels`
+    # attribute of each model, so they can be indexed with its `label_index` attribute)
+    def predict(clip):
+        scores = []
+        for model in models.values():
+            model.reset()
+            clip_scores = model.predict_clip(_load_clip(clip), offline=True, return_type="array")
+            if clip_scores.shape[1] != len(model.labels):
+                raise ValueError(f"The clip predictions have {clip_scores.shape[1]} columns, "
+                                 f"but the model predicts {len(model.labels)} labels!")
+            scores.append(clip_scores)
+        return scores
+
+    labels = models["float32"].labels
+    differences = []
+    for label in labels:
+        report["false_rejects"][label] = {"float32": 0, "int8": 0}
+        report["false_accepts"][label] = {"float32": 0, "int8": 0}
+
+    for label, clips in positive_clips.items():
+        for clip in clips:
+            scores = predict(clip)
+            differences.append(np.abs(scores[1] - scores[0]))
+            for precision, precision_scores in zip(models.keys(), scores):
+                if precision_scores[:, models[precision].label_index[label]].max(initial=0) < threshold:
+                    report["false_rejects"][label][precision] += 1
+
+    for clip in negative_clips:
+        scores = predict(clip)
+        differences.append(np.abs(scores[1] - scores[0]))
+        report["negative_hours"] += _load_clip(clip).shape[0]/16000/3600
+        for precision, precision_scores in zip(models.keys(), scores):
+            for ndx, label in enumerate(labels):
+                report["false_accepts"][label][precision] += _count_activations(precision_scores[:, ndx], threshold)
+
+    all_differences = np.concatenate(differences) if differences else np.zeros((0, len(labels)), dtype=np.float32)
+    for ndx, label in enumerate(labels):
+        report["score_difference"][label] = {
+            "max": float(all_differences[:, ndx].max(initial=0)),
+            "mean": float(all_differences[:, ndx].mean()) if all_differences.shape[0] > 0 else 0.0
+        }
+
+    return report
@@ -14,18 +14,557 @@
 
 # Imports
 import os
+import copy
+import functools
 import numpy as np
 import pathlib
-from collections import deque
-from multiprocessing.pool import ThreadPool
-from multiprocessing import Process, Queue
 import time
 import logging
-from tqdm import tqdm
+import threading
+import weakref
+import hashlib
+import platform
 import openwakeword
-from numpy.lib.format import open_memmap
-from typing import Union, List, Callable, Deque
-import requests
+from openwakeword.instrumentation import Instrumentation
+from typing import Union, List, Callable, Tuple, Hashable, Any, Optional
+
+
+# Process-wide registry of loaded models, so that objects loading the same model with the same settings share it
+class SharedSession():
+    """
+    A handle to a loaded ONNX inference session or tflite interpreter that is shared by all of the
+    openWakeWord objects that load the same model with the same settings. ONNX sessions can be used from
+    multiple threads at once, while tflite interpreters must only be used while holding the `lock` attribute.
+    The `info` attribute stores metadata that is the same for all users of the session (e.g., the current
+    input shape of a tflite interpreter), while any per-instance state must be kept by the users themselves.
+    """
+    def __init__(self, session: Any, info: dict = {}):
+        self.session = session
+        self.lock = threading.Lock()
+        self.info: dict = dict(info)
+
+
+_shared_sessions: weakref.WeakValueDictionary = weakref.WeakValueDictionary()
+_shared_sessions_lock = threading.Lock()
+
+
+def get_shared_session(key: Hashable, create_session: Callable[[], Any]):
+    """
+    Gets the shared handle for a loaded model, loading the model if it isn't already in use.
+    Models are unloaded once no objects hold a reference to their handle.
+
+    Args:
+        key (Hashable): A key that uniquely identifies the model and its settings (e.g., the model path,
+                        inference framework, number of threads, and any modifications of the model)
+        create_session (Callable): A function that loads the model and returns the session/interpreter object,
+                                   or a tuple of the session/interpreter and a dictionary of metadata
+                                   to store in the `info` attribute of the handle
+
+    Returns:
+        SharedSession: The shared handle for the model
+    """
+    with _shared_sessions_lock:
+        shared_session = _shared_sessions.get(key, None)
+        if shared_session is None:
+            session = create_session()
+            shared_session = SharedSession(*session) if isinstance(session, tuple) else SharedSession(session)
+            _shared_sessions[key] = shared_session
+        return shared_session
+
+
+def _get_onnx_melspectrogram_model(model_path: str):
+    """
+    Loads the ONNX melspectrogram model and changes the final clipping of the log-melspectrogram
+    (to 80 dB below the maximum value) to use the maximum value of each input row instead of the maximum
+    over the whole batch, so that the melspectrogram of each row doesn't depend on the other rows in the batch.
+    Requires the optional `onnx` package.
+
+    If the model is changed, the "rows_independent" key of its metadata is set to "1".
+
+    Returns:
+        Union[str, bytes]: The model (serialized bytes, or the unmodified path if it couldn't be changed)
+    """
+    try:
+        import onnx
+        from onnx import helper, numpy_helper
+    except ImportError:
+        return model_path
+
+    onnx_model = onnx.load(model_path)
+    output_clip = [i for i in onnx_model.graph.node if i.output[0] == onnx_model.graph.output[0].name]
+    reduce_max = [i for i in onnx_model.graph.node if i.op_type == "ReduceMax"]
+    if len(output_clip) != 1 or output_clip[0].op_type != "Clip" or len(reduce_max) != 1 \
+       or output_clip[0].input[0] != reduce_max[0].input[0] or len(output_clip[0].input) != 3:
+        return model_path
+    upper_bound = [i for i in onnx_model.graph.initializer if i.name == output_clip[0].input[2]]
+    if len(upper_bound) != 1 or not np.isposinf(numpy_helper.to_array(upper_bound[0])).all():
+        return model_path
+
+    # Reduce over all but the batch dimension, and clip with an elementwise maximum (as the Clip operator
+    # only supports scalar bounds, and the upper bound is infinite)
+    del reduce_max[0].attribute[:]
+    reduce_max[0].attribute.extend([helper.make_attribute("axes", [1, 2, 3]), helper.make_attribute("keepdims", 1)])
+    output_clip[0].op_type = "Max"
+    del output_clip[0].input[2:]
+    if all([upper_bound[0].name not in i.input for i in onnx_model.graph.node]):
+        onnx_model.graph.initializer.remove(upper_bound[0])
+    onnx_model.metadata_props.add(key="rows_independent", value="1")
+
+    return onnx_model.SerializeToString()
+
+
+ONNX_GRAPH_OPTIMIZATION_LEVELS = {
+    "disabled": "ORT_DISABLE_ALL",
+    "basic": "ORT_ENABLE_BASIC",
+    "extended": "ORT_ENABLE_EXTENDED",
+    "all": "ORT_ENABLE_ALL"
+}
+
+
+def create_onnx_session(model_paths: Union[str, List[str]],
+                        load_model: Optional[Callable[[], Union[str, bytes]]] = None,
+                        variant: str = "",
+                        n_threads: int = 1,
+                        providers: List[str] = ["CPUExecutionProvider"],
+                        graph_optimization_level: str = "all",
+                        cache_dir: Optional[str] = None
+                        ):
+    """
+    Creates an ONNX inference session, optionally using an on-disk cache of optimized models.
+
+    When a cache directory is provided, the graph optimized by onnxruntime is saved in that directory the
+    first time a model is loaded, and later sessions (in this or other processes) load the saved model
+    directly, without repeating any changes made to the model by `load_model` or the graph optimizations.
+    Cached models are identified by a hash of the contents of the model files, the `variant` argument,
+    the onnxruntime version, the graph optimization level, the execution providers, and the machine type.
+    Note that models optimized with the "all" level may contain optimizations for the specific hardware
+    where they were created, so the cache directory shouldn't be shared between different kinds of machines.
+
+    Args:
+        model_paths (Union[str, List[str]]): The path of the ONNX model, or the paths of all of the model
+                                             files that are used to create the model
+        load_model (Callable): A function that returns the model to load (a path, or serialized bytes).
+                               If not provided, the model at the (first) path is loaded.
+        variant (str): A name for any changes that `load_model` makes to the model, to distinguish the
+                       cached models for different changes of the same model files
+        n_threads (int): The number of threads to use for the session
+        providers (List[str]): The onnxruntime execution providers to use for the session
+        graph_optimization_level (str): The level of graph optimizations made by onnxruntime, one of
+                                        "disabled", "basic", "extended", or "all" (the default)
+        cache_dir (str): The directory where optimized models are cached. If not provided (the default),
+                         no caching is done.
+
+    Returns:
+        onnxruntime.InferenceSession: The inference session for the model
+    """
+    import onnxruntime as ort
+
+    if graph_optimization_level not in ONNX_GRAPH_OPTIMIZATION_LEVELS:
+        raise ValueError(f"The graph optimization level must be one of {list(ONNX_GRAPH_OPTIMIZATION_LEVELS.keys())}, "
+                         f"not '{graph_optimization_level}'")
+
+    model_paths = [model_paths] if isinstance(model_paths, str) else list(model_paths)
+    if load_model is None:
+        load_model = lambda: model_paths[0]  # noqa: E731
+
+    def get_session_options(optimization_level):
+        sessionOptions = ort.SessionOptions()
+        sessionOptions.inter_op_num_threads = n_threads
+        sessionOptions.intra_op_num_threads = n_threads
+        sessionOptions.graph_optimization_level = getattr(
+            ort.GraphOptimizationLevel, ONNX_GRAPH_OPTIMIZATION_LEVELS[optimization_level]
+        )
+        return sessionOptions
+
+    if cache_dir is None:
+        return ort.InferenceSession(load_model(), sess_options=get_session_options(graph_optimization_level),
+                                    providers=providers)
+
+    # Load the cached optimized model, if it exists (the graph is already optimized, so optimizations are disabled)
+    cache_key = hashlib.sha256()
+    for model_path in model_paths:
+        with open(model_path, 'rb') as f:
+            cache_key.update(f.read())
+    for i in [variant, ort.__version__, graph_optimization_level, ",".join(providers), platform.machine()]:
+        cache_key.update(i.encode() + b"\0")
+    model_name = os.path.splitext(os.path.basename(model_paths[0]))[0]
+    cached_model_path = os.path.join(cache_dir, f"{model_name}_{cache_key.hexdigest()[0:16]}.onnx")
+
+    if os.path.exists(cached_model_path):
+        try:
+            return ort.InferenceSession(cached_model_path, sess_options=get_session_options("disabled"), providers=providers)
+        except Exception as e:
+            logging.warning(f"Could not load the cached optimized model '{cached_model_path}', so it will be recreated: {e}")
+
+    # Optimize the model and save it to the cache (writing to a temporary file first, so that
+    # other processes never load a partially written model)
+    model = load_model()
+    temporary_path = f"{cached_model_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        sessionOptions = get_session_options(graph_optimization_level)
+        sessionOptions.optimized_model_filepath = temporary_path
+        sessionOptions.log_severity_level = 3  # silence the warning about hardware-specific optimizations
+        session = ort.InferenceSession(model, sess_options=sessionOptions, providers=providers)
+        os.replace(temporary_path, cached_model_path)
+        return session
+    except Exception as e:
+        if os.path.exists(temporary_path):
+            os.remove(temporary_path)
+        logging.warning(f"Could not cache the optimized model in '{cache_dir}', so it will be loaded without caching: {e}")
+        return ort.InferenceSession(model, sess_options=get_session_options(graph_optimization_level), providers=providers)
+
+
+# Model precisions, and the suffix of the model files for each reduced precision
+MODEL_PRECISIONS = {"float32": "", "int8": "_int8"}
+
+
+def get_int8_model_path(model_path: str):
+    """
+    Gets the path of the int8 (quantized) variant of an ONNX model, which is stored next to the
+    float model with an "_int8" suffix (e.g., "alexa_v0.1_int8.onnx" for "alexa_v0.1.onnx").
+    The variants are created with `openwakeword.quantization.quantize_models`.
+
+    Args:
+        model_path (str): The path of the float ONNX model
+
+    Returns:
+        str: The path of the int8 variant of the model
+    """
+    root, _ = os.path.splitext(model_path)
+    if root.endswith(MODEL_PRECISIONS["int8"]):
+        return root + ".onnx"
+    return root + MODEL_PRECISIONS["int8"] + ".onnx"
+
+
+def _get_model_path_for_precision(model_path: str, precision: str):
+    """
+    Gets the path of the variant of an ONNX model for a precision (see the `precision` argument of
+    `AudioFeatures`), checking that the variant exists.
+    """
+    if precision not in MODEL_PRECISIONS:
+        raise ValueError(f"The precision must be one of {list(MODEL_PRECISIONS.keys())}, not '{precision}'")
+    if precision == "float32":
+        return model_path
+
+    variant_path = get_int8_model_path(model_path)
+    if not os.path.exists(variant_path):
+        raise ValueError(f"The {precision} variant of the model '{model_path}' was not found at '{variant_path}'. "
+                         "It can be created with `openwakeword.quantization.quantize_models`.")
+    return variant_path
+
+
+# Fixed-capacity circular buffer for streaming audio data and features
+class RingBuffer():
+    """
+    A fixed-capacity circular buffer backed by a single preallocated Numpy array.
+
+    The underlying storage is mirrored (every item is written twice, `capacity` positions apart),
+    so that the most recent N items are always contiguous in memory and can be returned as a
+    zero-copy view. Note that views returned by `get_last` are only valid until `capacity - N`
+    more items have been written to the buffer, so make a copy if the data needs to be kept.
+    """
+    def __init__(self, capacity: int, item_shape: Tuple[int, ...] = (), dtype: type = np.int16):
+        """
+        Initialize the RingBuffer object.
+
+        Args:
+            capacity (int): The maximum number of items stored in the buffer
+            item_shape (Tuple[int, ...]): The shape of each item (default is a scalar, e.g. one audio sample)
+            dtype (type): The Numpy data type of the buffer
+        """
+        self.capacity = int(capacity)
+        self.item_shape = tuple(item_shape)
+        self.dtype: np.dtype = np.dtype(dtype)
+        self._data = np.zeros((2*self.capacity,) + self.item_shape, dtype=self.dtype)
+        self._end = 0  # the storage index one past the most recent item (in the first half)
+        self._len = 0
+
+    def __len__(self):
+        return self._len
+
+    def __array__(self, dtype=None, copy=None):
+        data = self.get_last(self._len)
+        return data.astype(dtype) if dtype is not None else data.copy()
+
+    def __iter__(self):
+        return iter(self.get_last(self._len))
+
+    def clear(self):
+        """Remove all items from the buffer (without releasing the underlying memory)"""
+        self._end = 0
+        self._len = 0
+
+    def extend(self, x: np.ndarray):
+        """
+        Add items to the end of the buffer, overwriting the oldest items once the buffer is full.
+
+        Args:
+            x (np.ndarray): The items to add, with shape (N,) + `item_shape`
+        """
+        x = np.asarray(x, dtype=self.dtype)
+        n = x.shape[0]
+        if n > self.capacity:
+            x = x[-self.capacity:]
+            n = self.capacity
+
+        first = min(n, self.capacity - self._end)
+        self._data[self._end:self._end + first] = x[0:first]
+        self._data[self._end + self.capacity:self._end + self.capacity + first] = x[0:first]
+        if n > first:
+            self._data[0:n - first] = x[first:]
+            self._data[self.capacity:self.capacity + n - first] = x[first:]
+
+        self._end = (self._end + n) % self.capacity
+        self._len = min(self._len + n, self.capacity)
+
+    def append(self, x: np.ndarray):
+        """Add a single item to the end of the buffer"""
+        self.extend(np.asarray(x, dtype=self.dtype)[None, ])
+
+    def get_last(self, n: int, offset: int = 0):
+        """
+        Get a zero-copy view of the most recent items in the buffer.
+
+        Args:
+            n (int): The number of items to return. If fewer items are stored,
+                     all of the available items are returned.
+            offset (int): How many of the most recent items to skip (e.g., `n=16, offset=1`
+                          returns the 16 items preceding the newest item).
+
+        Returns:
+            np.ndarray: A view of shape (n,) + `item_shape` ordered from oldest to newest
+        """
+        offset = min(max(int(offset), 0), self._len)
+        n = min(max(int(n), 0), self._len - offset)
+        stop = self._end + self.capacity - offset
+        return self._data[stop - n:stop]
+
+
+@functools.lru_cache(maxsize=None)
+def _get_polyphase_filters(up: int, down: int, taps_per_rate: int = 10, kaiser_beta: float = 5.0):
+    """
+    Designs the lowpass filter for resampling by a rational factor `up`/`down` (a Kaiser-windowed sinc, with
+    the same design as `scipy.signal.resample_poly`) and splits it into `up` polyphase filters. The filters
+    are cached, so they are only designed once per pair of sample rates.
+
+    Returns:
+        np.ndarray: A float32 array of shape (up, taps), where row p is the filter for output phase p
+                    with the taps in reverse order (so that they apply to input samples ordered oldest first)
+    """
+    max_rate = max(up, down)
+    n_taps = 2*taps_per_rate*max_rate + 1
+    n = np.arange(n_taps) - (n_taps - 1)/2
+    h = np.sinc(n/max_rate)*np.kaiser(n_taps, kaiser_beta)
+    h = h/h.sum()*up
+
+    # Pad the filter to a multiple of `up` taps, and arrange it as h[p + j*up] for phase p and tap j
+    h = np.concatenate((h, np.zeros(-n_taps % up)))
+    return np.ascontiguousarray(h.reshape(-1, up).T[:, ::-1]).astype(np.float32)
+
+
+class StreamingResampler():
+    """
+    Resamples a stream of audio to another sample rate (e.g., 44.1 khz, 48 khz, 22.05 khz, or 8 khz to 16 khz)
+    with a polyphase filter. The filters are designed once per pair of sample rates and shared by all
+    objects, while each object keeps the filter history of its own stream, so that consecutive chunks of
+    audio are resampled without artifacts at the chunk boundaries. The output has a delay of about
+    0.6 ms relative to the input (half of the filter length).
+
+    Example:
+        resampler = StreamingResampler(48000)
+        for chunk in audio_chunks:
+            audio_16khz = resampler(chunk)
+    """
+    def __init__(self, input_rate: int, output_rate: int = 16000):
+        """
+        Initialize the StreamingResampler object.
+
+        Args:
+            input_rate (int): The sample rate of the input audio
+            output_rate (int): The sample rate of the output audio
+        """
+        if input_rate <= 0 or output_rate <= 0:
+            raise ValueError("The sample rates must be positive integers!")
+        self.input_rate = int(input_rate)
+        self.output_rate = int(output_rate)
+        gcd = np.gcd(self.input_rate, self.output_rate)
+        self.up = self.output_rate//gcd
+        self.down = self.input_rate//gcd
+        self.filters = _get_polyphase_filters(self.up, self.down)
+        self.reset()
+
+    def reset(self):
+        """Clears the filter history, to start resampling a new stream"""
+        self.history = np.zeros(self.filters.shape[1] - 1, dtype=np.float32)
+        self.n_input = 0  # the number of input samples received (modulo `down`)
+        self.n_output = 0  # the number of output samples returned (modulo `up`)
+
+    def snapshot(self):
+        """
+        Gets a copy of the stream state of this object (the sample rates and filter history).
+
+        Returns:
+            dict: The state, as Numpy arrays and integers (see `restore`)
+        """
+        return {"input_rate": self.input_rate, "output_rate": self.output_rate,
+                "history": self.history.copy(), "n_input": self.n_input, "n_output": self.n_output}
+
+    def restore(self, state: dict):
+        """
+        Restores the stream state from `snapshot`, which must be for the same sample rates.
+
+        Args:
+            state (dict): The state from `snapshot`
+        """
+        if int(state["input_rate"]) != self.input_rate or int(state["output_rate"]) != self.output_rate:
+            raise ValueError("The state is for a resampler with different sample rates!")
+        self.history = np.array(state["history"], dtype=np.float32)
+        self.n_input = int(state["n_input"])
+        self.n_output = int(state["n_output"])
+
+    def __call__(self, x: np.ndarray) -> np.ndarray:
+        """
+        Resamples the next chunk of audio in the stream.
+
+        Args:
+            x (np.ndarray): The 16-bit PCM audio at the input sample rate
+
+        Returns:
+            np.ndarray: The 16-bit PCM audio at the output sample rate (all of the output samples
+                        that only depend on the input audio received so far)
+        """
+        if self.up == self.down:
+            return x
+
+        n_taps = self.filters.shape[1]
+        audio = np.concatenate((self.history, np.asarray(x, dtype=np.float32)))
+        self.n_input += x.shape[0]
+
+        # Output sample k is at position k*down of the upsampled signal, and depends on the input
+        # samples up to (k*down)//up, with the polyphase filter (k*down) % up
+        n_stop = (self.n_input*self.up - 1)//self.down + 1
+        positions = np.arange(self.n_output, n_stop)*self.down
+        window_ndcs = positions//self.up - (self.n_input - audio.shape[0]) - (n_taps - 1)
+        windows = np.lib.stride_tricks.sliding_window_view(audio, n_taps)[window_ndcs]
+        y = np.einsum("ij,ij->i", windows, self.filters[positions % self.up])
+
+        self.n_output = n_stop
+        self.history = audio[audio.shape[0] - (n_taps - 1):]
+
+        # Keep the counters small, as every `down` input samples produce exactly `up` output samples
+        n_periods = min(self.n_input//self.down, self.n_output//self.up)
+        self.n_input -= n_periods*self.down
+        self.n_output -= n_periods*self.up
+
+        return np.clip(np.round(y), -32768, 32767).astype(np.int16)
+
+
+def _hz_to_mel(f: np.ndarray):
+    """Converts frequencies in Hz to the Slaney mel scale (linear below 1 kHz and logarithmic above)"""
+    return np.where(f >= 1000, 15 + np.log(np.maximum(f, 1000)/1000)/(np.log(6.4)/27), f/(200/3))
+
+
+def _mel_to_hz(m: np.ndarray):
+    """Converts Slaney mel scale values to frequencies in Hz (the inverse of `_hz_to_mel`)"""
+    return np.where(m >= 15, 1000*np.exp(np.log(6.4)/27*(m - 15)), m*200/3)
+
+
+@functools.lru_cache(maxsize=None)
+def _get_mel_filterbank(sr: int = 16000, n_fft: int = 512, n_mels: int = 32, fmin: float = 60.0, fmax: float = 3800.0):
+    """
+    Creates a mel filterbank of triangular filters that are evenly spaced on the Slaney mel scale and normalized
+    to a constant energy per filter (the same design as `librosa.filters.mel`, which is used by the melspectrogram model).
+    The filterbank is cached, so it is only created once.
+
+    Returns:
+        np.ndarray: A float64 array of shape (n_fft//2 + 1, n_mels), which maps power spectra to mel spectra
+    """
+    fft_freqs = np.linspace(0, sr/2, n_fft//2 + 1)
+    mel_freqs = _mel_to_hz(np.linspace(_hz_to_mel(np.array(fmin)), _hz_to_mel(np.array(fmax)), n_mels + 2))
+    ramps = mel_freqs[:, None] - fft_freqs[None, :]
+    widths = np.diff(mel_freqs)[:, None]
+    filters = np.maximum(0, np.minimum(-ramps[0:-2]/widths[0:-1], ramps[2:]/widths[1:]))
+    return (filters*(2/(mel_freqs[2:] - mel_freqs[0:-2]))[:, None]).T
+
+
+class NumpyMelspectrogram():
+    """
+    Calculates the same log-melspectrogram as the `melspectrogram.onnx` model with Numpy, without an inference
+    framework: the power spectra of 512 sample frames (a 400 sample Hann window in the middle of each frame) with
+    a hop of 160 samples, mapped to 32 mel bands between 60 Hz and 3800 Hz, in dB and clipped to at most 80 dB below
+    the maximum value. The window, the filterbank, and the range of FFT bins used by the filterbank are computed once.
+
+    The model clips each input to 80 dB below the maximum value of the whole input, so its output for a frame
+    depends on the length and contents of the rest of the input (which is why streaming and whole-clip melspectrograms
+    of the same audio are slightly different). Here each frame is clipped relative to its own maximum value instead,
+    so the melspectrogram of a frame is the same however the audio is split into inputs. This is identical to the model
+    for single frame inputs, and otherwise only changes the values of mel bands that are more than 80 dB below the
+    maximum of the model input (e.g., in frames of digital silence next to louder audio).
+    """
+    def __init__(self, sr: int = 16000, n_fft: int = 512, win_length: int = 400, hop_length: int = 160,
+                 n_mels: int = 32, fmin: float = 60.0, fmax: float = 3800.0, top_db: float = 80.0):
+        """
+        Initialize the NumpyMelspectrogram object. The defaults are the settings of the `melspectrogram.onnx` model.
+
+        Args:
+            sr (int): The sample rate of the audio
+            n_fft (int): The number of samples in each frame
+            win_length (int): The length of the Hann window in the middle of each frame
+            hop_length (int): The number of samples between the starts of consecutive frames
+            n_mels (int): The number of mel bands
+            fmin (float): The lowest frequency of the mel bands, in Hz
+            fmax (float): The highest frequency of the mel bands, in Hz
+            top_db (float): The maximum difference (in dB) between the largest value of a frame and its other values
+        """
+        self.n_fft = n_fft
+        self.hop_length = hop_length
+        self.top_db = top_db
+
+        # The window is zero outside of its middle `win_length` samples
+        self.window = np.zeros(n_fft)
+        offset = (n_fft - win_length)//2
+        self.window[offset:offset + win_length] = 0.5 - 0.5*np.cos(2*np.pi*np.arange(win_length)/win_length)
+
+        # Only the FFT bins with nonzero filterbank weights are used
+        filterbank = _get_mel_filterbank(sr, n_fft, n_mels, fmin, fmax)
+        used_bins = np.nonzero(filterbank.sum(axis=1))[0]
+        self.bins = slice(used_bins[0], used_bins[-1] + 1)
+        self.filterbank = np.ascontiguousarray(filterbank[self.bins])
+
+    def __call__(self, x: np.ndarray) -> np.ndarray:
+        """
+        Calculates the log-melspectrogram of audio.
+
+        Args:
+            x (np.ndarray): The audio, in shape (batch, samples) and with the scale of 16-bit PCM audio
+
+        Returns:
+            np.ndarray: The float32 log-melspectrogram of each row of `x` (without the `x/10 + 2` transform applied by
+                        `AudioFeatures._get_melspectrogram`), in shape (batch, (samples - n_fft)//hop_length + 1, n_mels)
+        """
+        x = np.asarray(x)
+        if x.shape[-1] < self.n_fft:
+            return np.zeros((x.shape[0], 0, self.filterbank.shape[1]), dtype=np.float32)
+
+        frames = np.lib.stride_tricks.sliding_window_view(x, self.n_fft, axis=-1)[..., ::self.hop_length, :]
+        spectra = np.fft.rfft(frames*self.window, axis=-1)[..., self.bins]
+        power = spectra.real**2 + spectra.imag**2
+        melspec = 10*np.log10(np.maximum(power @ self.filterbank, 1e-10))
+        return np.maximum(melspec, melspec.max(axis=-1, keepdims=True) - self.top_db).astype(np.float32)
+
+
+# The features that the feature buffer of a new or reset stream starts with: the embeddings of 4 seconds of
+# uniform noise in [-1000, 1000) from `np.random.default_rng(0)`, calculated with the default ONNX models
+WARM_START_FEATURES_PATH = os.path.join(pathlib.Path(__file__).parent.resolve(), "resources", "warm_start_features.npy")
+
+
+@functools.lru_cache(maxsize=None)
+def _load_warm_start_features():
+    """Loads the (read-only) warm-start features, which are cached so that they are only loaded once"""
+    features = np.load(WARM_START_FEATURES_PATH, allow_pickle=False).astype(np.float32)
+    features.flags.writeable = False
+    return features
 
 
 # Base class for computing audio features using Google's speech_embedding
@@ -41,7 +580,11 @@ class AudioFeatures():
                  sr: int = 16000,
                  ncpu: int = 1,
                  inference_framework: str = "onnx",
-                 device: str = 'cpu'
+                 device: str = 'cpu',
+                 onnx_graph_optimization_level: str = "all",
+                 onnx_cache_dir: Optional[str] = None,
+                 precision: str = "float32",
+                 melspec_implementation: str = "model"
                  ):
         """
         Initialize the AudioFeatures object.
@@ -59,11 +602,33 @@ class AudioFeatures():
                           Note that depending on the inference framework selected and system configuration,
                           this setting may not have an effect. For example, to use a GPU with the ONNX
                           framework the appropriate onnxruntime package must be installed.
+            onnx_graph_optimization_level (str): The level of graph optimizations made by onnxruntime when
+                                                 loading ONNX models, one of "disabled", "basic", "extended",
+                                                 or "all" (the default).
+            onnx_cache_dir (str): A directory where ONNX models optimized by onnxruntime are cached, so that
+                                  later processes can load them without optimizing them again (see
+                                  `openwakeword.utils.create_onnx_session`). If not provided (the default),
+                                  no caching is done.
+            precision (str): The precision of the embedding model, either "float32" (the default) or "int8"
+                             to use the quantized variant of the embedding model (see `get_int8_model_path`),
+                             which is faster on many CPUs but gives slightly different features. The melspectrogram
+                             model is always run in float32. The int8 precision is only supported with the
+                             "onnx" inference framework.
+            melspec_implementation (str): How the melspectrogram is calculated, either "model" (the default) to run the
+                                          melspectrogram model with the inference framework, or "numpy" to calculate it
+                                          with Numpy (see `NumpyMelspectrogram`), which is faster for short inputs and
+                                          gives the same melspectrogram for each frame however the audio is split into
+                                          calls (but slightly different values than the model in very quiet frames).
         """
+        if precision not in MODEL_PRECISIONS:
+            raise ValueError(f"The precision must be one of {list(MODEL_PRECISIONS.keys())}, not '{precision}'")
+        if melspec_implementation not in ["model", "numpy"]:
+            raise ValueError(f"The melspectrogram implementation must be 'model' or 'numpy', not '{melspec_implementation}'")
+
         # Initialize the models with the appropriate framework
         if inference_framework == "onnx":
             try:
-                import onnxruntime as ort
+                import onnxruntime  # noqa: F401
             except ImportError:
                 raise ValueError("Tried to import onnxruntime, but it was not found. Please install it using `pip install onnxruntime`")
 
@@ -74,23 +639,44 @@ class AudioFeatures():
 
             if ".tflite" in melspec_model_path or ".tflite" in embedding_model_path:
                 raise ValueError("The onnx inference framework is selected, but tflite models were provided!")
+            embedding_model_path = _get_model_path_for_precision(embedding_model_path, precision)
 
             # Initialize ONNX options
-            sessionOptions = ort.SessionOptions()
-            sessionOptions.inter_op_num_threads = ncpu
-            sessionOptions.intra_op_num_threads = ncpu
-
-            # Melspectrogram model
-            self.melspec_model = ort.InferenceSession(melspec_model_path, sess_options=sessionOptions,
-                                                      providers=["CUDAExecutionProvider"] if device == "gpu" else ["CPUExecutionProvider"])
-            self.onnx_execution_provider = self.melspec_model.get_providers()[0]
-            self.melspec_model_predict = lambda x: self.melspec_model.run(None, {'input': x})
-
-            # Audio embedding model
-            self.embedding_model = ort.InferenceSession(embedding_model_path, sess_options=sessionOptions,
-                                                        providers=["CUDAExecutionProvider"] if device == "gpu"
-                                                        else ["CPUExecutionProvider"])
+            providers = ["CUDAExecutionProvider"] if device == "gpu" else ["CPUExecutionProvider"]
+            session_kwargs: dict = dict(n_threads=ncpu, providers=providers, graph_optimization_level=onnx_graph_optimization_level,
+                                        cache_dir=onnx_cache_dir)
+
+            # Melspectrogram model (shared with other objects that load the same model), unless it's calculated with Numpy
+            if melspec_implementation == "model":
+                def create_melspec_session():
+                    melspec_session = create_onnx_session(
+                        melspec_model_path, lambda: _get_onnx_melspectrogram_model(melspec_model_path),
+                        variant="rows_independent", **session_kwargs
+                    )
+                    rows_independent = melspec_session.get_modelmeta().custom_metadata_map.get("rows_independent", "") == "1"
+                    return melspec_session, {"rows_independent": rows_independent}
+
+                self.melspec_shared_session = get_shared_session(
+                    ("onnx", os.path.abspath(melspec_model_path), "melspectrogram", ncpu, device, onnx_graph_optimization_level),
+                    create_melspec_session
+                )
+                self.melspec_model = self.melspec_shared_session.session
+
+                def onnx_melspec_predict(x):
+                    if x.shape[0] != 1 and not self.melspec_shared_session.info["rows_independent"]:  # predict on each row separately
+                        return [np.concatenate([onnx_melspec_predict(i[None, ])[0] for i in x])]
+                    return self.melspec_model.run(None, {'input': x})
+
+                self.melspec_model_predict = onnx_melspec_predict
+
+            # Audio embedding model (shared with other objects that load the same model)
+            self.embedding_shared_session = get_shared_session(
+                ("onnx", os.path.abspath(embedding_model_path), ncpu, device, onnx_graph_optimization_level),
+                lambda: create_onnx_session(embedding_model_path, **session_kwargs)
+            )
+            self.embedding_model = self.embedding_shared_session.session
             self.embedding_model_predict = lambda x: self.embedding_model.run(None, {'input_1': x})[0].squeeze()
+            self.onnx_execution_provider = self.embedding_model.get_providers()[0]
 
         elif inference_framework == "tflite":
             try:
@@ -108,74 +694,158 @@ class AudioFeatures():
 
             if ".onnx" in melspec_model_path or ".onnx" in embedding_model_path:
                 raise ValueError("The tflite inference framework is selected, but onnx models were provided!")
-
-            # Melspectrogram model
-            self.melspec_model = tflite.Interpreter(model_path=melspec_model_path, num_threads=ncpu)
-            self.melspec_model.resize_tensor_input(0, [1, 1280], strict=True)  # initialize with fixed input size
-            self.melspec_model.allocate_tensors()
-
-            melspec_input_index = self.melspec_model.get_input_details()[0]['index']
-            melspec_output_index = self.melspec_model.get_output_details()[0]['index']
-
-            self._tflite_current_melspec_input_size = 1280
-
-            def tflite_melspec_predict(x):
-                if x.shape[1] != 1280:
-                    self.melspec_model.resize_tensor_input(0, [1, x.shape[1]], strict=True)  # initialize with fixed input size
-                    self.melspec_model.allocate_tensors()
-                    self._tflite_current_melspec_input_size = x.shape[1]
-                elif self._tflite_current_melspec_input_size != 1280:
-                    self.melspec_model.resize_tensor_input(0, [1, 1280], strict=True)  # initialize with fixed input size
-                    self.melspec_model.allocate_tensors()
-                    self._tflite_current_melspec_input_size = 1280
-
-                self.melspec_model.set_tensor(melspec_input_index, x)
-                self.melspec_model.invoke()
-                return self.melspec_model.get_tensor(melspec_output_index)
-
-            self.melspec_model_predict = tflite_melspec_predict
-
-            # Audio embedding model
-            self.embedding_model = tflite.Interpreter(model_path=embedding_model_path, num_threads=ncpu)
-            self.embedding_model.allocate_tensors()
+            if precision != "float32":
+                raise ValueError(f"The {precision} precision is only supported with the onnx inference framework!")
+
+            # Melspectrogram model (shared with other objects that load the same model), unless it's calculated with Numpy
+            if melspec_implementation == "model":
+                def create_melspec_interpreter():
+                    melspec_interpreter = tflite.Interpreter(model_path=melspec_model_path, num_threads=ncpu)
+                    melspec_interpreter.resize_tensor_input(0, [1, 1280], strict=True)  # initialize with fixed input size
+                    melspec_interpreter.allocate_tensors()
+                    return melspec_interpreter, {"input_shape": (1, 1280)}
+
+                self.melspec_shared_session = get_shared_session(
+                    ("tflite", os.path.abspath(melspec_model_path), ncpu), create_melspec_interpreter
+                )
+                self.melspec_model = self.melspec_shared_session.session
+
+                melspec_input_index = self.melspec_model.get_input_details()[0]['index']
+                melspec_output_index = self.melspec_model.get_output_details()[0]['index']
+
+                def tflite_melspec_predict(x):
+                    if x.shape[0] != 1:  # the tflite melspectrogram model only supports a batch size of 1
+                        return np.concatenate([tflite_melspec_predict(i[None, ]) for i in x], axis=1)
+
+                    with self.melspec_shared_session.lock:
+                        if x.shape != self.melspec_shared_session.info["input_shape"]:  # only resize when the input shape changes
+                            self.melspec_model.resize_tensor_input(0, list(x.shape), strict=True)
+                            self.melspec_model.allocate_tensors()
+                            self.melspec_shared_session.info["input_shape"] = x.shape
+
+                        self.melspec_model.set_tensor(melspec_input_index, x)
+                        self.melspec_model.invoke()
+                        return self.melspec_model.get_tensor(melspec_output_index)
+
+                self.melspec_model_predict = tflite_melspec_predict
+
+            # Audio embedding model (shared with other objects that load the same model)
+            def create_embedding_interpreter():
+                embedding_interpreter = tflite.Interpreter(model_path=embedding_model_path, num_threads=ncpu)
+                embedding_interpreter.allocate_tensors()
+                return embedding_interpreter, {"batch_size": 1}
+
+            self.embedding_shared_session = get_shared_session(
+                ("tflite", os.path.abspath(embedding_model_path), ncpu), create_embedding_interpreter
+            )
+            self.embedding_model = self.embedding_shared_session.session
 
             embedding_input_index = self.embedding_model.get_input_details()[0]['index']
             embedding_output_index = self.embedding_model.get_output_details()[0]['index']
 
-            self._tflite_current_embedding_batch_size = 1
-
             def tflite_embedding_predict(x):
-                if x.shape[0] != 1:
-                    self.embedding_model.resize_tensor_input(0, [x.shape[0], 76, 32, 1], strict=True)  # initialize with fixed input size
-                    self.embedding_model.allocate_tensors()
-                    self._tflite_current_embedding_batch_size = x.shape[0]
-                elif self._tflite_current_embedding_batch_size != 1:
-                    self.embedding_model.resize_tensor_input(0, [1, 76, 32, 1], strict=True)  # initialize with fixed input size
-                    self.embedding_model.allocate_tensors()
-                    self._tflite_current_embedding_batch_size = x.shape[0]
-
-                self.embedding_model.set_tensor(embedding_input_index, x)
-                self.embedding_model.invoke()
-                return self.embedding_model.get_tensor(embedding_output_index).squeeze()
+                with self.embedding_shared_session.lock:
+                    if x.shape[0] != self.embedding_shared_session.info["batch_size"]:  # only resize when the batch size changes
+                        self.embedding_model.resize_tensor_input(0, [x.shape[0], 76, 32, 1], strict=True)
+                        self.embedding_model.allocate_tensors()
+                        self.embedding_shared_session.info["batch_size"] = x.shape[0]
+
+                    self.embedding_model.set_tensor(embedding_input_index, x)
+                    self.embedding_model.invoke()
+                    return self.embedding_model.get_tensor(embedding_output_index).squeeze()
 
             self.embedding_model_predict = tflite_embedding_predict
 
+        if melspec_implementation == "numpy":
+            numpy_melspectrogram = NumpyMelspectrogram()
+            self.melspec_model = None
+            self.melspec_model_predict = lambda x: [numpy_melspectrogram(x)[:, None]]
+
+        self.melspec_model_path = melspec_model_path
+        self.embedding_model_path = embedding_model_path
+        self.precision = precision
+        self.melspec_implementation = melspec_implementation
+
+        # Create the (disabled) latency instrumentation, which can be replaced with a shared, enabled object
+        self.instrumentation = Instrumentation()
+
         # Create databuffers with empty/random data
-        self.raw_data_buffer: Deque = deque(maxlen=sr*10)
-        self.melspectrogram_buffer = np.ones((76, 32))  # n_frames x num_features
+        self.sr = sr
+        self._create_buffers()
+
+    def _create_buffers(self):
+        """Allocates the audio and feature buffers used for streaming audio"""
+        self.raw_data_buffer = RingBuffer(self.sr*10, dtype=np.int16)
         self.melspectrogram_max_len = 10*97  # 97 is the number of frames in 1 second of 16hz audio
-        self.accumulated_samples = 0  # the samples added to the buffer since the audio preprocessor was last called
-        self.raw_data_remainder = np.empty(0)
-        self.feature_buffer = self._get_embeddings(np.random.randint(-1000, 1000, 16000*4).astype(np.int16))
+        self.melspectrogram_buffer = RingBuffer(self.melspectrogram_max_len, item_shape=(32,), dtype=np.float32)
         self.feature_buffer_max_len = 120  # ~10 seconds of feature buffer history
+        self.feature_buffer = RingBuffer(self.feature_buffer_max_len, item_shape=(96,), dtype=np.float32)
+        self.reset()
+
+    def new_stream(self):
+        """
+        Creates a new AudioFeatures object that shares the loaded melspectrogram and embedding models
+        with this object, but has its own (newly initialized) audio and feature buffers.
+
+        Returns:
+            AudioFeatures: The new AudioFeatures object
+        """
+        stream = copy.copy(self)
+        stream._create_buffers()
+        return stream
 
     def reset(self):
-        """Reset the internal buffers"""
+        """
+        Reset the internal buffers, with the feature buffer starting with precomputed warm-start features
+        (so that resetting doesn't run any models, and always gives the same initial state).
+        """
         self.raw_data_buffer.clear()
-        self.melspectrogram_buffer = np.ones((76, 32))
-        self.accumulated_samples = 0
-        self.raw_data_remainder = np.empty(0)
-        self.feature_buffer = self._get_embeddings(np.random.randint(-1000, 1000, 16000*4).astype(np.int16))
+        self.melspectrogram_buffer.clear()
+        self.melspectrogram_buffer.extend(np.ones((76, 32)))  # n_frames x num_features
+        self.accumulated_samples = 0  # the samples in the raw data buffer that haven't been processed yet
+        self.raw_byte_remainder = b""  # the last byte of audio passed as bytes with an odd length
+        self.skipped_embedding_frames = 0  # the frames with a melspectrogram but no embedding yet
+        self.feature_buffer.clear()
+        self.feature_buffer.extend(_load_warm_start_features())
+
+    def snapshot(self):
+        """
+        Gets a copy of the streaming state of this object: the audio, melspectrogram, and feature frames
+        that are still needed to process new audio, and the counts of the partially processed audio.
+
+        Returns:
+            dict: The state, as Numpy arrays and integers (see `restore`)
+        """
+        return {
+            "raw_data": np.array(self.raw_data_buffer.get_last(self.accumulated_samples + 160*3)),
+            "melspectrogram": np.array(self.melspectrogram_buffer.get_last(76 + 8*self.skipped_embedding_frames)),
+            "features": np.array(self.feature_buffer),
+            "raw_byte_remainder": np.frombuffer(self.raw_byte_remainder, dtype=np.uint8).copy(),
+            "accumulated_samples": self.accumulated_samples,
+            "skipped_embedding_frames": self.skipped_embedding_frames
+        }
+
+    def restore(self, state: dict):
+        """
+        Restores a streaming state from `snapshot` (which may come from another AudioFeatures object with the same
+        models, e.g., in another process), so that new audio is processed exactly as by the object it came from.
+
+        Args:
+            state (dict): The state from `snapshot`
+        """
+        if state["melspectrogram"].shape[1:] != (32,) or state["features"].shape[1:] != (96,) \
+           or state["raw_data"].shape[0] < int(state["accumulated_samples"]):
+            raise ValueError("The state doesn't match the audio features of this object!")
+
+        self.raw_data_buffer.clear()
+        self.raw_data_buffer.extend(state["raw_data"].astype(np.int16))
+        self.melspectrogram_buffer.clear()
+        self.melspectrogram_buffer.extend(state["melspectrogram"])
+        self.feature_buffer.clear()
+        self.feature_buffer.extend(state["features"])
+        self.raw_byte_remainder = np.asarray(state["raw_byte_remainder"], dtype=np.uint8).tobytes()
+        self.accumulated_samples = int(state["accumulated_samples"])
+        self.skipped_embedding_frames = int(state["skipped_embedding_frames"])
 
     def _get_melspectrogram(self, x: Union[np.ndarray, List], melspec_transform: Callable = lambda x: x/10 + 2):
         """
@@ -264,6 +934,7 @@ class AudioFeatures():
         # Prepare ThreadPool object, if needed for multithreading
         pool = None
         if "CPU" in self.onnx_execution_provider:
+            from multiprocessing.pool import ThreadPool
             pool = ThreadPool(processes=ncpu)
 
         # Make batches
@@ -316,6 +987,7 @@ class AudioFeatures():
         # Prepare ThreadPool object, if needed for multithreading
         pool = None
         if "CPU" in self.onnx_execution_provider:
+            from multiprocessing.pool import ThreadPool
             pool = ThreadPool(processes=ncpu)
 
         # Calculate array sizes and make batches
@@ -384,83 +1056,170 @@ class AudioFeatures():
 
         return embeddings
 
-    def _streaming_melspectrogram(self, n_samples):
+    def _streaming_melspectrogram(self, n_samples, offset: int = 0):
         """Note! There seem to be some slight numerical issues depending on the underlying audio data
         such that the streaming method is not exactly the same as when the melspectrogram of the entire
         clip is calculated. It's unclear if this difference is significant and will impact model performance.
         In particular padding with 0 or very small values seems to demonstrate the differences well.
+        (The difference comes from the clipping to 80 dB below the maximum value of each model input, and
+        doesn't occur with the `melspec_implementation="numpy"` argument, see `NumpyMelspectrogram`.)
+
+        The melspectrogram is calculated for the `n_samples` samples preceding the most recent `offset`
+        samples in the raw data buffer (i.e., samples that aren't part of a complete 80 ms frame yet).
         """
-        if len(self.raw_data_buffer) < 400:
+        if len(self.raw_data_buffer) - offset < 400:
             raise ValueError("The number of input frames must be at least 400 samples @ 16khz (25 ms)!")
 
-        self.melspectrogram_buffer = np.vstack(
-            (self.melspectrogram_buffer, self._get_melspectrogram(list(self.raw_data_buffer)[-n_samples-160*3:]))
-        )
-
-        if self.melspectrogram_buffer.shape[0] > self.melspectrogram_max_len:
-            self.melspectrogram_buffer = self.melspectrogram_buffer[-self.melspectrogram_max_len:, :]
+        start_ns = self.instrumentation.start()
+        self.melspectrogram_buffer.extend(self._get_melspectrogram(self.raw_data_buffer.get_last(n_samples + 160*3, offset=offset)))
+        self.instrumentation.record("melspectrogram", start_ns)
 
     def _buffer_raw_data(self, x):
         """
         Adds raw audio data to the input buffer
         """
-        self.raw_data_buffer.extend(x.tolist() if isinstance(x, np.ndarray) else x)
-
-    def _streaming_features(self, x):
-        # Add raw audio data to buffer, temporarily storing extra frames if not an even number of 80 ms chunks
-        processed_samples = 0
-
-        if self.raw_data_remainder.shape[0] != 0:
-            x = np.concatenate((self.raw_data_remainder, x))
-            self.raw_data_remainder = np.empty(0)
-
-        if self.accumulated_samples + x.shape[0] >= 1280:
-            remainder = (self.accumulated_samples + x.shape[0]) % 1280
-            if remainder != 0:
-                x_even_chunks = x[0:-remainder]
-                self._buffer_raw_data(x_even_chunks)
-                self.accumulated_samples += len(x_even_chunks)
-                self.raw_data_remainder = x[-remainder:]
-            elif remainder == 0:
-                self._buffer_raw_data(x)
-                self.accumulated_samples += x.shape[0]
-                self.raw_data_remainder = np.empty(0)
-        else:
-            self.accumulated_samples += x.shape[0]
-            self._buffer_raw_data(x)
+        self.raw_data_buffer.extend(x)
 
-        # Only calculate melspectrogram once minimum samples are accumulated
-        if self.accumulated_samples >= 1280 and self.accumulated_samples % 1280 == 0:
-            self._streaming_melspectrogram(self.accumulated_samples)
+    def _get_samples(self, x) -> np.ndarray:
+        """
+        Gets the 16-bit PCM samples of input audio. Numpy arrays are returned unchanged, and objects that support
+        the buffer protocol (e.g., bytes, bytearray, memoryview, or mmap) are returned as a zero-copy int16 view.
+        If the number of bytes is odd, the last byte is kept and combined with the first byte of the next input
+        (which makes a copy of that input).
 
-            # Calculate new audio embeddings/features based on update melspectrograms
-            for i in np.arange(self.accumulated_samples//1280-1, -1, -1):
-                ndx = -8*i
-                ndx = ndx if ndx != 0 else len(self.melspectrogram_buffer)
-                x = self.melspectrogram_buffer[-76 + ndx:ndx].astype(np.float32)[None, :, :, None]
-                if x.shape[1] == 76:
-                    self.feature_buffer = np.vstack((self.feature_buffer,
-                                                    self.embedding_model_predict(x)))
+        Args:
+            x (Union[np.ndarray, bytes, bytearray, memoryview, mmap.mmap]): The input audio
 
-            # Reset raw data buffer counter
-            processed_samples = self.accumulated_samples
-            self.accumulated_samples = 0
+        Returns:
+            np.ndarray: The audio samples
+        """
+        if isinstance(x, np.ndarray):
+            return x
+
+        try:
+            data = memoryview(x).cast("B")
+        except TypeError:
+            raise ValueError("The input audio data must by a Numpy array or an object that supports the buffer protocol"
+                             f" (e.g., bytes), instead received an object of type {type(x)}.")
+
+        if self.raw_byte_remainder:
+            data = memoryview(self.raw_byte_remainder + data.tobytes())
+        n_bytes = len(data) - len(data) % 2
+        self.raw_byte_remainder = data[n_bytes:].tobytes()
+        return np.frombuffer(data[0:n_bytes], dtype=np.int16)
+
+    def _buffer_streaming_audio(self, x):
+        """
+        Adds new audio data to the raw data buffer. Samples after the last complete 80 ms frame stay at the end
+        of the buffer (and are counted in `accumulated_samples`) until more audio is added.
 
-        if self.feature_buffer.shape[0] > self.feature_buffer_max_len:
-            self.feature_buffer = self.feature_buffer[-self.feature_buffer_max_len:, :]
+        Returns:
+            int: The number of buffered samples ready to be processed (a multiple of 1280), or 0 if
+                 more samples are needed.
+        """
+        x = self._get_samples(x)
+        self._buffer_raw_data(x)
+        self.accumulated_samples += x.shape[0]
+        return self.accumulated_samples - self.accumulated_samples % 1280
+
+    def _streaming_features(self, x, compute_embeddings: bool = True, max_backfill_frames: int = 16):
+        """
+        Adds audio data to the buffers, and calculates the melspectrograms and embeddings of any new 80 ms frames.
+
+        Args:
+            x (Union[np.ndarray, bytes]): The audio data, as a Numpy array or any object that supports the buffer
+                                          protocol with 16-bit PCM samples (see the `_get_samples` method)
+            compute_embeddings (bool): Whether to calculate the embeddings of the new frames. If False, only the
+                                       melspectrograms are calculated, and the frames are counted as skipped.
+            max_backfill_frames (int): The maximum number of previously skipped frames to calculate the embeddings
+                                       of (the most recent ones) once embeddings are calculated again, so that
+                                       the most recent feature windows are the same as without skipping.
+
+        Returns:
+            int: The number of processed samples (a multiple of 1280), or the number of accumulated samples
+                 if there weren't enough samples for a new frame
+        """
+        # Add raw audio data to buffer, leaving extra samples if not an even number of 80 ms chunks
+        processed_samples = self._buffer_streaming_audio(x)
+
+        if processed_samples != 0:
+            self.accumulated_samples -= processed_samples
+            self._streaming_melspectrogram(processed_samples, offset=self.accumulated_samples)
+            if compute_embeddings:
+                self._streaming_embeddings(processed_samples//1280 + min(self.skipped_embedding_frames, max_backfill_frames))
+                self.skipped_embedding_frames = 0
+            else:
+                self.skipped_embedding_frames += processed_samples//1280
 
         return processed_samples if processed_samples != 0 else self.accumulated_samples
 
+    def _streaming_embeddings(self, n_frames: int):
+        """Calculates the audio embeddings/features of the last `n_frames` frames in the melspectrogram buffer,
+        with one batch for all frames"""
+        windows = [self.melspectrogram_buffer.get_last(76, offset=8*i) for i in np.arange(n_frames-1, -1, -1)]
+        windows = [i for i in windows if i.shape[0] == 76]
+        if windows:
+            start_ns = self.instrumentation.start()
+            embeddings = self.embedding_model_predict(np.stack(windows)[:, :, :, None])
+            self.feature_buffer.extend(embeddings.reshape(-1, 96))
+            self.instrumentation.record("embedding", start_ns)
+
+    def _streaming_features_by_frame(self, x: np.ndarray):
+        """
+        Adds audio data with a length that is a multiple of 1280 samples (80 ms) to the buffers, and calculates
+        the melspectrograms and embeddings of all of the frames in single batches. Unlike with `_streaming_features`,
+        the melspectrogram of each frame is calculated separately (as the melspectrogram values are clipped
+        relative to the maximum value of the input), so the features are the same as when streaming audio
+        one frame at a time. The number of frames is limited by the sizes of the melspectrogram and feature buffers.
+
+        Args:
+            x (np.ndarray): The audio data, with a length that is a multiple of 1280 samples
+
+        Returns:
+            int: The number of processed samples
+        """
+        n_context = min(160*3, len(self.raw_data_buffer))
+        audio = np.concatenate((self.raw_data_buffer.get_last(n_context), x))
+        self._buffer_raw_data(x)
+
+        # Get the melspectrogram of each frame (with 480 samples of context), with one batch for all frames
+        start_ns = self.instrumentation.start()
+        start_ndx = 0
+        if n_context < 160*3:  # the first frame has less context, as when streaming the start of the audio
+            self.melspectrogram_buffer.extend(self._get_melspectrogram(audio[0:n_context + 1280]))
+            start_ndx = n_context + 1280 - 160*3
+        if audio.shape[0] - start_ndx >= 1280 + 160*3:
+            windows = np.lib.stride_tricks.sliding_window_view(audio[start_ndx:], 1280 + 160*3)[::1280]
+            self.melspectrogram_buffer.extend(self._get_melspectrogram(np.ascontiguousarray(windows)).reshape(-1, 32))
+        self.instrumentation.record("melspectrogram", start_ns)
+
+        self._streaming_embeddings(x.shape[0]//1280)
+        return x.shape[0]
+
     def get_features(self, n_feature_frames: int = 16, start_ndx: int = -1):
+        """
+        Get a window of the most recent audio features (embeddings) from the feature buffer.
+
+        Note that the returned array is a zero-copy view of the internal buffer, so it will change as new
+        audio is processed. Make a copy of the array if the features need to be kept.
+
+        Args:
+            n_feature_frames (int): The number of feature frames in the window
+            start_ndx (int): The (negative) index of the first frame of the window, relative to the end
+                             of the feature buffer. The default (-1) returns the most recent frames.
+
+        Returns:
+            np.ndarray: A float32 array of shape (1, n_feature_frames, 96)
+        """
+        n_feature_frames = int(n_feature_frames)
+        offset = 0
         if start_ndx != -1:
-            end_ndx = start_ndx + int(n_feature_frames) \
-                if start_ndx + n_feature_frames != 0 else len(self.feature_buffer)
-            return self.feature_buffer[start_ndx:end_ndx, :][None, ].astype(np.float32)
-        else:
-            return self.feature_buffer[int(-1*n_feature_frames):, :][None, ].astype(np.float32)
+            start_ndx = start_ndx if start_ndx < 0 else start_ndx - len(self.feature_buffer)
+            offset = -(start_ndx + n_feature_frames)
+        return self.feature_buffer.get_last(n_feature_frames, offset=offset)[None, ]
 
-    def __call__(self, x):
-        return self._streaming_features(x)
+    def __call__(self, x, **kwargs):
+        return self._streaming_features(x, **kwargs)
 
 
 # Bulk prediction function
@@ -491,6 +1250,8 @@ def bulk_predict(
     Returns:
         dict: A dictionary containing the predictions for each file, with the filepath as the key
     """
+    # Function specific imports
+    from multiprocessing import Process, Queue
 
     # Create openWakeWord model objects
     n_batches = max(1, len(file_paths)//ncpu)
@@ -560,6 +1321,8 @@ def compute_features_from_generator(generator, n_total, clip_duration, output_fi
         None
     """
     # Function specific imports
+    from numpy.lib.format import open_memmap
+    from tqdm import tqdm
     from openwakeword.data import trim_mmap
 
     # Create audio features object
@@ -604,6 +1367,9 @@ def compute_features_from_generator(generator, n_total, clip_duration, output_fi
 # Function to download files from a URL with a progress bar
 def download_file(url, target_directory, file_size=None):
     """A simple function to download a file from a URL with a progress bar using only the requests library"""
+    import requests
+    from tqdm import tqdm
+
     local_filename = url.split('/')[-1]
 
     with requests.get(url, stream=True) as r:
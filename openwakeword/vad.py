@@ -45,10 +45,12 @@
 # It can be used as with the openWakeWord library, or independently.
 
 # Imports
-import onnxruntime as ort
 import numpy as np
 import os
-from collections import deque
+import copy
+from collections import deque, defaultdict
+from typing import Optional, List
+from openwakeword.utils import get_shared_session, create_onnx_session
 
 
 class VAD():
@@ -64,21 +66,29 @@ class VAD():
                     "models",
                     "silero_vad.onnx"
                  ),
-                 n_threads: int = 1
+                 n_threads: int = 1,
+                 onnx_graph_optimization_level: str = "all",
+                 onnx_cache_dir: Optional[str] = None
                  ):
         """Initialize the VAD model object.
 
             Args:
                 model_path (str): The path to the Silero VAD ONNX model.
                 n_threads (int): The number of threads to use for the VAD model.
+                onnx_graph_optimization_level (str): The level of graph optimizations made by onnxruntime,
+                                                     one of "disabled", "basic", "extended", or "all" (the default).
+                onnx_cache_dir (str): A directory where the model is cached after being optimized by onnxruntime
+                                      (see `openwakeword.utils.create_onnx_session`). If not provided (the default),
+                                      no caching is done.
         """
 
-        # Initialize the ONNX model
-        sessionOptions = ort.SessionOptions()
-        sessionOptions.inter_op_num_threads = n_threads
-        sessionOptions.intra_op_num_threads = n_threads
-        self.model = ort.InferenceSession(model_path, sess_options=sessionOptions,
-                                          providers=["CPUExecutionProvider"])
+        # Initialize the ONNX model (shared with other objects that load the same model)
+        self.shared_session = get_shared_session(
+            ("onnx", os.path.abspath(model_path), n_threads, onnx_graph_optimization_level),
+            lambda: create_onnx_session(model_path, n_threads=n_threads, graph_optimization_level=onnx_graph_optimization_level,
+                                        cache_dir=onnx_cache_dir)
+        )
+        self.model = self.shared_session.session
 
         # Create buffer
         self.prediction_buffer: deque = deque(maxlen=125)  # buffer lenght of 10 seconds
@@ -89,12 +99,47 @@ class VAD():
         # Reset model to start
         self.reset_states()
 
+    def new_stream(self):
+        """
+        Creates a new VAD object that shares the loaded model with this object, but has
+        its own (newly initialized) model state and prediction buffer.
+
+        Returns:
+            VAD: The new VAD object
+        """
+        stream = copy.copy(self)
+        stream.prediction_buffer = deque(maxlen=self.prediction_buffer.maxlen)
+        stream.reset_states()
+        return stream
+
     def reset_states(self, batch_size=1):
         self._h = np.zeros((2, batch_size, 64)).astype('float32')
         self._c = np.zeros((2, batch_size, 64)).astype('float32')
         self._last_sr = 0
         self._last_batch_size = 0
 
+    def snapshot(self):
+        """
+        Gets a copy of the model state and the prediction buffer of this object.
+
+        Returns:
+            dict: The state, as Numpy arrays (see `restore`)
+        """
+        return {"h": self._h.copy(), "c": self._c.copy(),
+                "predictions": np.array(self.prediction_buffer, dtype=np.float32)}
+
+    def restore(self, state: dict):
+        """
+        Restores the model state and the prediction buffer from `snapshot`.
+
+        Args:
+            state (dict): The state from `snapshot`
+        """
+        self._h = np.array(state["h"], dtype=np.float32)
+        self._c = np.array(state["c"], dtype=np.float32)
+        self.prediction_buffer.clear()
+        self.prediction_buffer.extend(np.asarray(state["predictions"]).tolist())
+
     def predict(self, x, frame_size=480):
         """
         Get the VAD predictions for the input audio frame.
@@ -128,3 +173,113 @@ class VAD():
 
     def __call__(self, x, frame_size=160*4):
         self.prediction_buffer.append(self.predict(x, frame_size))
+
+    def predict_streams(self, streams: List["VAD"], x: List[np.ndarray], frame_size: int = 480):
+        """
+        Get the VAD predictions for new audio from several independent streams (e.g., VAD objects
+        created with `new_stream`), advancing the model state of each stream. Streams with the same
+        length of new audio are predicted together, with the model states of the streams stacked into
+        one batch, so that each chunk of `frame_size` samples takes a single model call for all of the streams.
+
+        Args:
+            streams (List[VAD]): The VAD objects of the streams, which must share the model of this object
+            x (List[np.ndarray]): The new audio for each stream (see the `predict` method)
+            frame_size (int): The frame size in samples (see the `predict` method)
+
+        Returns:
+            np.ndarray: The average predicted score of the new audio of each stream
+        """
+        scores = np.zeros(len(streams), dtype=np.float32)
+
+        # Group streams with the same audio length, so that all of their chunks have the same size
+        groups = defaultdict(list)
+        for ndx, audio in enumerate(x):
+            groups[audio.shape[0]].append(ndx)
+
+        for n_samples, ndcs in groups.items():
+            audio = (np.stack([x[i] for i in ndcs])/32767).astype(np.float32)
+            h = np.concatenate([streams[i]._h for i in ndcs], axis=1)
+            c = np.concatenate([streams[i]._c for i in ndcs], axis=1)
+
+            chunk_predictions = []
+            for i in range(0, n_samples, frame_size):
+                ort_inputs = {'input': np.ascontiguousarray(audio[:, i:i+frame_size]),
+                              'h': h, 'c': c, 'sr': self.sample_rate}
+                out, h, c = self.model.run(None, ort_inputs)
+                chunk_predictions.append(out[:, 0])
+
+            for j, i in enumerate(ndcs):
+                streams[i]._h = h[:, j:j+1]
+                streams[i]._c = c[:, j:j+1]
+            scores[ndcs] = np.mean(chunk_predictions, axis=0)
+
+        return scores
+
+    def update_streams(self, streams: List["VAD"], x: List[np.ndarray], frame_size: int = 160*4):
+        """
+        Adds the VAD predictions for new audio from several independent streams to the prediction
+        buffer of each stream, predicting on all of the streams in batches (see the `predict_streams` method).
+
+        Args:
+            streams (List[VAD]): The VAD objects of the streams, which must share the model of this object
+            x (List[np.ndarray]): The new audio for each stream
+            frame_size (int): The frame size in samples
+        """
+        for stream, score in zip(streams, self.predict_streams(streams, x, frame_size)):
+            stream.prediction_buffer.append(score)
+
+    def predict_clips(self, clips: List[np.ndarray], frame_size: int = 480, batch_size: int = 64,
+                      streams: Optional[List["VAD"]] = None):
+        """
+        Get the VAD predictions for every chunk of `frame_size` samples of many independent audio clips,
+        predicting on up to `batch_size` clips at once (one model call per chunk for the whole batch).
+        Clips with similar lengths are batched together, and by default each clip starts from a newly initialized
+        model state, so the state of this object isn't changed. The last chunk of a clip is padded with zeros
+        if the clip length isn't a multiple of `frame_size`.
+
+        Args:
+            clips (List[np.ndarray]): The audio clips, which must be 16 khz and 16-bit PCM format
+            frame_size (int): The frame size in samples (see the `predict` method)
+            batch_size (int): The maximum number of clips to predict on at once
+            streams (List[VAD]): The VAD objects (e.g., this object, or from `new_stream`) whose model states
+                                 the clips continue from, one per clip. The model state of each object is
+                                 updated to the state after its clip (including any padding), but the
+                                 prediction buffers aren't changed.
+
+        Returns:
+            List[np.ndarray]: The predicted score for each chunk of each clip, in the same order as the clips
+        """
+        clip_scores: List[np.ndarray] = [np.zeros(0, dtype=np.float32)]*len(clips)
+        order = np.argsort([clip.shape[0] for clip in clips], kind="stable")
+        for batch_start in range(0, len(clips), batch_size):
+            ndcs = order[batch_start:batch_start + batch_size]
+            n_chunks = [int(np.ceil(clips[i].shape[0]/frame_size)) for i in ndcs]
+
+            # Get the audio of all clips in the batch as one array, with the chunks in the last two dimensions
+            audio = np.zeros((len(ndcs), max(n_chunks), frame_size), dtype=np.float32)
+            for j, i in enumerate(ndcs):
+                audio[j].reshape(-1)[0:clips[i].shape[0]] = clips[i]/32767
+
+            if streams is not None:
+                h = np.concatenate([streams[i]._h for i in ndcs], axis=1).astype(np.float32)
+                c = np.concatenate([streams[i]._c for i in ndcs], axis=1).astype(np.float32)
+            else:
+                h = np.zeros((2, len(ndcs), 64), dtype=np.float32)
+                c = np.zeros((2, len(ndcs), 64), dtype=np.float32)
+            batch_scores = np.zeros((len(ndcs), max(n_chunks)), dtype=np.float32)
+            for chunk_ndx in range(max(n_chunks)):
+                ort_inputs = {'input': np.ascontiguousarray(audio[:, chunk_ndx]), 'h': h, 'c': c, 'sr': self.sample_rate}
+                out, h, c = self.model.run(None, ort_inputs)
+                batch_scores[:, chunk_ndx] = out[:, 0]
+
+                # Keep the model state at the end of each clip
+                if streams is not None:
+                    for j, i in enumerate(ndcs):
+                        if n_chunks[j] == chunk_ndx + 1:
+                            streams[i]._h = h[:, j:j+1]
+                            streams[i]._c = c[:, j:j+1]
+
+            for j, i in enumerate(ndcs):
+                clip_scores[i] = batch_scores[j, 0:n_chunks[j]]
+
+        return clip_scores
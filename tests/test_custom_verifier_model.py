@@ -29,6 +29,8 @@
 # Imports
 import openwakeword
 import os
+import sys
+import subprocess
 import numpy as np
 import scipy.io.wavfile
 import tempfile
@@ -93,3 +95,38 @@ class TestModels:
 
             # Prediction on random data
             owwModel.predict_clip(reference_clips[0])
+
+    def test_compiled_verifier_model(self):
+        # Train verifier model on random features
+        features = np.random.random((20, 16, 96)).astype(np.float32)
+        labels = np.array([0, 1]*10)
+        pipeline = openwakeword.custom_verifier_model.train_verifier_model(features, labels)
+
+        # Compiled model gives the same scores as the scikit-learn pipeline
+        compiled = openwakeword.custom_verifier_model.CompiledVerifier.from_pipeline(pipeline)
+        assert np.allclose(compiled.predict_proba(features), pipeline.predict_proba(features))
+
+        # Save and load as .npz file
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            compiled.save(os.path.join(tmp_dir, "verifier_model.npz"))
+            loaded = openwakeword.custom_verifier_model.load_verifier_model(os.path.join(tmp_dir, "verifier_model.npz"))
+            assert np.allclose(loaded.predict(features), pipeline.predict_proba(features)[:, 1])
+
+        with pytest.raises(ValueError):
+            compiled.predict(features[:, 0:8])
+
+        # Large logits don't overflow
+        with np.errstate(over="raise"):
+            scores = openwakeword.custom_verifier_model.CompiledVerifier(np.ones(16*96), 0.0).predict(
+                np.stack((np.full((16, 96), -10.0), np.full((16, 96), 10.0)))
+            )
+        assert scores[0] == 0.0 and scores[1] == 1.0
+
+        # Compiled models are loaded and run without importing the training dependencies
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            compiled.save(os.path.join(tmp_dir, "verifier_model.npz"))
+            code = ("import sys, numpy as np; from openwakeword.custom_verifier_model import load_verifier_model; "
+                    f"verifier = load_verifier_model({os.path.join(tmp_dir, 'verifier_model.npz')!r}); "
+                    "verifier.predict(np.zeros((1, 16, 96))); "
+                    "print(','.join([i for i in ['sklearn', 'scipy', 'tqdm'] if i in sys.modules]))")
+            assert subprocess.check_output([sys.executable, "-c", code], text=True).strip() == ""
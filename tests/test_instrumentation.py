@@ -0,0 +1,90 @@
+# Copyright 2022 David Scripka. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# Imports
+import json
+import sys
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+import openwakeword
+from openwakeword.instrumentation import Instrumentation, LatencyHistogram
+
+
+# Tests
+class TestInstrumentation:
+    def test_latency_histogram(self):
+        histogram = LatencyHistogram()
+        latencies = np.random.uniform(1e5, 1e7, 10000).astype(int)  # 0.1 to 10 ms
+        for latency in latencies:
+            histogram.record(int(latency))
+
+        assert histogram.count == len(latencies)
+        assert histogram.max_ns == latencies.max()
+        for q in [50, 90, 99]:
+            assert abs(histogram.percentile(q) - np.percentile(latencies, q)/1e9) < 0.2*np.percentile(latencies, q)/1e9
+
+        histogram.reset()
+        assert histogram.count == 0 and sum(histogram.bucket_counts) == 0
+        assert np.isnan(histogram.percentile(50))
+
+    def test_disabled_instrumentation(self):
+        instrumentation = Instrumentation()
+        instrumentation.record("stage", instrumentation.start())
+        instrumentation.increment("counter")
+        assert instrumentation.histograms == {} and instrumentation.counters == {}
+
+    def test_concurrent_recording(self):
+        # No latencies or counts are lost when recording from several threads at once
+        instrumentation = Instrumentation(enabled=True)
+        switch_interval = sys.getswitchinterval()
+        sys.setswitchinterval(1e-6)
+        try:
+            def record(_):
+                for _ in range(2000):
+                    instrumentation.record("stage", instrumentation.start())
+                    instrumentation.increment("counter")
+
+            with ThreadPoolExecutor(max_workers=8) as pool:
+                list(pool.map(record, range(8)))
+        finally:
+            sys.setswitchinterval(switch_interval)
+
+        assert instrumentation.counters["counter"] == 8*2000
+        assert instrumentation.histograms["stage"].count == 8*2000
+        assert sum(instrumentation.histograms["stage"].bucket_counts) == 8*2000
+        assert instrumentation.summary()["stages"]["stage"]["count"] == 8*2000
+
+    def test_model_instrumentation(self):
+        owwModel = openwakeword.Model(inference_framework="onnx", instrumentation=True)
+        audio = np.random.randint(-1000, 1000, 16000*2).astype(np.int16)
+        for step in range(0, audio.shape[0] - 1280, 1280):
+            owwModel.predict(audio[step:step + 1280])
+
+        instrumentation = owwModel.instrumentation
+        n_frames = len(range(0, audio.shape[0] - 1280, 1280))
+        assert instrumentation.counters["predict_calls"] == n_frames
+        assert instrumentation.counters["frames"] == n_frames
+        for stage in ["melspectrogram", "embedding", "postprocessing", "predict"] + list(owwModel.models.keys()):
+            assert instrumentation.histograms[stage].count == n_frames
+            assert 0 < instrumentation.percentile(stage, 99) <= instrumentation.histograms["predict"].max_ns/1e9
+
+        # Exporters
+        summary = json.loads(instrumentation.to_json())
+        assert summary["counters"]["frames"] == n_frames
+        assert set(["count", "mean", "max", "p50", "p90", "p99"]) == set(summary["stages"]["predict"].keys())
+
+        prometheus_text = instrumentation.to_prometheus()
+        assert f'openwakeword_stage_latency_seconds_count{{stage="predict"}} {n_frames}' in prometheus_text
+        assert 'openwakeword_stage_latency_seconds_bucket{stage="predict",le="+Inf"}' in prometheus_text
+        assert f"openwakeword_frames_total {n_frames}" in prometheus_text
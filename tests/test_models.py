@@ -29,15 +29,23 @@
 # Imports
 import openwakeword
 import os
+import io
 import sys
+import subprocess
 import logging
 import numpy as np
 from pathlib import Path
 import collections
+import copy
 import pytest
 import platform
 import pickle
+import shutil
 import tempfile
+import mmap
+import tracemalloc
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
 import mock
 import wave
 
@@ -119,8 +127,31 @@ class TestModels:
                 custom_verifier_models={"alexa_v0.1": os.path.join(tmp_dir, "test_verifier.pkl")},
                 custom_verifier_threshold=0.0
             )
-
-            owwModel.predict(np.random.randint(-1000, 1000, 1280).astype(np.int16))
+            assert isinstance(owwModel.custom_verifier_models["alexa_v0.1"],
+                              openwakeword.custom_verifier_model.CompiledVerifier)
+
+            # Verifier scores are returned for frames above the threshold
+            predictions = [owwModel.predict(np.random.randint(-1000, 1000, 1280).astype(np.int16)) for _ in range(6)]
+            features = owwModel.preprocessor.get_features(owwModel.model_inputs["alexa_v0.1"])
+            assert np.isclose(predictions[-1]["alexa_v0.1"], verifier_model.predict_proba(features)[0][-1])
+
+    def test_tflite_models_without_batch_support(self):
+        # The "hey jarvis" tflite model can't be resized to a larger batch, so it predicts on one window at a time
+        owwModel = openwakeword.Model(wakeword_models=["alexa", "hey jarvis"], inference_framework="tflite",
+                                      melspec_model_path=os.path.join("models", "melspectrogram.tflite"),
+                                      embedding_model_path=os.path.join("models", "embedding_model.tflite"))
+        assert owwModel.model_batch_support == {"alexa": True, "hey jarvis": False}
+
+        audio = np.random.randint(-1000, 1000, 1280*10).astype(np.int16)
+        predictions = owwModel.predict(audio, return_frame_scores=True)[1]
+        assert predictions["hey jarvis"].shape == (10,)
+
+        # The model can still predict after a failed resize of its input
+        tflite_predict = owwModel.model_prediction_function["hey jarvis"].args[0]
+        with pytest.raises(RuntimeError):
+            tflite_predict(np.zeros((3, 16, 96), dtype=np.float32))
+        assert tflite_predict(np.zeros((1, 16, 96), dtype=np.float32)).shape == (1, 1, 1)
+        assert owwModel.predict(audio[0:1280])["hey jarvis"] >= 0
 
     def test_load_pretrained_model_by_name(self):
         # Load model with defaults
@@ -203,6 +234,18 @@ class TestModels:
                             assert max(predictions_flat[key]) >= 0.5
                         else:
                             assert max(predictions_flat[key]) < 0.5
+
+                # Pipelined noise suppression gives the same predictions, one call later
+                np.random.seed(0)
+                owwModel = openwakeword.Model(enable_speex_noise_suppression=True, instrumentation=True)
+                np.random.seed(0)
+                owwModel_pipelined = openwakeword.Model(enable_speex_noise_suppression=True, speex_pipelining=True)
+                data = np.random.randint(-1000, 1000, 1280*20).astype(np.int16)
+                predictions = [owwModel.predict(data[i:i+1280]) for i in range(0, data.shape[0], 1280)]
+                predictions_pipelined = [owwModel_pipelined.predict(data[i:i+1280]) for i in range(0, data.shape[0], 1280)]
+                for mdl in owwModel.models.keys():
+                    assert np.allclose([i[mdl] for i in predictions[5:-1]], [i[mdl] for i in predictions_pipelined[6:]])
+                assert owwModel.instrumentation.summary()["stages"]["speex"]["count"] == 20
             except ImportError:
                 logging.warning("Attemped to test Speex noise cancelling functionality, but the 'speexdsp_ns' library was not installed!"
                                 " If you want these tests to be run, install this library as shown in the openwakeword documentation."
@@ -288,6 +331,57 @@ class TestModels:
         predictions = owwModel.predict_clip(dat)
         assert isinstance(predictions[0], dict)
 
+    def test_predict_clip_offline(self):
+        # Audio with quiet and loud sections
+        audio = (np.random.randn(16000*12)*3000*(np.sin(np.arange(16000*12)/16000*2)**2)).astype(np.int16)
+
+        kwargs_list = [
+            {},
+            {"patience": {"alexa": 2}, "threshold": {"alexa": 0.0}},
+            {"patience": {"alexa": 2, "timer": 3}, "threshold": {"alexa": 0.0001, "timer": 0.0001}},
+            {"debounce_time": 0.5, "threshold": {"alexa": 0.0001, "hey_mycroft": 0.001}}
+        ]
+        for kwargs in kwargs_list:
+            np.random.seed(0)
+            owwModel = openwakeword.Model(inference_framework="onnx", vad_threshold=0.3)
+            np.random.seed(0)
+            owwModel_offline = openwakeword.Model(inference_framework="onnx", vad_threshold=0.3)
+
+            # Offline predictions are the same as streaming predictions, including for consecutive clips
+            for _ in range(2):
+                predictions = owwModel.predict_clip(audio, **kwargs)
+                predictions_offline = owwModel_offline.predict_clip(audio, offline=True, **kwargs)
+                assert len(predictions) == len(predictions_offline)
+                for frame, frame_offline in zip(predictions, predictions_offline):
+                    assert frame.keys() == frame_offline.keys()
+                    for lbl in frame.keys():
+                        assert abs(frame[lbl] - frame_offline[lbl]) < 1e-5
+
+            predictions_array = owwModel_offline.predict_clip(audio, offline=True, return_type="array", **kwargs)
+            assert predictions_array.shape == (len(predictions), len(predictions[0]))
+
+    def test_predict_clip_offline_duplicate_labels(self, tmp_path):
+        # A model named like one of the labels of the timer model, so the label is predicted by both models
+        shutil.copy(os.path.join("openwakeword", "resources", "models", "alexa_v0.1.onnx"),
+                    os.path.join(tmp_path, "1_minute_timer.onnx"))
+        audio = (np.random.randn(16000*6)*3000).astype(np.int16)
+
+        owwModel = openwakeword.Model(wakeword_models=["timer", os.path.join(tmp_path, "1_minute_timer.onnx")],
+                                      inference_framework="onnx")
+        owwModel_alexa = openwakeword.Model(wakeword_models=["alexa"], inference_framework="onnx")
+        assert len(owwModel.labels) == len(owwModel.class_mapping["timer"])
+
+        # The offline array has a column for each label, in the same order as the streaming array,
+        # and the scores of the later model take precedence for the duplicate label
+        predictions_array = owwModel.predict_clip(audio, return_type="array")
+        owwModel.reset()
+        predictions_array_offline = owwModel.predict_clip(audio, offline=True, return_type="array")
+        assert predictions_array_offline.shape == (predictions_array.shape[0], len(owwModel.labels))
+        assert np.allclose(predictions_array, predictions_array_offline, atol=1e-5)
+
+        alexa_scores = owwModel_alexa.predict_clip(audio, offline=True, return_type="array")[:, 0]
+        assert np.allclose(predictions_array_offline[:, owwModel.label_index["1_minute_timer"]], alexa_scores, atol=1e-5)
+
     def test_models_with_timing(self):
         # Load model with defaults
         owwModel = openwakeword.Model(vad_threshold=0.5)
@@ -323,3 +417,514 @@ class TestModels:
         clip = os.path.join("tests", "data", "alexa_test.wav")
         features = owwModel._get_positive_prediction_frames(clip)
         assert list(features.values())[0].shape[0] > 0
+
+    def test_feature_buffer_views(self):
+        owwModel = openwakeword.Model(wakeword_models=[
+                                        os.path.join("openwakeword", "resources", "models", "alexa_v0.1.onnx")
+                                      ], inference_framework="onnx")
+
+        for _ in range(20):
+            owwModel.predict(np.random.randint(-1000, 1000, 1280).astype(np.int16))
+
+        # Feature windows are float32 views of the feature buffer
+        features = owwModel.preprocessor.get_features(16)
+        assert features.shape == (1, 16, 96) and features.dtype == np.float32
+        assert np.shares_memory(features, owwModel.preprocessor.feature_buffer._data)
+
+        all_features = np.array(owwModel.preprocessor.feature_buffer)
+        np.testing.assert_array_equal(features[0], all_features[-16:])
+        np.testing.assert_array_equal(owwModel.preprocessor.get_features(16, start_ndx=-18)[0], all_features[-18:-2])
+
+    def test_multi_stream_model(self):
+        owwModel = openwakeword.MultiStreamModel(wakeword_models=["alexa", "timer"], inference_framework="onnx")
+
+        # Create independent models with the same initial feature buffers as each stream
+        chunk_sizes = {"a": 1280, "b": 2560, "c": 1024}
+        reference_models = {}
+        for stream_id in chunk_sizes.keys():
+            owwModel.add_stream(stream_id)
+            reference_models[stream_id] = openwakeword.Model(wakeword_models=["alexa", "timer"], inference_framework="onnx")
+            reference_models[stream_id].preprocessor.feature_buffer = copy.deepcopy(
+                owwModel.streams[stream_id].preprocessor.feature_buffer
+            )
+
+        # Predictions for each stream match the independent models
+        audio = {i: np.random.randint(-1000, 1000, 16000*4).astype(np.int16) for i in chunk_sizes.keys()}
+        for step in range(0, 16000*4 - 2560, 2560):
+            frames = {i: audio[i][step:step + chunk_sizes[i]] for i in chunk_sizes.keys()}
+            predictions = owwModel.predict(frames)
+            for stream_id, frame in frames.items():
+                reference_predictions = reference_models[stream_id].predict(frame)
+                assert predictions[stream_id].keys() == reference_predictions.keys()
+                for lbl in reference_predictions.keys():
+                    assert abs(predictions[stream_id][lbl] - reference_predictions[lbl]) < 1e-5
+
+        owwModel.reset("a")
+        owwModel.remove_stream("a")
+        assert list(owwModel.streams.keys()) == ["b", "c"]
+
+        # Resetting a stream also resets its VAD state
+        owwModel_vad = openwakeword.MultiStreamModel(wakeword_models=["alexa"], inference_framework="onnx", vad_threshold=0.5)
+        owwModel_vad.predict({"a": audio["a"][0:16000]})
+        assert len(owwModel_vad.streams["a"].vad.prediction_buffer) > 0
+        owwModel_vad.reset("a")
+        assert len(owwModel_vad.streams["a"].vad.prediction_buffer) == 0
+        assert not np.any(owwModel_vad.streams["a"].vad._h)
+
+        # Compute gating isn't supported
+        with pytest.raises(ValueError):
+            openwakeword.MultiStreamModel(inference_framework="onnx", vad_threshold=0.5, compute_gating="vad")
+
+    def test_predict_with_bytes(self):
+        np.random.seed(0)
+        owwModel = openwakeword.Model(wakeword_models=["alexa"], inference_framework="onnx")
+        np.random.seed(0)
+        owwModel_bytes = openwakeword.Model(wakeword_models=["alexa"], inference_framework="onnx")
+
+        # Audio passed as bytes-like objects with odd lengths gives the same features as Numpy arrays
+        audio = np.random.randint(-1000, 1000, 1280*10).astype(np.int16)
+        data = audio.tobytes()
+        split_points = [0, 2001, 5121, 9000, 15001, len(data)]
+        for start, end, buffer_type in zip(split_points[:-1], split_points[1:], [bytes, bytearray, memoryview, bytes]):
+            owwModel_bytes.predict(buffer_type(data[start:end]))
+            owwModel.predict(audio[start//2:end//2])
+        with tempfile.TemporaryFile() as f:
+            f.write(data[split_points[-2]:])
+            f.flush()
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped_data:
+                owwModel_bytes.predict(mapped_data)
+        owwModel.predict(audio[split_points[-2]//2:])
+
+        assert np.allclose(owwModel.preprocessor.get_features(16), owwModel_bytes.preprocessor.get_features(16))
+        assert owwModel_bytes.preprocessor.accumulated_samples == 0
+
+        with pytest.raises(ValueError):
+            owwModel.predict([0]*1280)
+
+    def test_predict_with_sample_rate(self):
+        np.random.seed(0)
+        owwModel = openwakeword.Model(wakeword_models=["alexa"], inference_framework="onnx")
+        np.random.seed(0)
+        owwModel_48khz = openwakeword.Model(wakeword_models=["alexa"], inference_framework="onnx")
+
+        # Predicting on 48 khz audio is the same as predicting on the audio resampled to 16 khz
+        audio = np.random.randint(-1000, 1000, 48000*2).astype(np.int16)
+        resampled = openwakeword.utils.StreamingResampler(48000)(audio)
+        for i in range(0, 16000*2, 1280):
+            predictions = owwModel.predict(resampled[i:i+1280])
+            predictions_48khz = owwModel_48khz.predict(audio[3*i:3*i+3840], sample_rate=48000)
+            assert abs(predictions["alexa"] - predictions_48khz["alexa"]) < 1e-5
+
+    def test_predict_array(self):
+        np.random.seed(0)
+        owwModel = openwakeword.Model(wakeword_models=["alexa", "timer"], inference_framework="onnx")
+        np.random.seed(0)
+        owwModel_array = openwakeword.Model(wakeword_models=["alexa", "timer"], inference_framework="onnx")
+        assert owwModel_array.labels[owwModel_array.label_index["5_minute_timer"]] == "5_minute_timer"
+
+        # Array predictions are in the same order as the prediction dictionaries
+        scores = np.zeros(len(owwModel_array.labels), dtype=np.float32)
+        audio = np.random.randint(-1000, 1000, 16000*2).astype(np.int16)
+        with mock.patch.object(owwModel_array, "predict", side_effect=AssertionError("predict_array uses `predict`")):
+            for i in range(0, audio.shape[0], 1280):
+                predictions = owwModel.predict(audio[i:i+1280], patience={"timer": 2}, threshold={"timer": 0.0})
+                assert owwModel_array.predict_array(audio[i:i+1280], out=scores, patience={"timer": 2},
+                                                    threshold={"timer": 0.0}) is scores
+                assert list(predictions.keys()) == owwModel_array.labels
+                assert np.array_equal(list(predictions.values()), scores)
+
+        with pytest.raises(ValueError):
+            owwModel_array.predict_array(audio[0:1280], out=np.zeros(3, dtype=np.float32))
+
+        # Multi-stream predictions have one row per stream
+        owwMultiStreamModel = openwakeword.MultiStreamModel(wakeword_models=["alexa", "timer"], inference_framework="onnx")
+        owwMultiStreamModel_dict = openwakeword.MultiStreamModel(wakeword_models=["alexa", "timer"], inference_framework="onnx")
+        for i in range(0, audio.shape[0]//2, 1280):
+            frames = {"a": audio[i:i+1280], "b": audio[audio.shape[0]//2 + i:audio.shape[0]//2 + i + 1280]}
+            stream_scores = owwMultiStreamModel.predict_array(frames)
+            stream_predictions = owwMultiStreamModel_dict.predict(frames)
+            assert stream_scores.shape == (2, len(owwMultiStreamModel.labels))
+            for row, predictions in zip(stream_scores, stream_predictions.values()):
+                assert np.array_equal(list(predictions.values()), row)
+
+    def test_create_stream(self):
+        def get_kwargs():
+            return dict(wakeword_models=["alexa", "timer"], inference_framework="onnx", vad_threshold=0.5)
+        owwModel = openwakeword.Model(**get_kwargs())
+
+        # Predict on several streams of one model concurrently, in separate threads
+        audio = [np.random.randint(-1000, 1000, 16000*4).astype(np.int16) for _ in range(4)]
+
+        def predict_stream(clip):
+            stream = owwModel.create_stream()
+            return [stream.predict(clip[i:i+1280], return_frame_scores=True) for i in range(0, clip.shape[0], 1280)]
+
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            stream_results = list(pool.map(predict_stream, audio))
+
+        # The predictions of each stream are the same as those of a separate model
+        for clip, results in zip(audio, stream_results):
+            separate_model = openwakeword.Model(**get_kwargs())
+            for i, (predictions, frame_scores) in zip(range(0, clip.shape[0], 1280), results):
+                expected_predictions, expected_frame_scores = separate_model.predict(clip[i:i+1280], return_frame_scores=True)
+                assert predictions == expected_predictions
+                assert all([np.array_equal(frame_scores[lbl], expected_frame_scores[lbl]) for lbl in frame_scores.keys()])
+
+        # The state of the model itself isn't changed by its streams
+        assert len(owwModel.prediction_buffer) == 0
+
+        # Streams can be reset, and their state can be restored in a model
+        stream = owwModel.create_stream()
+        stream.predict_array(audio[0][0:16000])
+        owwModel.restore(stream.snapshot())
+        assert np.array_equal(stream.predict_array(audio[0][16000:17280]), owwModel.predict_array(audio[0][16000:17280]))
+        stream.reset()
+        assert len(stream.prediction_buffer) == 0
+
+        # With a concurrent VAD model, each stream has its own worker thread for the VAD model
+        owwModel_concurrent = openwakeword.Model(concurrent_vad=True, **get_kwargs())
+        streams = [owwModel_concurrent.create_stream() for _ in range(2)]
+        assert streams[0].vad_thread_pool is not None
+        assert streams[0].vad_thread_pool is not streams[1].vad_thread_pool
+        assert streams[0].vad_thread_pool is not owwModel_concurrent.vad_thread_pool
+        separate_model = openwakeword.Model(**get_kwargs())
+        for i in range(0, 16000, 1280):
+            assert streams[0].predict(audio[0][i:i+1280]) == separate_model.predict(audio[0][i:i+1280])
+
+        # Closing a stream (or leaving its context) stops its worker threads, but not those of the model
+        streams[0].close()
+        streams[0].close()
+        with streams[1] as stream:
+            stream.predict(audio[1][0:1280])
+        for stream in streams:
+            with pytest.raises(RuntimeError):
+                stream.vad_thread_pool.submit(print)
+        owwModel_concurrent.predict(audio[0][0:1280])
+
+        # Each stream uses about 1 MB of memory
+        tracemalloc.start()
+        streams = [owwModel.create_stream() for _ in range(10)]
+        stream_memory = tracemalloc.get_traced_memory()[0]/len(streams)
+        tracemalloc.stop()
+        assert stream_memory < 1.1e6
+
+    def test_detect_stream(self):
+        def get_kwargs():
+            return dict(wakeword_models=["alexa"], inference_framework="onnx")
+        audio = np.random.default_rng(0).integers(-3000, 3000, 16000*10).astype(np.int16)
+        chunks = [audio[i:i+1280] for i in range(0, audio.shape[0], 1280)]
+
+        # Get the expected detections (runs of chunks with scores above the threshold) from the predictions
+        owwModel = openwakeword.Model(**get_kwargs())
+        scores = [float(owwModel.predict(chunk)["alexa"]) for chunk in chunks]
+        threshold = float(np.percentile([i for i in scores if i > 0], 75))
+        expected = []
+        for i, score in enumerate(scores):
+            if score >= threshold and (i == 0 or scores[i-1] < threshold):
+                expected.append([i*1280, (i+1)*1280, score])
+            elif score >= threshold:
+                expected[-1][1:] = [(i+1)*1280, max(expected[-1][2], score)]
+        assert len(expected) > 1
+
+        # With `emit="end"`, detections are yielded at the end of each run, with a copy of the pre-roll audio
+        detections = []
+        owwModel = openwakeword.Model(**get_kwargs())
+        for detection in owwModel.detect_stream(chunks, threshold=threshold, pre_roll=0.5, emit="end"):
+            assert np.array_equal(detection.audio, audio[max(0, detection.start - 8000):detection.end])
+            assert not np.shares_memory(detection.audio, owwModel.preprocessor.raw_data_buffer._data)
+            detections.append([detection.start, detection.end, detection.score])
+        assert detections == expected
+
+        # By default, detections are yielded as soon as they reach the patience (with the chunks up to that point)
+        n_chunks_read = []
+
+        def read_chunks():
+            for i, chunk in enumerate(chunks):
+                n_chunks_read.append(i + 1)
+                yield chunk
+
+        detections = []
+        for detection in openwakeword.Model(**get_kwargs()).detect_stream(read_chunks(), threshold=threshold, patience=2,
+                                                                          pre_roll=0.5):
+            assert n_chunks_read[-1]*1280 == detection.end
+            assert np.array_equal(detection.audio, audio[max(0, detection.start - 8000):detection.end])
+            detections.append([detection.start, detection.end, detection.score])
+        assert detections == [[i[0], i[0] + 2*1280, max(scores[i[0]//1280:i[0]//1280 + 2])]
+                              for i in expected if i[1] - i[0] >= 2*1280]
+
+        # Patience and debounce time filter the detections (the debounce time from the end of each run)
+        for emit in ["onset", "end"]:
+            detections = openwakeword.Model(**get_kwargs()).detect_stream(chunks, threshold={"alexa": threshold},
+                                                                          patience=2, emit=emit)
+            assert [i.start for i in detections] == [i[0] for i in expected if i[1] - i[0] >= 2*1280]
+            detections = openwakeword.Model(**get_kwargs()).detect_stream(chunks, threshold=threshold, debounce_time=1.0,
+                                                                          emit=emit)
+            expected_debounced = [expected[0]]
+            for i in expected[1:]:
+                if i[0] >= expected_debounced[-1][1] + 16000:
+                    expected_debounced.append(i)
+            assert [i.start for i in detections] == [i[0] for i in expected_debounced]
+
+        # Streams created by a model, and asynchronous iterables of audio are also supported
+        owwModel = openwakeword.Model(**get_kwargs())
+        detections = owwModel.create_stream().detect_stream(chunks, threshold=threshold, emit="end")
+        assert [[i.start, i.end, i.score] for i in detections] == expected
+
+        async def get_chunks():
+            for chunk in chunks:
+                yield chunk
+
+        async def detect():
+            return [i async for i in owwModel.detect_stream(get_chunks(), threshold=threshold, emit="end")]
+
+        assert [[i.start, i.end, i.score] for i in asyncio.run(detect())] == expected
+
+        with pytest.raises(ValueError):
+            owwModel.detect_stream(chunks, threshold={"not_a_model": 0.5})
+        with pytest.raises(ValueError):
+            owwModel.detect_stream(chunks, emit="peak")
+
+    def test_snapshot_and_restore(self):
+        def get_kwargs():
+            return dict(wakeword_models=["alexa", "timer"], inference_framework="onnx", vad_threshold=0.5)
+        owwModel = openwakeword.Model(**get_kwargs())
+        owwModel_restored = openwakeword.Model(**get_kwargs())
+
+        # New and reset models start with the same (warm-start) state
+        assert np.array_equal(owwModel.preprocessor.get_features(), owwModel_restored.preprocessor.get_features())
+
+        # Take a snapshot mid-stream (with partial frames of 48 khz audio, and an odd number of bytes)
+        audio = np.random.randint(-1000, 1000, 48000*4).astype(np.int16)
+        chunks = [audio[i:i+3000] for i in range(0, audio.shape[0], 3000)]
+        for chunk in chunks[0:20]:
+            owwModel.predict(chunk, sample_rate=48000)
+        owwModel.predict(chunks[20].tobytes()[0:3001], sample_rate=48000)
+        state = owwModel.snapshot()
+
+        # The restored model (from a saved state) continues the stream with the same predictions
+        f = io.BytesIO()
+        state.save(f)
+        f.seek(0)
+        owwModel_restored.restore(openwakeword.StreamState.load(f))
+        remaining_audio = chunks[20].tobytes()[3001:] + b"".join([chunk.tobytes() for chunk in chunks[21:]])
+        for i in range(0, len(remaining_audio), 6000):
+            predictions = owwModel.predict(remaining_audio[i:i+6000], sample_rate=48000)
+            assert predictions == owwModel_restored.predict(remaining_audio[i:i+6000], sample_rate=48000)
+        assert list(owwModel.vad.prediction_buffer) == list(owwModel_restored.vad.prediction_buffer)
+
+        # Streams can also be restored in a MultiStreamModel
+        owwMultiStreamModel = openwakeword.MultiStreamModel(**get_kwargs())
+        owwMultiStreamModel.restore("a", owwModel.snapshot())
+        next_chunk = np.random.randint(-1000, 1000, 3840).astype(np.int16)
+        predictions = owwModel.predict(next_chunk, sample_rate=48000)
+        multi_stream_predictions = owwMultiStreamModel.predict({"a": next_chunk}, sample_rate=48000)["a"]
+        assert all([abs(predictions[i] - multi_stream_predictions[i]) < 1e-5 for i in predictions.keys()])
+
+        # Resetting restores the warm-start state
+        owwModel.reset()
+        assert np.array_equal(owwModel.preprocessor.get_features(),
+                              openwakeword.Model(**get_kwargs()).preprocessor.get_features())
+
+    def test_concurrent_vad(self):
+        # Running the VAD model in a worker thread returns the same predictions and VAD scores
+        np.random.seed(0)
+        owwModel = openwakeword.Model(inference_framework="onnx", vad_threshold=0.5)
+        np.random.seed(0)
+        owwModel_concurrent = openwakeword.Model(inference_framework="onnx", vad_threshold=0.5, concurrent_vad=True)
+        assert owwModel_concurrent.vad_thread_pool is not None
+
+        audio = np.random.randint(-1000, 1000, 16000*2).astype(np.int16)
+        for step in range(0, audio.shape[0] - 1280, 1280):
+            predictions = owwModel.predict(audio[step:step + 1280])
+            predictions_concurrent, timing_dict = owwModel_concurrent.predict(audio[step:step + 1280], timing=True)
+            assert predictions == predictions_concurrent
+            assert "vad" in timing_dict["models"]
+        assert list(owwModel.vad.prediction_buffer) == list(owwModel_concurrent.vad.prediction_buffer)
+
+    def test_vad_batches(self):
+        vad = openwakeword.VAD()
+
+        # Batched predictions for several streams match those of independent streams
+        streams = [vad.new_stream() for _ in range(4)]
+        reference_streams = [vad.new_stream() for _ in range(4)]
+        for _ in range(3):
+            audio = [np.random.randint(-3000, 3000, 1280 if i < 3 else 1920).astype(np.int16) for i in range(4)]
+            vad.update_streams(streams, audio)
+            for stream, reference_stream, x in zip(streams, reference_streams, audio):
+                reference_stream(x)
+                assert abs(stream.prediction_buffer[-1] - reference_stream.prediction_buffer[-1]) < 1e-5
+
+        # Batched predictions for clips match predicting on each clip chunk by chunk
+        clips = [np.random.randint(-3000, 3000, n).astype(np.int16) for n in [16000, 4800, 1000]]
+        clip_scores = vad.predict_clips(clips, frame_size=480, batch_size=2)
+        for clip, scores in zip(clips, clip_scores):
+            clip = np.concatenate((clip, np.zeros(-clip.shape[0] % 480, dtype=np.int16)))
+            reference_stream = vad.new_stream()
+            reference_scores = [reference_stream.predict(clip[i:i+480]) for i in range(0, clip.shape[0], 480)]
+            np.testing.assert_allclose(scores, reference_scores, atol=1e-5)
+
+        # Clips can continue the model states of streams, which are updated to the end of each clip
+        clip_scores = vad.predict_clips(clips[0:2], frame_size=480, streams=streams[0:2])
+        for clip, scores, stream, reference_stream in zip(clips, clip_scores, streams, reference_streams):
+            clip = np.concatenate((clip, np.zeros(-clip.shape[0] % 480, dtype=np.int16)))
+            reference_scores = [reference_stream.predict(clip[i:i+480]) for i in range(0, clip.shape[0], 480)]
+            np.testing.assert_allclose(scores, reference_scores, atol=1e-5)
+            np.testing.assert_allclose(stream._h, reference_stream._h, atol=1e-5)
+
+    def test_predict_with_frame_scores(self):
+        # Scores for multi-frame inputs (predicted in one batch) match those from predicting frame by frame
+        np.random.seed(0)
+        owwModel = openwakeword.Model(wakeword_models=["alexa", "timer"], inference_framework="onnx")
+        np.random.seed(0)
+        owwModel_multi_frame = openwakeword.Model(wakeword_models=["alexa", "timer"], inference_framework="onnx")
+
+        audio = np.random.randint(-1000, 1000, 16000*3).astype(np.int16)
+        frame_scores = collections.defaultdict(list)
+        multi_frame_scores = collections.defaultdict(list)
+        for step in range(0, 1280*36, 1280*4):
+            for i in range(step, step + 1280*4, 1280):
+                _, scores = owwModel.predict(audio[i:i + 1280], return_frame_scores=True)
+                for lbl in scores.keys():
+                    frame_scores[lbl].extend(scores[lbl])
+
+            predictions, scores = owwModel_multi_frame.predict(audio[step:step + 1280*4], return_frame_scores=True)
+            for lbl in scores.keys():
+                assert scores[lbl].shape == (4,)
+                multi_frame_scores[lbl].extend(scores[lbl])
+
+        assert frame_scores.keys() == multi_frame_scores.keys() == predictions.keys()
+        for lbl in frame_scores.keys():
+            assert np.allclose(frame_scores[lbl], multi_frame_scores[lbl], atol=1e-5)
+            assert predictions[lbl] == max(multi_frame_scores[lbl][-4:])
+
+    def test_lazy_imports(self):
+        # Importing openwakeword doesn't import optional or heavy dependencies, and is fast
+        code = ("import sys, time; start = time.time(); import openwakeword; from openwakeword import Model; "
+                "print(time.time() - start); "
+                "print(','.join([i for i in ['onnxruntime', 'sklearn', 'scipy', 'requests', 'tqdm'] if i in sys.modules]))")
+        import_time, loaded_modules = subprocess.check_output([sys.executable, "-c", code], text=True).split("\n")[0:2]
+        assert loaded_modules == ""
+        assert float(import_time) < 2.0
+
+        # Lazily imported attributes are available as usual
+        assert openwakeword.VAD.__name__ == "VAD"
+        assert callable(openwakeword.train_custom_verifier)
+        with pytest.raises(AttributeError):
+            openwakeword.NotAnAttribute
+
+    def test_shared_sessions(self):
+        # Models loaded with the same settings are shared between objects
+        owwModel_1 = openwakeword.Model(wakeword_models=["alexa"], inference_framework="onnx", vad_threshold=0.5)
+        owwModel_2 = openwakeword.Model(wakeword_models=["alexa"], inference_framework="onnx", vad_threshold=0.5)
+        assert owwModel_1.models["alexa"] is owwModel_2.models["alexa"]
+        assert owwModel_1.preprocessor.melspec_model is owwModel_2.preprocessor.melspec_model
+        assert owwModel_1.preprocessor.embedding_model is owwModel_2.preprocessor.embedding_model
+        assert owwModel_1.vad.model is owwModel_2.vad.model
+
+        # While the buffers of each object are independent
+        owwModel_1.predict(np.random.randint(-1000, 1000, 1280*4).astype(np.int16))
+        assert len(owwModel_1.prediction_buffer["alexa"]) == 1 and len(owwModel_2.prediction_buffer["alexa"]) == 0
+
+    def test_model_workers(self):
+        # Running the models concurrently returns the same predictions as running them one after another
+        np.random.seed(0)
+        owwModel = openwakeword.Model(inference_framework="onnx")
+        np.random.seed(0)
+        owwModel_concurrent = openwakeword.Model(inference_framework="onnx", model_workers=2, fuse_models=True)
+
+        audio = np.random.randint(-1000, 1000, 16000*3).astype(np.int16)
+        for step in range(0, audio.shape[0] - 2560, 2560):
+            predictions = owwModel.predict(audio[step:step + 2560])
+            predictions_concurrent, timing_dict = owwModel_concurrent.predict(audio[step:step + 2560], timing=True)
+            for lbl in predictions.keys():
+                assert abs(predictions[lbl] - predictions_concurrent[lbl]) < 1e-5
+            assert all([mdl in timing_dict["models"] for mdl in owwModel_concurrent.models.keys()])
+
+        with pytest.raises(ValueError):
+            openwakeword.Model(inference_framework="onnx", model_workers=-1)
+
+    def test_compute_gating(self):
+        # Silence with short bursts of loud noise
+        audio = np.concatenate([np.concatenate((np.random.randint(-5, 5, 16000*2), np.random.randint(-8000, 8000, 16000)))
+                                for _ in range(2)]).astype(np.int16)
+
+        # With VAD compute gating, the predictions are the same as with only the VAD filter
+        np.random.seed(0)
+        owwModel = openwakeword.Model(inference_framework="onnx", vad_threshold=0.5)
+        np.random.seed(0)
+        owwModel_gated = openwakeword.Model(inference_framework="onnx", vad_threshold=0.5, compute_gating="vad", gating_hangover=0)
+        for step in range(0, audio.shape[0] - 1280, 1280):
+            predictions = owwModel.predict(audio[step:step + 1280])
+            predictions_gated = owwModel_gated.predict(audio[step:step + 1280])
+            for lbl in predictions.keys():
+                assert predictions[lbl] == predictions_gated[lbl]
+        assert owwModel_gated.get_skipped_frame_fraction() > 0
+
+        # Skipped frames have scores of zero in the prediction history, so with the `patience` argument
+        # the predictions can only be zeroed, and with the `debounce_time` argument they can differ
+        # after skipped frames
+        speech = []
+        for clip in sorted(Path(os.path.join("notebooks", "training_tutorial_data", "positive")).glob("*.wav"))[0:2]:
+            with wave.open(str(clip), mode='rb') as f:
+                speech.append(np.frombuffer(f.readframes(f.getnframes()), dtype=np.int16))
+        np.random.seed(0)
+        audio = np.concatenate([np.concatenate((np.random.randint(-5, 5, 16000*2), i)) for i in speech]).astype(np.int16)
+        for kwargs in [{"patience": {"alexa": 3}, "threshold": {"alexa": 0.0}},
+                       {"debounce_time": 1.0, "threshold": {"alexa": 1e-9}}]:
+            np.random.seed(0)
+            owwModel = openwakeword.Model(inference_framework="onnx", vad_threshold=0.5)
+            np.random.seed(0)
+            owwModel_gated = openwakeword.Model(inference_framework="onnx", vad_threshold=0.5, compute_gating="vad",
+                                                gating_hangover=0)
+            n_differences = 0
+            any_skipped = False
+            for step in range(0, audio.shape[0] - 1280, 1280):
+                predictions = owwModel.predict(audio[step:step + 1280], **kwargs)
+                predictions_gated = owwModel_gated.predict(audio[step:step + 1280], **kwargs)
+                if owwModel_gated.gated_samples > 0:
+                    any_skipped = True
+                    assert owwModel_gated.prediction_buffer["alexa"][-1] == 0.0
+                for lbl in predictions.keys():
+                    if predictions[lbl] != predictions_gated[lbl]:
+                        n_differences += 1
+                        assert any_skipped
+                        if "patience" in kwargs:
+                            assert predictions_gated[lbl] == 0.0
+            assert 0 < owwModel_gated.get_skipped_frame_fraction() < 1
+            if "debounce_time" in kwargs:
+                assert n_differences > 0
+
+        # With energy compute gating, the frames that aren't skipped have the same scores as without gating
+        np.random.seed(0)
+        owwModel = openwakeword.Model(inference_framework="onnx")
+        np.random.seed(0)
+        owwModel_gated = openwakeword.Model(inference_framework="onnx", compute_gating="energy", gating_hangover=0.5)
+        n_compared_frames = 0
+        for step in range(0, audio.shape[0] - 1280, 1280):
+            _, frame_scores = owwModel.predict(audio[step:step + 1280], return_frame_scores=True)
+            _, frame_scores_gated = owwModel_gated.predict(audio[step:step + 1280], return_frame_scores=True)
+            if owwModel_gated.preprocessor.skipped_embedding_frames == 0:
+                n_compared_frames += 1
+                for lbl in frame_scores.keys():
+                    np.testing.assert_allclose(frame_scores[lbl], frame_scores_gated[lbl], atol=1e-6)
+        assert 0 < n_compared_frames < len(range(0, audio.shape[0] - 1280, 1280))
+        assert 0 < owwModel_gated.get_skipped_frame_fraction() < 1
+
+        with pytest.raises(ValueError):
+            openwakeword.Model(inference_framework="onnx", compute_gating="vad")
+
+    def test_fused_models(self):
+        # Fused models return the same predictions as the separate models, for any frame size
+        for chunk_size in [1280, 2560, 1024]:
+            np.random.seed(0)
+            owwModel = openwakeword.Model(inference_framework="onnx")
+            np.random.seed(0)
+            owwModel_fused = openwakeword.Model(inference_framework="onnx", fuse_models=True)
+            assert len(owwModel_fused.fused_models) >= 2
+
+            audio = np.random.randint(-1000, 1000, 16000*3).astype(np.int16)
+            for step in range(0, audio.shape[0] - chunk_size, chunk_size):
+                predictions = owwModel.predict(audio[step:step + chunk_size])
+                predictions_fused = owwModel_fused.predict(audio[step:step + chunk_size])
+                for lbl in predictions.keys():
+                    assert abs(predictions[lbl] - predictions_fused[lbl]) < 1e-5
@@ -0,0 +1,82 @@
+# Copyright 2022 David Scripka. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+# Imports
+import openwakeword
+import openwakeword.quantization
+import os
+import shutil
+import numpy as np
+import scipy.io.wavfile
+import tempfile
+import pytest
+
+
+# Tests
+class TestQuantization:
+    def test_quantize_and_compare_models(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            # Copy the float models, so that the int8 variants are created in the temporary directory
+            model_dir = os.path.join(os.path.dirname(openwakeword.__file__), "resources", "models")
+            for model_name in ["alexa_v0.1.onnx", "melspectrogram.onnx", "embedding_model.onnx"]:
+                shutil.copy(os.path.join(model_dir, model_name), tmp_dir)
+            model_kwargs = dict(
+                wakeword_models=[os.path.join(tmp_dir, "alexa_v0.1.onnx")],
+                melspec_model_path=os.path.join(tmp_dir, "melspectrogram.onnx"),
+                embedding_model_path=os.path.join(tmp_dir, "embedding_model.onnx")
+            )
+
+            # Make calibration clips (a WAV file and an array)
+            rng = np.random.default_rng(0)
+            t = np.arange(16000*4)/16000
+            tone = (np.sin(2*np.pi*(300 + 200*np.sin(2*np.pi*t))*t)*8000).astype(np.int16)
+            scipy.io.wavfile.write(os.path.join(tmp_dir, "calibration.wav"), 16000, tone)
+            clips = [os.path.join(tmp_dir, "calibration.wav"), rng.integers(-2000, 2000, 16000*4).astype(np.int16)]
+
+            # The int8 variants don't exist yet
+            with pytest.raises(ValueError):
+                openwakeword.Model(inference_framework="onnx", precision="int8", **model_kwargs)
+            with pytest.raises(ValueError):
+                openwakeword.Model(inference_framework="onnx", precision="float16", **model_kwargs)
+
+            int8_model_paths = openwakeword.quantization.quantize_models(clips, **model_kwargs)
+            assert int8_model_paths == {
+                "embedding": os.path.join(tmp_dir, "embedding_model_int8.onnx"),
+                "alexa_v0.1": os.path.join(tmp_dir, "alexa_v0.1_int8.onnx")
+            }
+
+            # The int8 models have the same labels, and predict similar scores
+            float_model = openwakeword.Model(inference_framework="onnx", **model_kwargs)
+            int8_model = openwakeword.Model(inference_framework="onnx", precision="int8", **model_kwargs)
+            assert int8_model.labels == float_model.labels
+            assert int8_model.preprocessor.embedding_model_path == int8_model_paths["embedding"]
+
+            float_features = float_model.preprocessor._get_embeddings(tone)
+            int8_features = int8_model.preprocessor._get_embeddings(tone)
+            assert np.abs(int8_features - float_features).mean() < 0.1*np.abs(float_features).mean()
+
+            # Dynamic quantization doesn't need calibration clips
+            int8_model_paths = openwakeword.quantization.quantize_models(method="dynamic", quantize_embedding_model=False,
+                                                                         **model_kwargs)
+            assert list(int8_model_paths.keys()) == ["alexa_v0.1"]
+
+            # Compare the int8 and float models
+            report = openwakeword.quantization.compare_precisions({"alexa_v0.1": [tone]}, clips, n_timing_runs=5,
+                                                                  **model_kwargs)
+            assert set(report["latency"]["int8"].keys()) == {"embedding", "alexa_v0.1"}
+            assert report["score_difference"]["alexa_v0.1"]["max"] < 0.5
+            assert report["false_rejects"]["alexa_v0.1"]["float32"] == 1
+            assert report["positive_clips"] == {"alexa_v0.1": 1}
+            assert report["negative_hours"] == pytest.approx(8/3600)
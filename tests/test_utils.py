@@ -0,0 +1,128 @@
+# Copyright 2022 David Scripka. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+# Imports
+import os
+import tempfile
+import numpy as np
+import pytest
+from openwakeword.utils import RingBuffer, AudioFeatures, create_onnx_session, _get_onnx_melspectrogram_model, \
+    StreamingResampler, NumpyMelspectrogram
+
+
+# Tests
+class TestUtils:
+    def test_ring_buffer(self):
+        buffer = RingBuffer(100, dtype=np.int16)
+        reference = np.empty(0, dtype=np.int16)
+
+        # Add data in uneven chunks, wrapping around the buffer several times
+        for chunk_size in [7, 33, 64, 1, 99, 150, 12, 100, 45]:
+            x = np.random.randint(-1000, 1000, chunk_size).astype(np.int16)
+            buffer.extend(x)
+            reference = np.concatenate((reference, x))[-100:]
+
+            assert len(buffer) == reference.shape[0]
+            np.testing.assert_array_equal(np.array(buffer), reference)
+            np.testing.assert_array_equal(buffer.get_last(20), reference[-20:])
+            np.testing.assert_array_equal(buffer.get_last(20, offset=5), reference[-25:-5])
+
+        # Views share memory with the buffer
+        assert np.shares_memory(buffer.get_last(50), buffer._data)
+
+        # Buffers of multi-dimensional items
+        buffer = RingBuffer(10, item_shape=(3,), dtype=np.float32)
+        for i in range(25):
+            buffer.append(np.full(3, i))
+        np.testing.assert_array_equal(buffer.get_last(2)[:, 0], [23, 24])
+
+        buffer.clear()
+        assert len(buffer) == 0 and buffer.get_last(5).shape == (0, 3)
+
+    def test_melspectrogram_batch_rows_are_independent(self):
+        F = AudioFeatures(inference_framework="onnx")
+
+        # The melspectrogram of each row doesn't depend on the other (much louder) rows in the batch
+        x = np.random.randint(-1000, 1000, (3, 1760)).astype(np.int16)
+        x[0] = x[0]//100
+        x[1, 0:800] = 0
+        batch_melspec = F._get_melspectrogram(x)
+        for i in range(x.shape[0]):
+            np.testing.assert_allclose(batch_melspec[i], F._get_melspectrogram(x[i]), atol=1e-5)
+
+    def test_onnx_session_cache(self):
+        model_path = os.path.join("openwakeword", "resources", "models", "melspectrogram.onnx")
+        x = np.random.randint(-1000, 1000, (2, 1760)).astype(np.float32)
+        reference = create_onnx_session(model_path, lambda: _get_onnx_melspectrogram_model(model_path)).run(None, {'input': x})[0]
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            # The first session saves the optimized model, and later sessions load it (without changing the model again)
+            for load_model in [lambda: _get_onnx_melspectrogram_model(model_path), lambda: 1/0]:
+                session = create_onnx_session(model_path, load_model, variant="rows_independent", cache_dir=tmp_dir)
+                assert len(os.listdir(tmp_dir)) == 1
+                assert session.get_modelmeta().custom_metadata_map.get("rows_independent", "") == "1"
+                np.testing.assert_allclose(session.run(None, {'input': x})[0], reference, atol=1e-4)
+
+            # Different settings are cached separately
+            create_onnx_session(model_path, graph_optimization_level="basic", cache_dir=tmp_dir)
+            assert len(os.listdir(tmp_dir)) == 2
+
+        with pytest.raises(ValueError):
+            create_onnx_session(model_path, graph_optimization_level="bad_level")
+
+    def test_streaming_resampler(self):
+        import scipy.signal
+
+        for sample_rate in [48000, 44100, 22050, 8000]:
+            t = np.arange(sample_rate*2)/sample_rate
+            x = (8000*np.sin(2*np.pi*440*t) + 2000*np.sin(2*np.pi*3000*t)).astype(np.int16)
+
+            # Resampling in chunks of any size gives the same output as resampling all of the audio at once
+            resampler = StreamingResampler(sample_rate)
+            chunk_ndcs = np.cumsum(np.random.randint(1, 3000, 100))
+            chunked = np.concatenate([resampler(i) for i in np.split(x, chunk_ndcs[chunk_ndcs < x.shape[0]])])
+            resampled = StreamingResampler(sample_rate)(x)
+            assert chunked.shape[0] == resampled.shape[0] == 32000
+            assert np.array_equal(chunked, resampled)
+
+            # The output matches scipy's resampling with the same filter, after the filter delay
+            reference = scipy.signal.resample_poly(x.astype(np.float64), resampler.up, resampler.down)
+            delay = int(round(10*max(resampler.up, resampler.down)/resampler.down))
+            assert np.abs(resampled[delay + 1000:-1000] - reference[1000:-1000 - delay]).max() <= 1
+
+    def test_numpy_melspectrogram(self):
+        F = AudioFeatures(inference_framework="onnx")
+        F_numpy = AudioFeatures(inference_framework="onnx", melspec_implementation="numpy")
+        assert F_numpy.melspec_model is None
+
+        # Matches the melspectrogram model for random audio (where no values are clipped)
+        x = np.random.randint(-10000, 10000, (3, 16000)).astype(np.int16)
+        np.testing.assert_allclose(F_numpy._get_melspectrogram(x), F._get_melspectrogram(x), atol=1e-4)
+
+        # Matches the melspectrogram model for each frame of audio with loud and silent sections
+        t = np.arange(16000*3)/16000
+        audio = (np.sin(2*np.pi*440*t)*10000*(t > 1)*(t < 2)).astype(np.int16)
+        frames = np.stack([audio[i:i+512] for i in range(0, audio.shape[0] - 512 + 1, 160)])
+        melspec = F_numpy._get_melspectrogram(audio)
+        np.testing.assert_allclose(melspec, np.stack([F._get_melspectrogram(i) for i in frames]), atol=1e-4)
+        np.testing.assert_allclose(melspec, NumpyMelspectrogram()(audio[None, ].astype(np.float32))[0]/10 + 2, atol=1e-6)
+
+        # Streaming melspectrograms (80 ms of new audio with 480 samples of context) match the whole clip
+        streaming_melspec = np.concatenate([F_numpy._get_melspectrogram(audio[i - 480:i + 1280])
+                                            for i in range(480, audio.shape[0] - 1280 + 1, 1280)])
+        np.testing.assert_array_equal(streaming_melspec, melspec[0:streaming_melspec.shape[0]])
+
+        with pytest.raises(ValueError):
+            AudioFeatures(inference_framework="onnx", melspec_implementation="librosa")